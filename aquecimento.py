@@ -0,0 +1,174 @@
+import os
+import sys
+import threading
+
+from corpus import obter_corpus
+from indice import obter_indice
+from estrutura import obter_estrutura
+from referencias import obter_grafo
+from ranking import ORDEM_RELEVANCIA
+from ia import MODELO, VERSAO_PROMPT, MENSAGENS_FALHA, explicar_artigos, obter_laco
+from cache_explicacoes import obter_cache_explicacoes, hash_texto
+from limitador import ReservaOciosa, obter_limitador
+from popularidade import obter_registro_uso
+from metricas import fase, contar
+from consultas import ConsultaInvalida, TAMANHO_CACHE_CONSULTAS, entradas_cache
+from motor import LEIS_CONFIG, buscar, resolver_referencia
+
+# =========================================================================
+# AQUECIMENTO DOS CACHES APÓS UM REINÍCIO
+# =========================================================================
+#
+# Depois de um deploy ou reinício, todos os caches do processo estão vazios
+# e os primeiros usuários pagariam o custo "frio". O aquecimento roda em uma
+# thread de fundo logo na subida e, em ordem:
+#   1. abre o corpus, o índice invertido e a estrutura de cada lei, e monta o
+#      grafo de referências cruzadas;
+#   2. refaz as CONSULTAS_AQUECIMENTO consultas mais populares do registro de
+#      uso (ver popularidade.py), enchendo o cache de consultas e o de textos
+#      normalizados dos previews. O cache de consultas é um LRU único para
+#      todas as leis: o aquecimento ocupa no máximo FRACAO_CACHE_AQUECIMENTO
+#      dele (cada consulta ocupa uma entrada por lei, mais uma por termo), para
+#      não expulsar as próprias entradas nem as dos usuários;
+#   3. explica, com a API, os artigos mais pedidos em "Explicar artigos" que
+#      ainda não estão no cache de explicações, até ORCAMENTO_API_AQUECIMENTO
+#      artigos. As chamadas usam só a folga do limitador de taxa global
+#      (limitador.ReservaOciosa): esperam o balde encher e cedem a vez às
+#      chamadas dos usuários.
+#
+# Nada aqui usa o Streamlit; a página só chama iniciar_aquecimento uma vez
+# por processo. Também pode ser rodado antes de subir a página, para encher
+# só o cache de explicações (que fica em disco):
+#   python aquecimento.py [orcamento_api]
+
+CONSULTAS_AQUECIMENTO = int(os.environ.get("AQUECIMENTO_CONSULTAS", "50"))
+FRACAO_CACHE_AQUECIMENTO = 0.5
+ORCAMENTO_API_AQUECIMENTO = int(os.environ.get("AQUECIMENTO_ORCAMENTO_API", "10"))
+
+# Artigos populares examinados por artigo do orçamento (muitos já estão no cache)
+CANDIDATOS_POR_CHAMADA = 4
+
+
+def aquecer_leis():
+    """Abre o corpus, o índice e a estrutura de cada lei e monta o grafo de referências."""
+    abertas = 0
+    with fase("aquecimento.leis"):
+        for config in LEIS_CONFIG.values():
+            try:
+                obter_indice(config['file'], config['sigla'])
+                obter_estrutura(config['file'], config['sigla'])
+            except FileNotFoundError:
+                continue
+            abertas += 1
+        obter_grafo(tuple((config['file'], config['sigla']) for config in LEIS_CONFIG.values()))
+    return abertas
+
+
+def aquecer_consultas(registro, n=CONSULTAS_AQUECIMENTO):
+    """
+    Refaz as n consultas mais populares (na ordem padrão da página, por
+    relevância) que cabem na parte do cache de consultas reservada ao
+    aquecimento. Retorna quantas foram refeitas.
+    """
+    orcamento = int(TAMANHO_CACHE_CONSULTAS * FRACAO_CACHE_AQUECIMENTO)
+    refeitas = 0
+    with fase("aquecimento.consultas"):
+        for consulta in registro.consultas_populares(n):
+            try:
+                custo = entradas_cache(consulta) * len(LEIS_CONFIG)
+            except ConsultaInvalida:
+                continue  # registrada antes de a sintaxe ser validada
+            if custo > orcamento:
+                continue  # uma consulta mais barata, menos popular, ainda pode caber
+            orcamento -= custo
+            buscar(consulta, ORDEM_RELEVANCIA)
+            refeitas += 1
+    contar("aquecimento.consultas", refeitas)
+    return refeitas
+
+
+def artigos_sem_explicacao(registro, orcamento):
+    """Até `orcamento` artigos populares (resultados de motor) ainda fora do cache de explicações."""
+    cache = obter_cache_explicacoes()
+    pendentes = []
+    for arquivo, hash_artigo, indice, no in registro.artigos_populares(orcamento * CANDIDATOS_POR_CHAMADA):
+        # O registro não guarda a versão da lei: o endereço é tentado na versão
+        # atual e pode apontar para outro texto (ou para fora da lei) se ela mudou
+        try:
+            artigo = resolver_referencia((arquivo, indice, no, obter_corpus(arquivo).versao))
+        except (FileNotFoundError, IndexError):
+            continue
+        if artigo is None or hash_texto(artigo['texto_completo']) != hash_artigo:
+            continue
+        if cache.contem(artigo['texto_completo'], MODELO, VERSAO_PROMPT):
+            continue
+        pendentes.append(artigo)
+        if len(pendentes) >= orcamento:
+            break
+    return pendentes
+
+
+def aquecer_explicacoes(cliente, registro, orcamento=ORCAMENTO_API_AQUECIMENTO):
+    """Explica os artigos mais pedidos que não estão no cache, gastando no máximo `orcamento` artigos da API."""
+    if cliente is None or orcamento <= 0:
+        return 0
+    artigos = artigos_sem_explicacao(registro, orcamento)
+    if not artigos:
+        return 0
+
+    cache = obter_cache_explicacoes()
+    with fase("aquecimento.explicacoes"):
+        explicacoes = obter_laco().enviar(
+            explicar_artigos(
+                cliente,
+                [artigo['texto_completo'] for artigo in artigos],
+                limitador=ReservaOciosa(obter_limitador()),
+            )
+        ).result()
+    guardadas = 0
+    for artigo, explicacao in zip(artigos, explicacoes):
+        if explicacao not in MENSAGENS_FALHA:
+            cache.guardar(artigo['texto_completo'], MODELO, VERSAO_PROMPT, explicacao, artigo['arquivo'])
+            guardadas += 1
+    contar("aquecimento.explicacoes", guardadas)
+    return guardadas
+
+
+def aquecer(cliente=None, consultas=CONSULTAS_AQUECIMENTO, orcamento_api=ORCAMENTO_API_AQUECIMENTO):
+    """
+    Executa as três etapas do aquecimento. Sem `cliente` (Gemini), a etapa
+    das explicações é pulada. Retorna {"leis", "consultas", "explicacoes"}.
+    """
+    registro = obter_registro_uso()
+    return {
+        "leis": aquecer_leis(),
+        "consultas": aquecer_consultas(registro, consultas),
+        "explicacoes": aquecer_explicacoes(cliente, registro, orcamento_api),
+    }
+
+
+def iniciar_aquecimento(cliente=None, consultas=CONSULTAS_AQUECIMENTO, orcamento_api=ORCAMENTO_API_AQUECIMENTO):
+    """Dispara aquecer() em uma thread de fundo e retorna a thread."""
+    thread = threading.Thread(
+        target=aquecer, args=(cliente, consultas, orcamento_api), name="aquecimento", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def main(argv):
+    cliente = None
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if api_key:
+        from google import genai
+        cliente = genai.Client(api_key=api_key)
+    else:
+        print("GEMINI_API_KEY não definida: as explicações não serão pré-geradas.", file=sys.stderr)
+    orcamento = int(argv[0]) if argv else ORCAMENTO_API_AQUECIMENTO
+    resumo = aquecer(cliente, orcamento_api=orcamento)
+    print(f"{resumo['leis']} leis abertas, {resumo['consultas']} consultas refeitas, "
+          f"{resumo['explicacoes']} explicações geradas")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,384 @@
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import statistics
+import tracemalloc
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from corpus import obter_corpus
+from indice import obter_indice
+from consultas import CACHE_CONSULTAS
+from trigramas import IndiceTrigramas, LIMITE_SIMILARIDADE as LIMITE_TRIGRAMAS
+from vetores import ModeloVetorial, LIMITE_SIMILARIDADE as LIMITE_VETORIAL
+from motor import LEIS_CONFIG, formatar_artigo, trecho_kwic, buscar_em_arquivo, buscar_todas_as_leis
+
+# =========================================================================
+# BENCHMARK DO CAMINHO DE BUSCA
+# =========================================================================
+#
+# Roda uma carga fixa de consultas sobre as leis do repositório e mede:
+#   - latência fria (cache de consultas vazio) e quente (p50/p95/p99/máx.)
+#     de buscar_em_arquivo e da busca em todas as leis (sequencial e em threads,
+#     como executar_busca_completa);
+#   - formatar_artigo, trecho_kwic e a busca de semelhantes como em
+#     direito.buscar_semelhantes: o modelo vetorial TF-IDF/LSA ("semelhantes")
+#     e, para consultas sem nenhuma palavra conhecida, o índice de trigramas
+#     ("semelhantes_trigramas");
+#   - vazão (consultas/s), pico de RSS e pico de alocações por consulta.
+#
+# O resultado é gravado em JSON e pode ser comparado com uma baseline; o
+# script termina com código 1 se alguma métrica piorar além da tolerância.
+#
+# Os tempos são em ms absolutos e só valem na máquina em que foram medidos,
+# por isso a baseline.json NÃO é versionada: rode `make baseline` no host
+# onde o benchmark vai rodar (antes da mudança a avaliar) e depois
+# `make benchmark`, que compara com ela e falha se houver regressão. Se a
+# baseline for de outra plataforma ou versão do Python (ver "metadados" no
+# arquivo), a comparação avisa que os números não são comparáveis.
+#
+# Uso:
+#   python benchmark_busca.py --saida resultado.json
+#   python benchmark_busca.py --salvar-baseline baseline.json
+#   python benchmark_busca.py --baseline baseline.json [--tolerancia 0.25]
+
+ARQUIVOS = [
+    "constituicao.txt", "codigo_civil.txt", "codigo_penal.txt",
+    "codigo_processo_civil.txt", "codigo_processo_penal.txt",
+    "codigo_defesa_consumidor.txt", "codigo_tributario_nacional.txt",
+    "consolidacao_leis_trabalho.txt", "estatuto_crianca_adolescente.txt",
+]
+
+# (categoria, consulta) - cada categoria exercita um caminho diferente da busca
+CONSULTAS = [
+    ("rara", "habeas-corpus"),
+    ("rara", "usucapião"),
+    ("rara", "precatório"),
+    ("comum", "lei"),
+    ("comum", "direito"),
+    ("comum", "prazo"),
+    ("virgula_e", "lei, prazo"),
+    ("virgula_e", "contrato, rescisão"),
+    ("virgula_e", "dignidade, pessoa humana"),
+    ("acentuada", "contribuição social"),
+    ("acentuada", "férias"),
+    ("acentuada", "obrigação tributária"),
+    ("sem_resultado", "xyzzy"),
+    ("sem_resultado", "blockchain"),
+    ("sem_resultado", "inteligência artificial generativa"),
+]
+
+CONSULTAS_SEMELHANTES = ["dignidade da pessoa humana", "contribuicao social", "ferias remuneradas"]
+# Nenhuma palavra existe nos textos: direito.buscar_semelhantes cai no índice de trigramas
+CONSULTAS_SEMELHANTES_TRIGRAMAS = ["dignidde pesoa humanna", "resposabilidad civyl", "feriaz remuneradaz"]
+
+REPETICOES_PADRAO = 5
+DURACAO_VAZAO_PADRAO = 2.0  # segundos
+TOLERANCIA_PADRAO = 0.25
+# Diferenças absolutas menores que isto (em ms) são ruído, não regressão
+FOLGA_MS_PADRAO = 1.0
+
+# Métricas em que um valor MAIOR é melhor (as demais: menor é melhor)
+MAIOR_E_MELHOR = ("vazao",)
+
+
+def percentis(amostras):
+    """Resumo de latências (em segundos) em milissegundos."""
+    ordenadas = sorted(amostras)
+
+    def p(q):
+        return ordenadas[min(len(ordenadas) - 1, int(q / 100 * len(ordenadas)))] * 1000
+
+    return {
+        "n": len(ordenadas),
+        "p50_ms": p(50),
+        "p95_ms": p(95),
+        "p99_ms": p(99),
+        "max_ms": ordenadas[-1] * 1000,
+        "media_ms": statistics.fmean(ordenadas) * 1000,
+    }
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def medir_inicializacao():
+    """Tempo para abrir os corpora mapeados e montar os índices invertidos."""
+    inicio = time.perf_counter()
+    for config in LEIS_CONFIG.values():
+        obter_corpus(config['file'], config['sigla'])
+        obter_indice(config['file'], config['sigla'])
+    return (time.perf_counter() - inicio) * 1000
+
+
+def medir_latencias(repeticoes, executor):
+    """Latências fria e quente, por operação e por categoria de consulta."""
+    amostras = {}
+    por_categoria = {}
+
+    def registrar(nome, categoria, duracao):
+        amostras.setdefault(nome, []).append(duracao)
+        por_categoria.setdefault(f"{categoria}/{nome}", []).append(duracao)
+
+    for _ in range(repeticoes):
+        for categoria, consulta in CONSULTAS:
+            for config in LEIS_CONFIG.values():
+                CACHE_CONSULTAS.limpar()
+                registrar("buscar_em_arquivo/fria", categoria, cronometrar(
+                    lambda: buscar_em_arquivo(consulta, config['file'], config['sigla'])))
+                registrar("buscar_em_arquivo/quente", categoria, cronometrar(
+                    lambda: buscar_em_arquivo(consulta, config['file'], config['sigla'])))
+
+            CACHE_CONSULTAS.limpar()
+            registrar("todas_as_leis_sequencial/fria", categoria, cronometrar(
+                lambda: buscar_todas_as_leis(consulta)))
+            registrar("todas_as_leis_sequencial/quente", categoria, cronometrar(
+                lambda: buscar_todas_as_leis(consulta)))
+            CACHE_CONSULTAS.limpar()
+            registrar("todas_as_leis_threads/fria", categoria, cronometrar(
+                lambda: buscar_todas_as_leis(consulta, executor=executor)))
+            registrar("todas_as_leis_threads/quente", categoria, cronometrar(
+                lambda: buscar_todas_as_leis(consulta, executor=executor)))
+
+    return (
+        {nome: percentis(valores) for nome, valores in amostras.items()},
+        {nome: percentis(valores) for nome, valores in sorted(por_categoria.items())},
+    )
+
+
+def medir_formatar_artigo(repeticoes):
+    """Latência de formatar_artigo sobre todos os artigos da Constituição."""
+    corpus = obter_corpus("constituicao.txt")
+    textos = [corpus.texto(i) for i in range(corpus.total)]
+    amostras = []
+    for _ in range(repeticoes):
+        for texto in textos:
+            amostras.append(cronometrar(lambda: formatar_artigo(texto)))
+    return percentis(amostras)
+
+
+def medir_trecho_kwic(repeticoes):
+    """Latência do preview em volta do termo (trecho_kwic) sobre todos os artigos da Constituição."""
+    corpus = obter_corpus("constituicao.txt")
+    amostras = []
+    for _ in range(repeticoes):
+        for i in range(corpus.total):
+            amostras.append(cronometrar(lambda: trecho_kwic(*corpus.texto_normalizado(i), ["lei"])))
+    return percentis(amostras)
+
+
+def artigos_das_leis():
+    """Pares ((arquivo, índice), texto) de todos os artigos das nove leis."""
+    artigos = []
+    for arquivo in ARQUIVOS:
+        corpus = obter_corpus(arquivo)
+        artigos.extend(((arquivo, i), corpus.texto(i)) for i in range(corpus.total))
+    return artigos
+
+
+def medir_semelhantes(repeticoes, artigos):
+    """
+    Construção do modelo vetorial das nove leis e consultas por lei, como no
+    caminho principal de direito.buscar_semelhantes (até 3 x 10 candidatos).
+    """
+    inicio = time.perf_counter()
+    modelo = ModeloVetorial(artigos)
+    construcao_ms = (time.perf_counter() - inicio) * 1000
+
+    amostras = []
+    for _ in range(repeticoes):
+        for consulta in CONSULTAS_SEMELHANTES:
+            for arquivo in ARQUIVOS:
+                amostras.append(cronometrar(lambda: modelo.mais_similares(
+                    modelo.vetor_consulta(consulta), 30, LIMITE_VETORIAL,
+                    filtro=lambda chave: chave[0] == arquivo)))
+    return {"construcao_ms": construcao_ms, **percentis(amostras)}
+
+
+def medir_semelhantes_trigramas(repeticoes, artigos):
+    """Construção do índice de trigramas e consultas por lei (o fallback de direito.buscar_semelhantes)."""
+    inicio = time.perf_counter()
+    indice = IndiceTrigramas(artigos)
+    construcao_ms = (time.perf_counter() - inicio) * 1000
+
+    amostras = []
+    for _ in range(repeticoes):
+        for consulta in CONSULTAS_SEMELHANTES_TRIGRAMAS:
+            for arquivo in ARQUIVOS:
+                amostras.append(cronometrar(lambda: indice.buscar(
+                    consulta, LIMITE_TRIGRAMAS, filtro=lambda chave: chave[0] == arquivo)))
+    return {"construcao_ms": construcao_ms, **percentis(amostras)}
+
+
+def medir_vazao(duracao, executor):
+    """Consultas completas (todas as leis, cache quente) por segundo."""
+    for _, consulta in CONSULTAS:
+        buscar_todas_as_leis(consulta, executor=executor)
+    total = 0
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < duracao:
+        for _, consulta in CONSULTAS:
+            buscar_todas_as_leis(consulta, executor=executor)
+        total += len(CONSULTAS)
+    return total / (time.perf_counter() - inicio)
+
+
+def medir_alocacoes():
+    """Pico de memória alocada (tracemalloc) por consulta fria em todas as leis."""
+    picos = {}
+    tracemalloc.start()
+    try:
+        for categoria, consulta in CONSULTAS:
+            CACHE_CONSULTAS.limpar()
+            tracemalloc.reset_peak()
+            antes, _ = tracemalloc.get_traced_memory()
+            buscar_todas_as_leis(consulta)
+            _, pico = tracemalloc.get_traced_memory()
+            picos.setdefault(categoria, []).append((pico - antes) / 1024)
+    finally:
+        tracemalloc.stop()
+    todos = [valor for valores in picos.values() for valor in valores]
+    return {
+        "alocacao_pico_kb_media": statistics.fmean(todos),
+        "alocacao_pico_kb_max": max(todos),
+        "por_categoria_kb": {categoria: statistics.fmean(valores) for categoria, valores in picos.items()},
+    }
+
+
+def executar(repeticoes=REPETICOES_PADRAO, duracao_vazao=DURACAO_VAZAO_PADRAO):
+    """Roda todo o benchmark e retorna o dicionário de resultados."""
+    resultado = {
+        "metadados": {
+            "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "repeticoes": repeticoes,
+            "consultas": [consulta for _, consulta in CONSULTAS],
+        },
+        "inicializacao_ms": medir_inicializacao(),
+    }
+
+    with ThreadPoolExecutor(max_workers=len(LEIS_CONFIG), thread_name_prefix="busca_lei") as executor:
+        resultado["operacoes"], resultado["categorias"] = medir_latencias(repeticoes, executor)
+        resultado["operacoes"]["formatar_artigo"] = medir_formatar_artigo(repeticoes)
+        resultado["operacoes"]["trecho_kwic"] = medir_trecho_kwic(repeticoes)
+        artigos = artigos_das_leis()
+        resultado["operacoes"]["semelhantes"] = medir_semelhantes(repeticoes, artigos)
+        resultado["operacoes"]["semelhantes_trigramas"] = medir_semelhantes_trigramas(repeticoes, artigos)
+        resultado["vazao_consultas_por_s"] = medir_vazao(duracao_vazao, executor)
+
+    resultado["memoria"] = medir_alocacoes()
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    resultado["memoria"]["rss_pico_mb"] = rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return resultado
+
+
+# =========================================================================
+# COMPARAÇÃO COM A BASELINE
+# =========================================================================
+
+def metricas_comparaveis(resultado):
+    """Achata o resultado em {nome: valor} com as métricas usadas na comparação."""
+    metricas = {"inicializacao_ms": resultado["inicializacao_ms"]}
+    for nome, resumo in resultado["operacoes"].items():
+        for chave in ("p50_ms", "p95_ms", "construcao_ms"):
+            if chave in resumo:
+                metricas[f"{nome}.{chave}"] = resumo[chave]
+    metricas["vazao_consultas_por_s"] = resultado["vazao_consultas_por_s"]
+    metricas["memoria.rss_pico_mb"] = resultado["memoria"]["rss_pico_mb"]
+    metricas["memoria.alocacao_pico_kb_media"] = resultado["memoria"]["alocacao_pico_kb_media"]
+    return metricas
+
+
+def comparar(resultado, baseline, tolerancia=TOLERANCIA_PADRAO, folga_ms=FOLGA_MS_PADRAO):
+    """
+    Compara as métricas com a baseline. Retorna a lista de regressões
+    (nome, valor_baseline, valor_atual, variacao) acima da tolerância; em
+    métricas de tempo, a piora também precisa passar de `folga_ms`.
+    """
+    atuais = metricas_comparaveis(resultado)
+    anteriores = metricas_comparaveis(baseline)
+    regressoes = []
+    print(f"{'métrica':52} {'baseline':>12} {'atual':>12} {'variação':>9}")
+    for nome, atual in atuais.items():
+        anterior = anteriores.get(nome)
+        if not anterior:
+            continue
+        variacao = (atual - anterior) / anterior
+        if nome.startswith(MAIOR_E_MELHOR):
+            piorou = variacao < -tolerancia
+        else:
+            piorou = variacao > tolerancia
+            if nome.endswith("_ms") and atual - anterior < folga_ms:
+                piorou = False
+        marca = "  << REGRESSÃO" if piorou else ""
+        print(f"{nome:52} {anterior:12.3f} {atual:12.3f} {variacao:+8.0%}{marca}")
+        if piorou:
+            regressoes.append((nome, anterior, atual, variacao))
+    return regressoes
+
+
+def imprimir_resumo(resultado):
+    print(f"inicialização (corpora + índices): {resultado['inicializacao_ms']:.0f} ms")
+    print(f"{'operação':36} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'máx. (ms)':>10}")
+    for nome, resumo in resultado["operacoes"].items():
+        print(
+            f"{nome:36} {resumo['p50_ms']:10.3f} {resumo['p95_ms']:10.3f} "
+            f"{resumo['p99_ms']:10.3f} {resumo['max_ms']:10.3f}"
+        )
+    print(f"vazão (todas as leis, cache quente): {resultado['vazao_consultas_por_s']:.0f} consultas/s")
+    memoria = resultado["memoria"]
+    print(
+        f"memória: pico de RSS {memoria['rss_pico_mb']:.0f} MB · alocação por consulta "
+        f"{memoria['alocacao_pico_kb_media']:.0f} KB (máx. {memoria['alocacao_pico_kb_max']:.0f} KB)"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da busca nas leis do repositório.")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES_PADRAO)
+    parser.add_argument("--duracao-vazao", type=float, default=DURACAO_VAZAO_PADRAO,
+                        help="segundos do teste de vazão")
+    parser.add_argument("--saida", help="grava o resultado (JSON) neste arquivo")
+    parser.add_argument("--salvar-baseline", help="grava o resultado como baseline neste arquivo")
+    parser.add_argument("--baseline", help="compara com a baseline deste arquivo")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO,
+                        help="piora relativa aceita antes de acusar regressão (0.25 = 25%%)")
+    parser.add_argument("--folga-ms", type=float, default=FOLGA_MS_PADRAO,
+                        help="piora absoluta mínima (ms) para acusar regressão em métricas de tempo")
+    args = parser.parse_args(argv)
+
+    resultado = executar(args.repeticoes, args.duracao_vazao)
+    imprimir_resumo(resultado)
+
+    for caminho in (args.saida, args.salvar_baseline):
+        if caminho:
+            with open(caminho, "w", encoding="utf-8") as arquivo:
+                json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as arquivo:
+            baseline = json.load(arquivo)
+        print()
+        origem, atual = baseline.get("metadados", {}), resultado["metadados"]
+        if (origem.get("plataforma"), origem.get("python")) != (atual["plataforma"], atual["python"]):
+            print(
+                f"AVISO: a baseline foi gravada em {origem.get('plataforma')} (Python {origem.get('python')}); "
+                "os tempos só são comparáveis na mesma máquina. Regrave com `make baseline` neste host."
+            )
+        regressoes = comparar(resultado, baseline, args.tolerancia, args.folga_ms)
+        if regressoes:
+            print(f"\n{len(regressoes)} métrica(s) pioraram mais de {args.tolerancia:.0%}.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import sys
+import time
+import difflib
+import statistics
+
+from corpus import obter_corpus
+from trigramas import IndiceTrigramas
+from vetores import ModeloVetorial
+
+# =========================================================================
+# BENCHMARK: difflib.SequenceMatcher x índice de trigramas x modelo vetorial
+# =========================================================================
+#
+# Compara a implementação original de direito.buscar_semelhantes (ratio do
+# SequenceMatcher contra o texto de cada artigo) com o índice de trigramas e
+# com o modelo vetorial TF-IDF/LSA, sobre os artigos reais das nove leis do
+# repositório.
+#
+# Uso: python benchmark_semelhantes.py [repeticoes]
+
+ARQUIVOS = [
+    "constituicao.txt", "codigo_civil.txt", "codigo_penal.txt",
+    "codigo_processo_civil.txt", "codigo_processo_penal.txt",
+    "codigo_defesa_consumidor.txt", "codigo_tributario_nacional.txt",
+    "consolidacao_leis_trabalho.txt", "estatuto_crianca_adolescente.txt",
+]
+
+CONSULTAS = [
+    "dignidade da pessoa humana",
+    "dignidde da pesoa humana",
+    "contribuicao social",
+    "responsabilidade civil",
+    "habeas corpus",
+    "ferias remuneradas",
+]
+
+
+def semelhantes_difflib(artigos, termo, limite=0.5):
+    """Implementação original (direito.buscar_semelhantes, antes do índice)."""
+    artigos_semelhantes = {}
+    termo_lower = termo.lower()
+    for artigo, texto in artigos:
+        ratio = difflib.SequenceMatcher(None, termo_lower, texto.lower()).ratio()
+        if limite <= ratio < 1.0:
+            artigos_semelhantes[artigo] = texto
+    return artigos_semelhantes
+
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def main(repeticoes=3):
+    artigos = []
+    for arquivo in ARQUIVOS:
+        corpus = obter_corpus(arquivo)
+        artigos.extend(((arquivo, i), corpus.texto(i)) for i in range(corpus.total))
+    print(f"{len(artigos)} artigos em {len(ARQUIVOS)} leis")
+
+    inicio = time.perf_counter()
+    indice = IndiceTrigramas(artigos)
+    print(f"construção do índice de trigramas: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+    inicio = time.perf_counter()
+    modelo = ModeloVetorial(artigos)
+    print(f"construção do modelo vetorial: {(time.perf_counter() - inicio) * 1000:.0f} ms "
+          f"({len(modelo.vocabulario)} termos, {modelo.dimensoes} dimensões)")
+    print()
+
+    print(f"{'consulta':32} {'difflib (ms)':>14} {'trigramas (ms)':>15} {'ganho':>8} {'candidatos':>11} {'vetorial (ms)':>14}")
+    for consulta in CONSULTAS:
+        t_difflib = cronometrar(lambda: semelhantes_difflib(artigos, consulta), repeticoes)
+        t_trigramas = cronometrar(lambda: indice.buscar(consulta, 0.5, maximo=10), repeticoes)
+        t_vetorial = cronometrar(lambda: modelo.mais_similares(modelo.vetor_consulta(consulta), 10), repeticoes)
+        candidatos = len(indice.buscar(consulta, 0.5))
+        print(
+            f"{consulta:32} {t_difflib * 1000:14.1f} {t_trigramas * 1000:15.2f} "
+            f"{t_difflib / t_trigramas:7.0f}x {candidatos:11d} {t_vetorial * 1000:14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,176 @@
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+
+from corpus import obter_corpus
+from indice import obter_indice
+from ranking import ORDEM_DOCUMENTO, ORDEM_RELEVANCIA, TOP_K_PADRAO
+from consultas import ConsultaInvalida
+from motor import LEIS_CONFIG, SIGLA_POR_ARQUIVO, buscar
+
+# =========================================================================
+# BUSCA EM LOTE (LINHA DE COMANDO)
+# =========================================================================
+#
+# Roda milhares de consultas sem a página: lê uma consulta por linha (texto
+# puro, ou JSON com {"id": ..., "consulta": ...}) de um arquivo ou da entrada
+# padrão e escreve um resultado JSON por linha (JSONL), na mesma ordem da
+# entrada, à medida que ficam prontos. As consultas são distribuídas entre
+# processos (um por núcleo, por padrão); cada processo abre os corpora
+# mapeados em memória e monta os seus índices uma única vez.
+#
+# Uso:
+#   python busca_lote.py consultas.txt > resultados.jsonl
+#   cat processos.jsonl | python busca_lote.py --ordem relevancia --limite 5 --leis CF,CC
+#
+# Cada linha de saída:
+#   {"id": ..., "consulta": ..., "termos": [...], "total": N,
+#    "leis": {"CF": {"total": N, "erro": null}, ...},
+#    "artigos": [{"lei": "CF", "numero": "Art. 5", "indice": 4, "pontuacao": ..., "preview": ...}, ...]}
+#
+# Uma linha de entrada inválida (JSON malformado, que não é um objeto, sem
+# "consulta" em texto, ou consulta com operadores malformada, ver
+# consultas.ConsultaInvalida) não interrompe o lote: vira uma linha de erro,
+# na mesma posição, e o lote segue com a próxima.
+#   {"id": ..., "consulta": null, "erro": "..."}
+# (com a consulta em "consulta" quando o problema é a sintaxe dela)
+
+TAMANHO_LOTE_PROCESSO = 16  # consultas enviadas a cada processo por vez
+
+
+def _preparar_processo(leis):
+    """Inicializador dos processos: abre os corpora e monta os índices antes da primeira consulta."""
+    for titulo in leis:
+        config = LEIS_CONFIG[titulo]
+        try:
+            obter_indice(config['file'], config['sigla'])
+        except FileNotFoundError:
+            pass  # a consulta devolve o erro da lei na saída
+
+
+def ler_consultas(linhas):
+    """
+    Gera (id, consulta, erro) a partir de linhas de texto puro ou JSON;
+    ignora linhas vazias. Para linhas inválidas, consulta é None e erro
+    descreve o problema (senão, erro é None).
+    """
+    for numero, linha in enumerate(linhas, 1):
+        linha = linha.strip()
+        if not linha:
+            continue
+        if not linha.startswith("{"):
+            yield numero, linha, None
+            continue
+        try:
+            registro = json.loads(linha)
+        except json.JSONDecodeError as e:
+            yield numero, None, f"JSON inválido: {e}"
+            continue
+        if not isinstance(registro, dict):
+            yield numero, None, "a linha JSON deve ser um objeto"
+            continue
+        id_consulta = registro.get("id", numero)
+        consulta = registro.get("consulta")
+        if not isinstance(consulta, str):
+            yield id_consulta, None, 'campo "consulta" ausente ou não é texto'
+        else:
+            yield id_consulta, consulta, None
+
+
+def processar(tarefa):
+    """Executa uma consulta e devolve a linha JSON de saída (ou a linha de erro de uma entrada inválida)."""
+    (id_consulta, consulta, erro), ordem, limite, leis, incluir_texto = tarefa
+    if erro is not None:
+        return json.dumps({"id": id_consulta, "consulta": None, "erro": erro}, ensure_ascii=False)
+    try:
+        resposta = buscar(consulta, ordem=ordem, limite=limite, leis=leis)
+    except ConsultaInvalida as e:
+        return json.dumps({"id": id_consulta, "consulta": consulta, "erro": f"consulta inválida: {e}"},
+                          ensure_ascii=False)
+
+    artigos = []
+    for resultado in resposta["todos"]:
+        artigo = {
+            "lei": SIGLA_POR_ARQUIVO[resultado['arquivo']],
+            "numero": resultado['numero'],
+            "indice": resultado['indice'],
+            "pontuacao": resultado['pontuacao'],
+            "preview": resultado['preview'],
+        }
+        if incluir_texto:
+            artigo["texto"] = resultado['texto_completo']
+        artigos.append(artigo)
+
+    por_lei = {
+        LEIS_CONFIG[titulo]['sigla']: {"total": dados["total"], "erro": dados["erro"]}
+        for titulo, dados in resposta["leis"].items()
+    }
+    return json.dumps({
+        "id": id_consulta,
+        "consulta": consulta,
+        "termos": resposta["termos"],
+        "total": sum(dados["total"] for dados in por_lei.values()),
+        "leis": por_lei,
+        "artigos": artigos,
+    }, ensure_ascii=False)
+
+
+def main(argv=None):
+    siglas = {config['sigla']: titulo for titulo, config in LEIS_CONFIG.items()}
+    parser = argparse.ArgumentParser(description="Busca em lote nas leis, com saída JSONL.")
+    parser.add_argument("entrada", nargs="?", help="arquivo de consultas (padrão: entrada padrão)")
+    parser.add_argument("-o", "--saida", help="arquivo JSONL de saída (padrão: saída padrão)")
+    parser.add_argument("--ordem", choices=[ORDEM_DOCUMENTO, ORDEM_RELEVANCIA], default=ORDEM_RELEVANCIA)
+    parser.add_argument("--limite", type=int, default=TOP_K_PADRAO, help="artigos por lei em cada resultado")
+    parser.add_argument("--leis", help=f"siglas separadas por vírgula ({','.join(siglas)}); padrão: todas")
+    parser.add_argument("--texto", action="store_true", help="inclui o texto completo de cada artigo")
+    parser.add_argument("-p", "--processos", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    if args.leis:
+        try:
+            leis = [siglas[sigla.strip().upper()] for sigla in args.leis.split(",") if sigla.strip()]
+        except KeyError as e:
+            parser.error(f"lei desconhecida: {e.args[0]}")
+    else:
+        leis = list(LEIS_CONFIG)
+
+    # Pré-compila os corpora uma vez, antes de criar os processos
+    for titulo in leis:
+        config = LEIS_CONFIG[titulo]
+        try:
+            obter_corpus(config['file'], config['sigla'])
+        except FileNotFoundError:
+            print(f"aviso: arquivo '{config['file']}' não encontrado", file=sys.stderr)
+
+    entrada = open(args.entrada, encoding="utf-8") if args.entrada else sys.stdin
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else sys.stdout
+    tarefas = (
+        (consulta, args.ordem, args.limite, leis, args.texto)
+        for consulta in ler_consultas(entrada)
+    )
+
+    try:
+        if args.processos <= 1:
+            _preparar_processo(leis)
+            for linha in map(processar, tarefas):
+                saida.write(linha + "\n")
+        else:
+            with multiprocessing.Pool(args.processos, _preparar_processo, (leis,)) as pool:
+                # imap mantém a ordem da entrada e entrega cada resultado assim que fica pronto
+                for linha in pool.imap(processar, tarefas, chunksize=TAMANHO_LOTE_PROCESSO):
+                    saida.write(linha + "\n")
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
+        else:
+            saida.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
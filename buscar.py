@@ -1,9 +1,25 @@
 import streamlit as st
-import re
 import os
 import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from google import genai
-from google.genai.errors import APIError
+from corpus import obter_corpus
+from consultas import extrair_termos, analisar_consulta, termos_consulta, ConsultaInvalida
+from ia import MODELO, VERSAO_PROMPT, MENSAGENS_FALHA, explicar_artigos, obter_laco
+from limitador import obter_limitador
+from cache_explicacoes import obter_cache_explicacoes, hash_texto
+from ranking import ORDEM_DOCUMENTO, ORDEM_RELEVANCIA
+from estrutura import obter_estrutura
+from referencias import obter_grafo, numero_completo, texto_sem_numero
+from popularidade import obter_registro_uso
+from aquecimento import iniciar_aquecimento
+import metricas
+from metricas import fase, contar
+from motor import (
+    LEIS_CONFIG, TAMANHO_PAGINA, texto_trecho, buscar_em_escopo, buscar_todas_as_leis, mesclar_por_relevancia,
+    SIGLA_POR_ARQUIVO, referencia, atualizar_referencia, atualizar_referencias, resolver_referencia,
+)
 
 # =========================================================================
 # CONFIGURAÇÃO DE PÁGINA (ADICIONADO PARA USAR TELA TODA)
@@ -16,29 +32,20 @@ st.set_page_config(
 )
 
 # =========================================================================
-# CONFIGURAÇÃO CENTRALIZADA
+# CONFIGURAÇÃO E FUNÇÕES DA API (IA)
 # =========================================================================
 
-# Configuração de todas as leis, incluindo arquivo, sigla e âncora
-LEIS_CONFIG = {
-    "1. Constituição Federal": {"file": "constituicao.txt", "sigla": "CF", "anchor": "cf_anchor", "emoji": "🇧🇷"},
-    "2. Código Civil": {"file": "codigo_civil.txt", "sigla": "CC", "anchor": "cc_anchor", "emoji": "🙋‍♀️"},
-    "3. Código Penal": {"file": "codigo_penal.txt", "sigla": "CP", "anchor": "cp_anchor", "emoji": "🚨"},
-    "4. Código de Processo Civil": {"file": "codigo_processo_civil.txt", "sigla": "CPC", "anchor": "cpc_anchor", "emoji": "👥"},    
-    "5. Código de Processo Penal": {"file": "codigo_processo_penal.txt", "sigla": "CPP", "anchor": "cpp_anchor", "emoji": "👨‍⚖️"},
-    "6. Código de Defesa do Consumidor": {"file": "codigo_defesa_consumidor.txt", "sigla": "CDC", "anchor": "cdc_anchor", "emoji": "🛍️"},
-    "7. Código Tributário Nacional": {"file": "codigo_tributario_nacional.txt", "sigla": "CTN", "anchor": "ctn_anchor", "emoji": "💵"},
-    "8. Consolidação das Leis de Trabalho": {"file": "consolidacao_leis_trabalho.txt", "sigla": "CLT", "anchor": "clt_anchor", "emoji": "👷"},
-}
+@st.cache_resource
+def obter_cliente_gemini(api_key):
+    """Cliente Gemini único por processo (reutiliza conexões entre cliques e sessões)."""
+    return genai.Client(api_key=api_key)
 
-# =========================================================================
-# CONFIGURAÇÃO E FUNÇÕES DA API (IA)
-# =========================================================================
 
 def configurar_api():
     """
     Configura a chave da API Gemini.
     A chave deve ser definida como um 'Secret' no Streamlit Cloud.
+    O cliente é criado uma única vez e compartilhado por todas as sessões.
     """
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
@@ -48,159 +55,257 @@ def configurar_api():
         )
         return None
     try:
-        return genai.Client(api_key=api_key)
+        return obter_cliente_gemini(api_key)
     except Exception as e:
         st.error(f"Erro ao inicializar o cliente Gemini: {e}")
         return None
 
 
-def gerar_explicacao_ia(client, artigo_completo):
+@st.cache_resource
+def aquecer_processo():
     """
-    Chama a API Gemini para gerar uma explicação simplificada do artigo.
+    Aquece os caches em segundo plano uma vez por processo (ver aquecimento.py).
+    Sem a chave da API, só as leis e as consultas populares são aquecidas.
     """
-    # System Instruction incorporada ao prompt para garantir a compatibilidade com o SDK
-    system_instruction = (
-        "INSTRUÇÃO DE ROLEPLAY: Você é um tutor jurídico prestativo. Sua tarefa é simplificar textos legais "
-        "complexos (artigos de lei) para que sejam compreendidos por leigos. "
-        "Sua resposta deve ser escrita em linguagem clara, acessível e objetiva, "
-        "evitando jargões desnecessários, mantendo a fidelidade ao sentido legal."
-    )
+    cliente = None
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if api_key:
+        try:
+            cliente = obter_cliente_gemini(api_key)
+        except Exception:
+            cliente = None
+    return iniciar_aquecimento(cliente)
 
-    user_prompt = (
-        f"{system_instruction}\n\n"
-        "Com base no seu roleplay, por favor, analise o seguinte artigo de lei e forneça uma explicação "
-        "com linguagem simples e acessível. Mantenha o tom de um tutor amigo. "
-        f"Artigo: \n\n{artigo_completo}"
-    )
-    
-    # Exponential Backoff para lidar com rate limits
-    MAX_RETRIES = 5
-    delay = 1  # Atraso inicial em segundos
 
-    for attempt in range(MAX_RETRIES):
-        try:
-            # CHAMADA DA API
-            response = client.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=user_prompt
-            )
-            return response.text
-        except APIError as e:
-            if attempt < MAX_RETRIES - 1:
-                st.warning(f"Erro na API (Tentativa {attempt + 1}/{MAX_RETRIES}). Tentando novamente em {delay}s...")
-                time.sleep(delay)
-                delay *= 2  # Aumenta o atraso
+@st.cache_resource
+def sincronizar_cache_explicacoes(nome_arquivo, versao):
+    """
+    Remove do cache as explicações de artigos cujo texto mudou na lei.
+    Executada uma vez para cada versão (corpus.versao) do texto da lei.
+    """
+    corpus = obter_corpus(nome_arquivo)
+    hashes_atuais = {
+        hash_texto(f"{corpus.numero(i)}{corpus.texto(i)}") for i in range(corpus.total)
+    }
+    # Trechos (parágrafos, incisos...) explicados a partir de buscas por escopo
+    estrutura = obter_estrutura(nome_arquivo)
+    hashes_atuais.update(hash_texto(texto_trecho(estrutura, no)) for no in range(1, len(estrutura)))
+    return obter_cache_explicacoes().invalidar_lei(nome_arquivo, hashes_atuais)
+
+
+def explicar_artigos_em_streaming(client, artigos):
+    """
+    Explica os artigos ao mesmo tempo (ver ia.explicar_artigos), escrevendo o
+    texto de cada explicação na página à medida que ele chega. Artigos já
+    explicados antes (em qualquer sessão) vêm direto do cache em disco.
+    Retorna a lista de explicações no formato de st.session_state.explicacoes_geradas
+    (referência do artigo e texto da explicação).
+    """
+    cache = obter_cache_explicacoes()
+    for arquivo in {artigo['arquivo'] for artigo in artigos}:
+        sincronizar_cache_explicacoes(arquivo, obter_corpus(arquivo).versao)
+    em_cache = [cache.obter(artigo['texto_completo'], MODELO, VERSAO_PROMPT) for artigo in artigos]
+    contar("ia.cache_acertos", sum(explicacao is not None for explicacao in em_cache))
+
+    areas_texto = []
+    areas_aviso = []
+    for artigo in artigos:
+        st.markdown(f"### {artigo['numero']}")
+        
+        # Exibe o artigo completo
+        st.code(artigo['texto_completo'], language='markdown')
+        
+        # A explicação da IA é preenchida em streaming
+        st.markdown("**✍️ Explicação cuidadosa do texto legal:**")
+        areas_aviso.append(st.empty())
+        areas_texto.append(st.empty())
+        st.markdown("---")
+
+    # Só os artigos fora do cache vão para a API
+    pendentes = [i for i, explicacao in enumerate(em_cache) if explicacao is None]
+    explicacoes = list(em_cache)
+    if pendentes:
+        # As chamadas rodam no laço asyncio compartilhado do processo; os
+        # eventos voltam por uma fila e são desenhados aqui, na thread da sessão.
+        eventos = queue.Queue()
+        futuro = obter_laco().enviar(explicar_artigos(
+            client,
+            [artigos[i]['texto_completo'] for i in pendentes],
+            ao_receber=lambda j, texto: eventos.put(("texto", pendentes[j], texto)),
+            ao_avisar=lambda j, mensagem: eventos.put(("aviso", pendentes[j], mensagem)),
+            ao_errar=lambda j, mensagem: eventos.put(("erro", pendentes[j], mensagem)),
+        ))
+        while not (futuro.done() and eventos.empty()):
+            try:
+                tipo, i, conteudo = eventos.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if tipo == "texto":
+                areas_texto[i].markdown(conteudo)
+            elif tipo == "aviso":
+                areas_aviso[i].warning(conteudo)
             else:
-                st.error(f"Falha ao gerar explicação após {MAX_RETRIES} tentativas. Erro final: {e}")
-                return "Não foi possível gerar a explicação. Tente novamente mais tarde."
-        except Exception as e:
-            # Captura o erro anterior e o loga para depuração
-            st.error(f"Erro inesperado durante a chamada da API: {e}")
-            return "Erro desconhecido ao processar a requisição."
-    return "Falha total na comunicação com a API."
+                areas_aviso[i].error(conteudo)
+
+        geradas = futuro.result()
+        for i, explicacao in zip(pendentes, geradas):
+            explicacoes[i] = explicacao
+            if explicacao not in MENSAGENS_FALHA:
+                cache.guardar(artigos[i]['texto_completo'], MODELO, VERSAO_PROMPT, explicacao, artigos[i]['arquivo'])
+
+    resultado = []
+    for artigo, explicacao, area in zip(artigos, explicacoes, areas_texto):
+        area.markdown(explicacao)
+        resultado.append({
+            "referencia": referencia(artigo),
+            "explicacao": explicacao
+        })
+    return resultado
 
 # =========================================================================
 # FUNÇÕES DE BUSCA (Lógica)
 # =========================================================================
+#
+# A busca em si (buscar_em_arquivo, buscar_em_escopo...) fica em motor.py,
+# sem dependência do Streamlit; aqui ela é ligada ao session_state. O
+# session_state guarda só referências compactas aos resultados (ver
+# motor.referencia); textos e labels são refeitos quando exibidos.
+
+@st.cache_resource
+def obter_divisoes(nome_arquivo, sigla_lei, versao):
+    """
+    Divisões da lei (Parte, Livro, Título, Capítulo) para o seletor de escopo:
+    rótulo -> id do nó. Recalculadas quando o texto da lei muda (`versao`).
+    """
+    return {rotulo: no for no, rotulo in obter_estrutura(nome_arquivo, sigla_lei).divisoes()}
 
-def formatar_artigo(texto_artigo):
-    """Pega os primeiros 300 caracteres do artigo para dar um 'preview'."""
-    LIMITE_PREVIEW = 300
-    preview = texto_artigo.strip()
 
-    if len(preview) > LIMITE_PREVIEW:
-        preview = preview[:LIMITE_PREVIEW] + "..."
+@st.cache_resource
+def obter_executor_busca():
+    """Pool de threads compartilhado por todas as sessões, dimensionado para a máquina."""
+    num_workers = min(len(LEIS_CONFIG), os.cpu_count() or 1)
+    return ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="busca_lei")
+
+
+def guardar_selecionaveis(referencias):
+    """Acrescenta às opções do multiselect as referências ainda não listadas, em ordem."""
+    st.session_state.artigos_selecionaveis = list(
+        dict.fromkeys(st.session_state.artigos_selecionaveis + referencias)
+    )
 
-    # Remove quebras de linha e múltiplos espaços do preview para exibição limpa
-    preview = re.sub(r'\s+', ' ', preview)
-    
-    return preview
 
-def buscar_em_arquivo(termo_pesquisa, nome_arquivo, sigla_lei):
+def destacar(preview, destaques):
+    """Preview em markdown, com as ocorrências dos termos (ver motor.trecho_kwic) em negrito."""
+    partes = []
+    cursor = 0
+    for inicio, fim in destaques:
+        partes.append(preview[cursor:inicio])
+        partes.append(f"**{preview[inicio:fim]}**")
+        cursor = fim
+    partes.append(preview[cursor:])
+    return "".join(partes)
+
+
+def executar_busca_escopo(termo_pesquisa, titulo, id_escopo):
     """
-    Busca um termo em um arquivo de texto. A busca é exata (substring literal).
-    
-    Se o termo_pesquisa contiver vírgulas (,), a busca exigirá que TODAS 
-    as expressões separadas por vírgula estejam presentes no artigo (lógica AND).
+    Busca restrita a uma divisão de uma única lei (ver buscar_em_escopo).
+    Preenche o session_state como executar_busca_completa, só para essa lei.
     """
-    encontrados = []
+    config = LEIS_CONFIG[titulo]
+    limite = st.session_state.paginas_por_lei.get(titulo, 1) * TAMANHO_PAGINA
 
-    termo_limpo = termo_pesquisa.strip()
-    
-    # 1. Determina os termos OBRIGATÓRIOS (requeridos)
-    if not termo_limpo:
-        return []
-
-    if ',' in termo_limpo:
-        # Se houver vírgula, dividimos em termos exatos obrigatórios (lógica AND)
-        # Limpa espaços e converte para minúsculas
-        required_terms = [t.strip().lower() for t in termo_limpo.split(',') if t.strip()]
-    else:
-        # Se for um termo único, a lista de requeridos é apenas ele
-        required_terms = [termo_limpo.lower()]
-    
-    # Se a lista de termos requeridos estiver vazia após a limpeza (ex: só vírgulas), retorna vazio.
-    if not required_terms:
-        return []
+    inicio = time.perf_counter()
+    resultados, ids = buscar_em_escopo(termo_pesquisa, config['file'], config['sigla'], id_escopo, limite)
+    st.session_state.tempos_por_lei = {titulo: time.perf_counter() - inicio}
+    st.session_state.todos_resultados = [
+        referencia(resultado) for resultado in resultados if resultado['id'] != "error"
+    ]
+    st.session_state.totais_por_lei = {} if ids is None else {titulo: len(ids)}
+    guardar_selecionaveis(st.session_state.todos_resultados)
 
-    try:
-        with open(nome_arquivo, 'r', encoding='utf-8-sig') as f:
-            conteudo_completo = f.read()
-            
-            # Divide o conteúdo da lei em artigos
-            artigos = re.split(r'(\sArt\.\s[\d\.]+)', conteudo_completo)
+    # Os ids aqui são trechos de uma só lei: não servem de base para refinar a próxima busca
+    st.session_state.busca_anterior = {"termos": [], "ids": {}}
 
-            for i in range(1, len(artigos), 2):
-                numero_artigo = artigos[i].strip()
-                texto_do_artigo = artigos[i+1].strip()
-                texto_do_artigo_lower = texto_do_artigo.lower()
+    return {titulo: resultados}
 
-                # 2. Verifica se TODAS as substrings requeridas estão presentes
-                match = all(req_term in texto_do_artigo_lower for req_term in required_terms)
-                
-                if match:
-                    
-                    preview = formatar_artigo(texto_do_artigo)
-                    
-                    # O label inclui a sigla da lei para melhor identificação
-                    encontrados.append({
-                        "id": f"{nome_arquivo}_{numero_artigo}",
-                        "numero": numero_artigo,
-                        "preview": preview,
-                        "label": f"{sigla_lei} - {numero_artigo} | {preview}", 
-                        "texto_completo": f"{numero_artigo}{texto_do_artigo}"
-                    })
-            
-    except FileNotFoundError:
-        # Adiciona o campo 'label' para evitar KeyError na seção de IA.
-        error_message = f"🚨 ERRO: O arquivo '{nome_arquivo}' não foi encontrado!"
-        return [
-            {
-                "id": "error", 
-                "numero": "ERRO", 
-                "preview": error_message,
-                "label": error_message,
-                "texto_completo": ""
-            }
-        ]
-
-    return encontrados
-
-
-def executar_busca_completa(termo_pesquisa):
-    """Executa a busca em todas as leis, armazena o total e retorna os resultados agrupados por lei."""
-    resultados_por_lei = {}
-    st.session_state.todos_resultados = [] # Reset lista total para o multiselect
 
-    for titulo, config in LEIS_CONFIG.items():
-        resultados = buscar_em_arquivo(termo_pesquisa, config['file'], config['sigla'])
+def executar_busca_completa(termo_pesquisa, paralelo=True, ordem=ORDEM_DOCUMENTO):
+    """
+    Executa a busca em todas as leis, armazena o total e retorna os resultados agrupados por lei.
+
+    Cada lei devolve apenas a janela exibida (st.session_state.paginas_por_lei
+    páginas de TAMANHO_PAGINA artigos); com ordem=ORDEM_RELEVANCIA, a janela é o
+    top-k (BM25) da lei. O total de artigos encontrados por lei fica em
+    st.session_state.totais_por_lei.
+
+    No modo paralelo, cada lei é buscada em uma thread do pool compartilhado; os
+    resultados são reunidos na ordem de LEIS_CONFIG. O tempo de cada lei fica em
+    st.session_state.tempos_por_lei. Um arquivo ausente continua afetando apenas
+    a sua própria lei (tratado dentro de buscar_em_arquivo).
+    """
+    resultados_por_lei = {}
+    todos_resultados = []
+    st.session_state.tempos_por_lei = {}
+    st.session_state.totais_por_lei = {}
+
+    # Resultados da busca anterior da sessão (para refinamento incremental)
+    busca_anterior = st.session_state.busca_anterior
+    anteriores = {
+        titulo: (busca_anterior['termos'], busca_anterior['ids'][titulo])
+        for titulo in LEIS_CONFIG if titulo in busca_anterior['ids']
+    }
+
+    # Tamanho da janela exibida em cada lei (páginas carregadas x tamanho da página)
+    limites = {
+        titulo: st.session_state.paginas_por_lei.get(titulo, 1) * TAMANHO_PAGINA
+        for titulo in LEIS_CONFIG
+    }
+
+    executor = obter_executor_busca() if paralelo else None
+    execucoes = buscar_todas_as_leis(termo_pesquisa, anteriores, ordem, limites, executor)
+
+    ids_por_lei = {}
+    for titulo in LEIS_CONFIG:
+        resultados, ids, duracao = execucoes[titulo]
         resultados_por_lei[titulo] = resultados
-        st.session_state.todos_resultados.extend(resultados)
-        
+        st.session_state.tempos_por_lei[titulo] = duracao
+        todos_resultados.extend(resultados)
+        # Leis com erro de arquivo não entram no refinamento seguinte
+        if ids is not None:
+            ids_por_lei[titulo] = ids
+            st.session_state.totais_por_lei[titulo] = len(ids)
+
+    if ordem == ORDEM_RELEVANCIA:
+        # Mescla as janelas de todas as leis pela pontuação (mais relevantes primeiro)
+        todos_resultados = mesclar_por_relevancia(
+            {titulo: resultados_por_lei[titulo] for titulo in ids_por_lei}
+        )
+
+    # Só as referências ficam na sessão (os textos são do corpus compartilhado)
+    st.session_state.todos_resultados = [
+        referencia(resultado) for resultado in todos_resultados if resultado['id'] != "error"
+    ]
+    # Opções do multiselect: crescem à medida que novas páginas são carregadas
+    guardar_selecionaveis(st.session_state.todos_resultados)
+
+    # Consultas com operadores não servem de base para refinar a seguinte (ver consultas.refina)
+    termos_refinamento = extrair_termos(termo_pesquisa) if analisar_consulta(termo_pesquisa) is None else []
+    st.session_state.busca_anterior = {"termos": termos_refinamento, "ids": ids_por_lei}
+
     return resultados_por_lei
 
-def exibir_resultados_secao(titulo, resultados, anchor_name):
-    """Exibe os resultados detalhados de uma única seção."""
+
+def carregar_mais(titulo):
+    """Callback do botão 'Carregar mais': amplia a janela exibida da lei."""
+    st.session_state.paginas_por_lei[titulo] = st.session_state.paginas_por_lei.get(titulo, 1) + 1
+
+
+def exibir_resultados_secao(titulo, resultados, anchor_name, total=None):
+    """
+    Exibe os resultados detalhados de uma única seção.
+    `total` é o número de artigos encontrados quando `resultados` traz só a
+    janela exibida; nesse caso é oferecido o botão 'Carregar mais'.
+    """
     # Não inclui st.markdown("---") no início (única linha é após os atalhos)
     termo_pesquisa = st.session_state.termo_anterior
 
@@ -216,20 +321,118 @@ def exibir_resultados_secao(titulo, resultados, anchor_name):
              st.error("🚨 ERRO: Resultado inesperado durante a busca.")
         return
 
-    num_encontrados = len(resultados)
+    num_encontrados = len(resultados) if total is None else total
         
     if num_encontrados > 0:
-        st.success(f"✅ Termo encontrado em {num_encontrados} Artigos:")
+        if len(resultados) < num_encontrados:
+            st.success(f"✅ Termo encontrado em {num_encontrados} Artigos (exibindo {len(resultados)}):")
+        else:
+            st.success(f"✅ Termo encontrado em {num_encontrados} Artigos:")
         
-        for resultado in resultados:
-            st.markdown(f"**{resultado['numero']}:** {resultado['preview']}")
+        # Um único bloco de markdown para a janela inteira (em vez de um por artigo)
+        with fase("render.resultados"):
+            st.markdown("\n\n".join(
+                f"**{resultado['numero']}:** {destacar(resultado['preview'], resultado['destaques'])}"
+                for resultado in resultados
+            ))
+        contar("render.blocos_markdown")
+
+        if len(resultados) < num_encontrados:
+            restantes = num_encontrados - len(resultados)
+            st.button(
+                f"Carregar mais (+{min(TAMANHO_PAGINA, restantes)} de {restantes} restantes)",
+                key=f"carregar_mais_{anchor_name}",
+                on_click=carregar_mais,
+                args=(titulo,)
+            )
     else:
         st.info(f"❌ Termo '{termo_pesquisa}' não encontrado.")
 
+
+# Artigos listados em cada coluna do painel de referências
+MAXIMO_REFERENCIAS_EXIBIDAS = 30
+
+
+def nome_artigo(nome_arquivo, i):
+    """Identificação curta de um artigo, ex.: 'CLT - Art. 477'."""
+    return f"{SIGLA_POR_ARQUIVO.get(nome_arquivo, '')} - {numero_completo(obter_corpus(nome_arquivo), i)}"
+
+
+def exibir_referencias(referencias):
+    """
+    Painel "cita / citado por" (ver referencias.py) para um dos artigos
+    exibidos. As listas vêm do grafo pré-calculado, sem varrer as leis.
+    """
+    artigos = list(dict.fromkeys((arquivo, i) for arquivo, i, _, _ in referencias))
+    escolhido = st.selectbox(
+        "Artigo:",
+        options=artigos,
+        format_func=lambda artigo: nome_artigo(*artigo),
+        key="artigo_referencias",
+    )
+    if escolhido is None:
+        return
+
+    grafo = obter_grafo(tuple((config['file'], config['sigla']) for config in LEIS_CONFIG.values()))
+    colunas = st.columns(2)
+    for coluna, titulo, vizinhos in (
+        (colunas[0], "Cita", grafo.cita(*escolhido)),
+        (colunas[1], "Citado por", grafo.citado_por(*escolhido)),
+    ):
+        with coluna:
+            st.markdown(f"**{titulo}** ({len(vizinhos)})")
+            if not vizinhos:
+                st.caption("Nenhuma referência encontrada.")
+                continue
+            linhas = []
+            for arquivo, j in vizinhos[:MAXIMO_REFERENCIAS_EXIBIDAS]:
+                preview = texto_sem_numero(obter_corpus(arquivo), j)
+                linhas.append(f"- **{nome_artigo(arquivo, j)}:** {preview[:120]}{'...' if len(preview) > 120 else ''}")
+            if len(vizinhos) > MAXIMO_REFERENCIAS_EXIBIDAS:
+                linhas.append(f"- ... e mais {len(vizinhos) - MAXIMO_REFERENCIAS_EXIBIDAS}")
+            st.markdown("\n".join(linhas))
+
+
+def exibir_painel_depuracao(coleta):
+    """Tempos por fase e contadores desta execução da página (só desta sessão), com exportação."""
+    execucao = coleta.instantaneo()
+    with st.sidebar:
+        st.markdown("### 🛠️ Esta execução")
+        if execucao["fases"]:
+            st.table({
+                "fase": list(execucao["fases"]),
+                "chamadas": [f["chamadas"] for f in execucao["fases"].values()],
+                "ms": [round(f["segundos"] * 1000, 2) for f in execucao["fases"].values()],
+            })
+        else:
+            st.caption("Nenhuma fase medida nesta execução.")
+        for nome, valor in execucao["contadores"].items():
+            st.caption(f"{nome}: **{valor:g}**")
+
+        st.markdown("### 📦 Exportar")
+        st.download_button("JSON", metricas.exportar_json(execucao), "metricas.json", "application/json")
+        st.download_button("Prometheus", metricas.exportar_prometheus(execucao), "metricas.prom", "text/plain")
+        if metricas.ativa():
+            # Coleta do processo inteiro (MAPA_LEI_METRICAS=1), somando todas as sessões
+            st.download_button(
+                "JSON (processo)", metricas.exportar_json(), "metricas_processo.json", "application/json"
+            )
+            if st.button("Zerar métricas do processo"):
+                metricas.limpar()
+
 # =========================================================================
 # ESTRUTURA DO APLICATIVO STREAMLIT
 # =========================================================================
 
+# Caches do processo aquecidos em segundo plano logo na primeira execução
+aquecer_processo()
+
+# Painel de depuração (opcional): coleta tempos e contadores (metricas.py) só
+# desta execução, nesta sessão; as outras sessões não pagam o custo da medição.
+# A coleta é refeita (ou encerrada) a cada execução, conforme a caixa.
+depuracao = st.sidebar.checkbox("🛠️ Painel de depuração (tempos por fase)")
+coleta_execucao = metricas.iniciar_coleta(depuracao)
+
 # NOTA: O título e cabeçalho da página foram movidos para st.set_page_config
 st.title("📍Mapa da Lei")
 st.subheader("Encontre o caminho nas leis sem se perder.")
@@ -239,9 +442,39 @@ st.text("Base de dados conta com: CF/88, CC/02, CP/40, CPP/41, CDC/90 atualizado
 # O placeholder foi atualizado para remover a instrução sobre aspas
 termo_pesquisa = st.text_input(
     "Digite a palavra ou expressão para buscar (Se quiser buscar dois termos, use vírgula para separá-los):",
-    placeholder="Ex: dignidade da pessoa humana"
+    placeholder="Ex: dignidade da pessoa humana",
+    help=(
+        "Operadores (em maiúsculas): `contribu*` (palavras que começam assim), "
+        "`prazo OR termo`, `prazo NOT recurso`, `prazo NEAR/5 recurso` (até 5 palavras entre os dois) "
+        "e parênteses para agrupar."
+    )
 )
 
+# Ordenação: os mais relevantes (BM25, top-k por lei) ou todos na ordem do texto
+OPCOES_ORDEM = {
+    "Relevância (mais relevantes primeiro)": ORDEM_RELEVANCIA,
+    "Ordem do texto": ORDEM_DOCUMENTO,
+}
+ordem_escolhida = OPCOES_ORDEM[st.radio("Ordenar resultados por:", list(OPCOES_ORDEM), horizontal=True)]
+
+# Escopo: todas as leis ou uma divisão de uma lei (ex.: só o Título II da CF)
+TODAS_AS_LEIS = "Todas as leis"
+LEI_INTEIRA = "Lei inteira"
+coluna_lei, coluna_divisao = st.columns(2)
+with coluna_lei:
+    lei_escopo = st.selectbox("Buscar em:", [TODAS_AS_LEIS] + list(LEIS_CONFIG))
+escopo = None
+if lei_escopo != TODAS_AS_LEIS:
+    config_escopo = LEIS_CONFIG[lei_escopo]
+    try:
+        corpus_escopo = obter_corpus(config_escopo['file'], config_escopo['sigla'])
+        divisoes = obter_divisoes(config_escopo['file'], config_escopo['sigla'], corpus_escopo.versao)
+    except FileNotFoundError:
+        divisoes = {}
+    with coluna_divisao:
+        divisao = st.selectbox("Parte da lei:", [LEI_INTEIRA] + list(divisoes))
+    escopo = (lei_escopo, divisoes.get(divisao, 0))
+
 # Inicialização do Session State
 if 'todos_resultados' not in st.session_state:
     st.session_state.todos_resultados = []
@@ -250,39 +483,91 @@ if 'explicacoes_geradas' not in st.session_state:
 # Variável para rastrear o termo de pesquisa anterior
 if 'termo_anterior' not in st.session_state:
     st.session_state.termo_anterior = ""
+# Tempo de parede (segundos) da última busca em cada lei
+if 'tempos_por_lei' not in st.session_state:
+    st.session_state.tempos_por_lei = {}
+# Termos e índices dos artigos da última busca (base do refinamento incremental)
+if 'busca_anterior' not in st.session_state:
+    st.session_state.busca_anterior = {"termos": [], "ids": {}}
+# Total de artigos encontrados em cada lei (independe do top-k exibido)
+if 'totais_por_lei' not in st.session_state:
+    st.session_state.totais_por_lei = {}
+# Páginas carregadas ("Carregar mais") em cada lei
+if 'paginas_por_lei' not in st.session_state:
+    st.session_state.paginas_por_lei = {}
+# Artigos já exibidos nesta busca (label -> resultado), fonte do multiselect
+if 'artigos_selecionaveis' not in st.session_state:
+    st.session_state.artigos_selecionaveis = []
+# Escopo (lei, divisão) da última busca
+if 'escopo_anterior' not in st.session_state:
+    st.session_state.escopo_anterior = None
+
+# Referências guardadas na sessão são da versão da lei em que foram criadas:
+# se a lei foi recarregada, são remapeadas para a versão atual ou descartadas
+st.session_state.artigos_selecionaveis = atualizar_referencias(st.session_state.artigos_selecionaveis)
+st.session_state.todos_resultados = atualizar_referencias(st.session_state.todos_resultados)
+if 'selecao_artigos_ia_multiselect' in st.session_state:
+    st.session_state.selecao_artigos_ia_multiselect = [
+        ref for ref in atualizar_referencias(st.session_state.selecao_artigos_ia_multiselect)
+        if ref in st.session_state.artigos_selecionaveis
+    ]
+explicacoes_validas = []
+for item in st.session_state.explicacoes_geradas:
+    ref = atualizar_referencia(item['referencia'])
+    if ref is not None:
+        explicacoes_validas.append({**item, "referencia": ref})
+st.session_state.explicacoes_geradas = explicacoes_validas
 
 
 # 2. Execução da Lógica: A busca só ocorre se o usuário digitar algo
 if termo_pesquisa:
+
+    # Consulta com operadores malformada (ex.: "prazo OR", parêntese sem par): explica e não busca
+    try:
+        analisar_consulta(termo_pesquisa)
+    except ConsultaInvalida as e:
+        st.warning(f"⚠️ Consulta inválida: {e}")
+        st.stop()
     
     # -----------------------------------------------------------
     # FIX: Verifica se o termo mudou para decidir se limpa o multiselect.
     # -----------------------------------------------------------
-    termo_mudou = (termo_pesquisa != st.session_state.termo_anterior)
+    termo_mudou = (termo_pesquisa != st.session_state.termo_anterior or escopo != st.session_state.escopo_anterior)
+
+    # Contagem agregada das consultas (base do aquecimento após um reinício)
+    if termo_pesquisa != st.session_state.termo_anterior:
+        obter_registro_uso().registrar_consulta(termo_pesquisa)
 
-    # Limpa os resultados da busca e as explicações (sempre que o termo está preenchido)
+    # Limpa os resultados da busca (sempre que o termo está preenchido)
     st.session_state.todos_resultados = []
-    st.session_state.explicacoes_geradas = [] 
 
-    # SÓ LIMPA O MULTISELECT SE O TERMO DE PESQUISA MUDOU
+    # SÓ LIMPA O MULTISELECT E AS EXPLICAÇÕES SE O TERMO DE PESQUISA MUDOU
     if termo_mudou:
+        st.session_state.explicacoes_geradas = []
         if 'selecao_artigos_ia_multiselect' in st.session_state:
             st.session_state.selecao_artigos_ia_multiselect = []
+        # Nova busca: volta à primeira página de cada lei
+        st.session_state.paginas_por_lei = {}
+        st.session_state.artigos_selecionaveis = []
 
     # Atualiza o termo anterior para rastreamento
     st.session_state.termo_anterior = termo_pesquisa
+    st.session_state.escopo_anterior = escopo
 
     # ------------------ INÍCIO DO BLOCO INDENTADO ------------------
     
     # 1. Executa todas as buscas e armazena os resultados
-    resultados_por_lei = executar_busca_completa(termo_pesquisa)
+    if escopo is None:
+        resultados_por_lei = executar_busca_completa(termo_pesquisa, ordem=ordem_escolhida)
+    else:
+        resultados_por_lei = executar_busca_escopo(termo_pesquisa, *escopo)
     
     # 2. Exibe os Atalhos Jurídicos (Vertical e com Contagem)
     st.markdown("### Atalhos jurídicos:")
     
-    for titulo, config in LEIS_CONFIG.items():
-        resultados = resultados_por_lei[titulo]
-        num_encontrados = len(resultados)
+    for titulo, resultados in resultados_por_lei.items():
+        config = LEIS_CONFIG[titulo]
+        num_encontrados = st.session_state.totais_por_lei.get(titulo, len(resultados))
         
         # Obtém o nome da lei sem a numeração (ex: Constituição Federal)
         nome_limpo = titulo.split(". ", 1)[-1].strip()
@@ -295,7 +580,9 @@ if termo_pesquisa:
         if resultados and resultados[0]['numero'] == "ERRO":
              st.caption(f"**Falha ao carregar o arquivo.**")
         else:
-             st.caption(f"**{num_encontrados}** artigos mapeados") 
+             duracao_ms = st.session_state.tempos_por_lei.get(titulo, 0.0) * 1000
+             unidade = "artigos" if escopo is None else "trechos"
+             st.caption(f"**{num_encontrados}** {unidade} mapeados · {duracao_ms:.1f} ms") 
 
     # Separador único solicitado, após os atalhos e antes dos resultados detalhados
     st.markdown("---")
@@ -304,12 +591,24 @@ if termo_pesquisa:
     for titulo, resultados in resultados_por_lei.items():
         config = LEIS_CONFIG[titulo]
         # Esta função exibe a âncora, o título e os resultados da busca
-        exibir_resultados_secao(titulo, resultados, config['anchor']) 
+        exibir_resultados_secao(titulo, resultados, config['anchor'], st.session_state.totais_por_lei.get(titulo))
+
+    # =========================================================================
+    # REFERÊNCIAS CRUZADAS (CITA / CITADO POR)
+    # =========================================================================
+
+    if st.session_state.artigos_selecionaveis:
+        st.markdown("---")
+        st.subheader("🔗 Referências cruzadas")
+        exibir_referencias(st.session_state.artigos_selecionaveis)
 
     # =========================================================================
     # MULTISELECT PARA SELEÇÃO E LÓGICA DE EXPLICAÇÃO POR IA
     # =========================================================================
     
+    # Artigos a explicar nesta execução (preenchido pelo botão "Explicar artigos")
+    artigos_para_explicar = []
+
     if len(st.session_state.todos_resultados) > 0:
         
         # >>> INSERÇÃO DO SEPARADOR E TÍTULO DA SEÇÃO DE IA <<<
@@ -318,23 +617,30 @@ if termo_pesquisa:
     
         # >>> FIM DA INSERÇÃO <<<
 
-        # Lista de labels formatados para o multiselect
-        labels_disponiveis = [res['label'] for res in st.session_state.todos_resultados]
-        
-        # Filtra quaisquer labels de erro que possam ter sido adicionados
-        labels_validos = [label for label in labels_disponiveis if not label.startswith("🚨 ERRO")]
+        # Referências dos artigos já exibidos (páginas carregadas), sem erros.
+        # A lista cresce com o "Carregar mais", em vez de trazer todos os resultados.
+        referencias_validas = st.session_state.artigos_selecionaveis
+        # Labels refeitos a cada execução, com o preview em volta do termo buscado
+        termos_rotulos = termos_consulta(termo_pesquisa)
+        # (a lei pode ter sido recarregada no meio da execução: referências que não valem mais ficam de fora)
+        rotulos = {}
+        for ref in referencias_validas:
+            resultado = resolver_referencia(ref, termos_rotulos)
+            if resultado is not None:
+                rotulos[ref] = resultado['label']
 
 
         # 1. Componente Multiselect para seleção dos artigos (Máximo 3)
-        selecao_labels = st.multiselect(
+        selecao_referencias = st.multiselect(
             "Selecione **até 3** artigos:",
-            options=labels_validos,
+            options=list(rotulos),
+            format_func=rotulos.__getitem__,
             key='selecao_artigos_ia_multiselect'
         )
         
-        selecionados_final = selecao_labels[:3]
+        selecionados_final = selecao_referencias[:3]
         
-        if len(selecao_labels) > 3:
+        if len(selecao_referencias) > 3:
             st.warning("⛔ Você selecionou mais de 3 artigos. Apenas os 3 primeiros serão processados.")
 
         st.info(f"Artigos prontos para explicação: **{len(selecionados_final)} / 3**")
@@ -345,43 +651,66 @@ if termo_pesquisa:
             if not selecionados_final:
                 st.warning("⚠️ Selecione pelo menos um artigo para que eu possa explicar.")
             else:
-                # 3. Mapeia os labels selecionados de volta para os objetos de artigo
-                mapa_resultados = {res['label']: res for res in st.session_state.todos_resultados}
-                artigos_selecionados = [mapa_resultados[label] for label in selecionados_final]
-
-                # 4. Configura e Chama a API
-                client = configurar_api()
+                # 3. Refaz os artigos selecionados (texto completo) a partir das referências
+                artigos_selecionados = [
+                    artigo for artigo in map(resolver_referencia, selecionados_final) if artigo is not None
+                ]
+                registro = obter_registro_uso()
+                for artigo in artigos_selecionados:
+                    registro.registrar_artigo(
+                        artigo['arquivo'], hash_texto(artigo['texto_completo']), artigo['indice'], artigo.get('no', -1)
+                    )
+
+                # 4. Configura a API; as chamadas são feitas na seção de exibição abaixo,
+                #    para que o texto apareça no lugar definitivo à medida que chega
+                #    Se todos os artigos já estiverem no cache, a API nem é configurada.
+                cache = obter_cache_explicacoes()
+                todos_em_cache = all(
+                    cache.contem(artigo['texto_completo'], MODELO, VERSAO_PROMPT)
+                    for artigo in artigos_selecionados
+                )
+                client = None if todos_em_cache else configurar_api()
                 
-                if client:
-                    
-                    with st.spinner(f"Processando {len(artigos_selecionados)} artigo(s)... A inteligência artificial está trabalhando para simplificar o texto legal."):
-                        
-                        # Limpa o estado e gera a nova lista de explicações
-                        st.session_state.explicacoes_geradas = []
-                        for artigo in artigos_selecionados:
-                            explicacao = gerar_explicacao_ia(client, artigo['texto_completo'])
-                            
-                            st.session_state.explicacoes_geradas.append({
-                                "numero": artigo['numero'],
-                                "texto_completo": artigo['texto_completo'],
-                                "explicacao": explicacao
-                            })
-                    
-                    st.success("✅ Explicações geradas com sucesso! Role para baixo.")
+                if client or todos_em_cache:
+                    artigos_para_explicar = artigos_selecionados
+                    st.info("⏳ Gerando explicações... Role para baixo para acompanhar.")
     
     # =========================================================================
     # EXIBIÇÃO DAS EXPLICAÇÕES GERADAS
     # =========================================================================
     
-    if st.session_state.explicacoes_geradas:
+    if artigos_para_explicar:
+        st.markdown('<a name="explicacoes_anchor"></a>', unsafe_allow_html=True)
+        st.markdown("🔎 Decifrando Artigos")
+
+        with st.spinner(f"Processando {len(artigos_para_explicar)} artigo(s)... A inteligência artificial está trabalhando para simplificar o texto legal."):
+            # Limpa o estado e gera a nova lista de explicações (todas ao mesmo tempo)
+            st.session_state.explicacoes_geradas = explicar_artigos_em_streaming(client, artigos_para_explicar)
+
+        st.success("✅ Explicações geradas com sucesso!")
+        estatisticas = obter_cache_explicacoes().estatisticas()
+        st.caption(
+            f"Cache de explicações: {estatisticas['acertos']} acertos · {estatisticas['faltas']} faltas · "
+            f"{estatisticas['entradas']} artigos guardados"
+        )
+        fila = obter_limitador().estatisticas()
+        st.caption(
+            f"Fila da API: {fila['fila_atual']} aguardando (máx. {fila['maior_fila']}) · "
+            f"espera média {fila['espera_media_s']:.1f}s · p95 {fila['espera_p95_s']:.1f}s"
+        )
+
+    elif st.session_state.explicacoes_geradas:
         st.markdown('<a name="explicacoes_anchor"></a>', unsafe_allow_html=True)
         st.markdown("🔎 Decifrando Artigos")
         
         for item in st.session_state.explicacoes_geradas:
-            st.markdown(f"### {item['numero']}")
+            artigo = resolver_referencia(item['referencia'])
+            if artigo is None:
+                continue
+            st.markdown(f"### {artigo['numero']}")
             
             # Exibe o artigo completo
-            st.code(item['texto_completo'], language='markdown')
+            st.code(artigo['texto_completo'], language='markdown')
             
             # Exibe a explicação da IA
             st.markdown("**✍️ Explicação cuidadosa do texto legal:**")
@@ -389,3 +718,7 @@ if termo_pesquisa:
             st.markdown("---")
             
     st.markdown("---")
+
+# Painel de depuração (barra lateral), depois de tudo ter sido medido
+if coleta_execucao is not None:
+    exibir_painel_depuracao(coleta_execucao)
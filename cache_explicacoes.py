@@ -0,0 +1,202 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+from corpus import DIRETORIO_INDICE
+
+# =========================================================================
+# CACHE PERSISTENTE DE EXPLICAÇÕES (SQLite)
+# =========================================================================
+#
+# A explicação de um artigo depende apenas do texto do artigo, do modelo e
+# da versão do prompt. A chave do cache é o SHA-256 desses três valores, de
+# modo que o mesmo artigo explicado em qualquer sessão (ou após um
+# reinício) é servido direto do disco, sem nova chamada à API.
+#
+# - Remoção LRU por tamanho: quando o total de bytes das explicações passa de
+#   `tamanho_maximo`, as menos acessadas recentemente são removidas.
+# - Invalidação: cada entrada guarda a lei e o hash do texto do artigo;
+#   `invalidar_lei` apaga as entradas cujo texto não existe mais na lei.
+#
+# O cache é acessório, como o registro de uso (popularidade.py): falhas do
+# SQLite ou do disco (diretório somente leitura, banco travado ou corrompido)
+# contam como falta de cache e a explicação é pedida ao modelo. Se o banco
+# não abrir, o cache fica desligado.
+
+CAMINHO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), DIRETORIO_INDICE, "explicacoes.sqlite3")
+TAMANHO_MAXIMO_PADRAO = 50 * 1024 * 1024  # 50 MB de texto de explicações
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS explicacoes (
+    chave TEXT PRIMARY KEY,
+    arquivo TEXT NOT NULL,
+    hash_texto TEXT NOT NULL,
+    explicacao TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    ultimo_acesso REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS explicacoes_acesso ON explicacoes (ultimo_acesso);
+CREATE INDEX IF NOT EXISTS explicacoes_arquivo ON explicacoes (arquivo);
+CREATE TABLE IF NOT EXISTS contadores (
+    nome TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+"""
+
+
+def hash_texto(texto):
+    """SHA-256 (hex) do texto de um artigo."""
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def chave_explicacao(texto_artigo, modelo, versao_prompt):
+    """Chave endereçada por conteúdo: texto do artigo + modelo + versão do prompt."""
+    return hashlib.sha256(f"{modelo}\0{versao_prompt}\0{texto_artigo}".encode('utf-8')).hexdigest()
+
+
+class CacheExplicacoes:
+    """Cache LRU (por tamanho) de explicações, compartilhado por processos via SQLite."""
+
+    def __init__(self, caminho=CAMINHO_PADRAO, tamanho_maximo=TAMANHO_MAXIMO_PADRAO):
+        self.caminho = caminho
+        self.tamanho_maximo = tamanho_maximo
+        self._trava = threading.Lock()
+        self._conexao = None
+        try:
+            diretorio = os.path.dirname(caminho)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            conexao = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+            with conexao:
+                conexao.execute("PRAGMA journal_mode=WAL")
+                conexao.executescript(ESQUEMA)
+        except (OSError, sqlite3.Error):
+            return  # cache desligado
+        self._conexao = conexao
+
+    @property
+    def ativo(self):
+        """False se o banco não pôde ser aberto (nada é guardado nem encontrado)."""
+        return self._conexao is not None
+
+    def obter(self, texto_artigo, modelo, versao_prompt):
+        """Explicação guardada para o artigo, ou None. Atualiza o LRU e os contadores."""
+        if self._conexao is None:
+            return None
+        chave = chave_explicacao(texto_artigo, modelo, versao_prompt)
+        try:
+            with self._trava, self._conexao:
+                linha = self._conexao.execute(
+                    "SELECT explicacao FROM explicacoes WHERE chave = ?", (chave,)
+                ).fetchone()
+                if linha is None:
+                    self._incrementar("faltas")
+                    return None
+                self._conexao.execute(
+                    "UPDATE explicacoes SET ultimo_acesso = ? WHERE chave = ?", (time.time(), chave)
+                )
+                self._incrementar("acertos")
+                return linha[0]
+        except sqlite3.Error:
+            return None
+
+    def contem(self, texto_artigo, modelo, versao_prompt):
+        """True se há explicação guardada (não altera o LRU nem os contadores)."""
+        if self._conexao is None:
+            return False
+        chave = chave_explicacao(texto_artigo, modelo, versao_prompt)
+        try:
+            with self._trava:
+                return self._conexao.execute(
+                    "SELECT 1 FROM explicacoes WHERE chave = ?", (chave,)
+                ).fetchone() is not None
+        except sqlite3.Error:
+            return False
+
+    def guardar(self, texto_artigo, modelo, versao_prompt, explicacao, arquivo=""):
+        """Guarda a explicação e remove as entradas mais antigas se passar do tamanho máximo."""
+        if self._conexao is None:
+            return
+        chave = chave_explicacao(texto_artigo, modelo, versao_prompt)
+        tamanho = len(explicacao.encode('utf-8'))
+        try:
+            with self._trava, self._conexao:
+                self._conexao.execute(
+                    "INSERT OR REPLACE INTO explicacoes VALUES (?, ?, ?, ?, ?, ?)",
+                    (chave, arquivo, hash_texto(texto_artigo), explicacao, tamanho, time.time())
+                )
+                self._remover_excesso()
+        except sqlite3.Error:
+            pass
+
+    def invalidar_lei(self, arquivo, hashes_atuais):
+        """
+        Remove as explicações da lei cujo texto de artigo não está mais em
+        `hashes_atuais` (conjunto de hash_texto dos artigos atuais).
+        Retorna o número de entradas removidas.
+        """
+        if self._conexao is None:
+            return 0
+        try:
+            with self._trava, self._conexao:
+                linhas = self._conexao.execute(
+                    "SELECT chave, hash_texto FROM explicacoes WHERE arquivo = ?", (arquivo,)
+                ).fetchall()
+                obsoletas = [(chave,) for chave, hash_atual in linhas if hash_atual not in hashes_atuais]
+                self._conexao.executemany("DELETE FROM explicacoes WHERE chave = ?", obsoletas)
+                return len(obsoletas)
+        except sqlite3.Error:
+            return 0
+
+    def estatisticas(self):
+        """Acertos, faltas, número de entradas e bytes ocupados (zeros com o cache desligado)."""
+        contadores, entradas, total = {}, 0, 0
+        if self._conexao is not None:
+            try:
+                with self._trava:
+                    contadores = dict(self._conexao.execute("SELECT nome, valor FROM contadores").fetchall())
+                    entradas, total = self._conexao.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM explicacoes"
+                    ).fetchone()
+            except sqlite3.Error:
+                pass
+        return {
+            "acertos": contadores.get("acertos", 0),
+            "faltas": contadores.get("faltas", 0),
+            "entradas": entradas,
+            "bytes": total,
+        }
+
+    def _incrementar(self, nome):
+        self._conexao.execute(
+            "INSERT INTO contadores VALUES (?, 1) ON CONFLICT(nome) DO UPDATE SET valor = valor + 1", (nome,)
+        )
+
+    def _remover_excesso(self):
+        (total,) = self._conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM explicacoes").fetchone()
+        if total <= self.tamanho_maximo:
+            return
+        removidas = []
+        for chave, tamanho in self._conexao.execute(
+            "SELECT chave, tamanho FROM explicacoes ORDER BY ultimo_acesso"
+        ):
+            if total <= self.tamanho_maximo:
+                break
+            removidas.append((chave,))
+            total -= tamanho
+        self._conexao.executemany("DELETE FROM explicacoes WHERE chave = ?", removidas)
+
+
+_CACHE = None
+_TRAVA = threading.Lock()
+
+
+def obter_cache_explicacoes():
+    """Instância única do cache no processo."""
+    global _CACHE
+    with _TRAVA:
+        if _CACHE is None:
+            _CACHE = CacheExplicacoes()
+    return _CACHE
@@ -0,0 +1,356 @@
+import re
+import threading
+from functools import lru_cache
+from collections import OrderedDict
+
+from corpus import dobrar
+from indice import obter_indice
+from metricas import fase, contar
+
+# =========================================================================
+# BUSCA INCREMENTAL E CACHE DE CONSULTAS
+# =========================================================================
+#
+# Quando a nova consulta apenas RESTRINGE a anterior (ex.: "contrib" ->
+# "contribuição", ou "prazo" -> "prazo, recurso"), o conjunto de artigos
+# encontrados só pode diminuir. Nesse caso basta filtrar os resultados
+# anteriores, sem consultar o índice de novo.
+#
+# Os conjuntos de resultados (índices de artigos por lei) das consultas
+# recentes ficam em um cache LRU limitado, compartilhado pelas sessões.
+#
+# Índices de artigos só valem para uma versão do texto da lei: a chave do
+# cache inclui corpus.versao e os resultados carregam a versão de origem, de
+# modo que, quando a lei é atualizada (ver corpus.py), nem o cache nem o
+# refinamento reaproveitam índices da versão antiga. As entradas antigas
+# simplesmente deixam de ser usadas e saem pelo LRU.
+
+TAMANHO_CACHE_CONSULTAS = 512
+
+
+def extrair_termos(termo_pesquisa):
+    """
+    Converte o texto digitado na lista de termos OBRIGATÓRIOS, dobrados
+    (minúsculos e sem acentos, ver corpus.dobrar): "Órgão" e "orgao" buscam o mesmo.
+    Com vírgulas, cada expressão separada vira um termo (lógica AND).
+    """
+    termo_limpo = termo_pesquisa.strip()
+    if not termo_limpo:
+        return []
+
+    if ',' in termo_limpo:
+        # Limpa espaços e descarta expressões vazias (ex: só vírgulas)
+        return [dobrar(t.strip()) for t in termo_limpo.split(',') if t.strip()]
+    return [dobrar(termo_limpo)]
+
+
+def refina(termos_novos, termos_anteriores):
+    """
+    True se todo artigo que contém os termos novos contém também os
+    anteriores, isto é, se cada termo anterior é substring de algum termo novo.
+    """
+    if not termos_anteriores:
+        return False
+    return all(any(antigo in novo for novo in termos_novos) for antigo in termos_anteriores)
+
+
+# =========================================================================
+# OPERADORES DE CONSULTA
+# =========================================================================
+#
+#   contribu*               palavras que começam com "contribu"
+#   prazo OR termo          artigos com qualquer um dos dois
+#   prazo NOT recurso       "prazo" sem "recurso" (também: "prazo, NOT recurso")
+#   prazo NEAR/5 recurso    no máximo 5 palavras entre os dois
+#   (multa OR pena), dolo   parênteses agrupam; a vírgula continua sendo AND
+#
+# Os operadores só valem em MAIÚSCULAS e separados por espaços; sem eles (e
+# sem "*") a consulta segue a semântica de substring de sempre. Precedência:
+# NEAR > NOT > vírgula (AND) > OR. Uma consulta com operadores malformada
+# (parênteses sem par, operador sem termo de um dos lados, como "prazo OR"
+# ou "NOT" sozinho) é recusada com ConsultaInvalida, cuja mensagem é
+# mostrada ao usuário.
+#
+# A árvore da consulta é feita de tuplas (imutáveis e com hash): fica em um
+# cache LRU por texto digitado e serve de chave no cache de consultas.
+#   ("frase", "texto")              substring literal, como um termo comum
+#   ("curinga", (("contribu", True), ("social", False)))
+#                                   palavras inteiras (True = prefixo)
+#   ("perto", n, a, b)              a e b com até n palavras entre eles
+#   ("e", filhos) / ("ou", filhos) / ("nao", filho)
+# A avaliação fica em IndiceInvertido.avaliar (indice.py).
+
+_OPERADOR = r'(?<![^\s)])(?:OR|NOT|NEAR/\d+)(?![^\s(])'
+PADRAO_OPERADOR = re.compile(_OPERADOR)
+PADRAO_CURINGA = re.compile(r'\w\*')
+PADRAO_PECAS = re.compile(r'(\(|\)|,|' + _OPERADOR + r')')
+PADRAO_PALAVRA_CURINGA = re.compile(r'(\w+)(\*?)')
+
+
+class ConsultaInvalida(ValueError):
+    """Consulta com operadores malformada; a mensagem explica o problema ao usuário."""
+
+
+def usa_operadores(termo_pesquisa):
+    """True se a consulta usa algum operador (OR, NOT, NEAR/n ou curinga *)."""
+    return bool(PADRAO_OPERADOR.search(termo_pesquisa) or PADRAO_CURINGA.search(termo_pesquisa))
+
+
+def _juntar(tipo, filhos):
+    """Nó "e"/"ou" com os filhos válidos; nós do mesmo tipo são achatados."""
+    achatados = []
+    for filho in filhos:
+        if filho is None:
+            continue
+        if filho[0] == tipo:
+            achatados.extend(filho[1])
+        else:
+            achatados.append(filho)
+    if not achatados:
+        return None
+    if len(achatados) == 1:
+        return achatados[0]
+    return (tipo, tuple(achatados))
+
+
+def _frase(texto):
+    """Nó de uma expressão digitada: frase literal ou, com "*", palavras inteiras."""
+    texto = dobrar(texto.strip())
+    if not texto:
+        return None
+    if "*" not in texto:
+        return ("frase", texto)
+    palavras = tuple(
+        (m.group(1), bool(m.group(2))) for m in PADRAO_PALAVRA_CURINGA.finditer(texto)
+    )
+    return ("curinga", palavras) if palavras else None
+
+
+class _Analisador:
+    """Análise descendente recursiva das peças da consulta (ver analisar_consulta)."""
+
+    def __init__(self, pecas):
+        self.pecas = pecas
+        self.pos = 0
+
+    def _atual(self):
+        return self.pecas[self.pos] if self.pos < len(self.pecas) else None
+
+    def consulta(self):
+        no = self.ou()
+        if self._atual() == ")":
+            raise ConsultaInvalida('parêntese ")" sem o "(" correspondente.')
+        if no is None:
+            raise ConsultaInvalida("a consulta não tem nenhum termo para buscar.")
+        return no
+
+    def ou(self):
+        filhos = [self.e()]
+        while self._atual() == "OR":
+            self.pos += 1
+            filhos.append(self.e())
+        if len(filhos) > 1 and None in filhos:
+            raise ConsultaInvalida("o operador OR precisa de um termo de cada lado.")
+        return _juntar("ou", filhos)
+
+    def e(self):
+        filhos = []
+        while self._atual() not in (None, ")", "OR"):
+            if self._atual() == ",":
+                self.pos += 1
+            else:
+                filhos.append(self.unario())
+        return _juntar("e", filhos)
+
+    def unario(self):
+        if self._atual() == "NOT":
+            self.pos += 1
+            filho = self.unario()
+            if filho is None:
+                raise ConsultaInvalida("o operador NOT precisa de um termo depois dele.")
+            return ("nao", filho)
+        return self.perto()
+
+    def perto(self):
+        no = self.primario()
+        while (self._atual() or "").startswith("NEAR/"):
+            operador = self._atual()
+            self.pos += 1
+            outro = self.primario()
+            if no is None or outro is None:
+                raise ConsultaInvalida(f"o operador {operador} precisa de um termo de cada lado.")
+            no = ("perto", int(operador[5:]), no, outro)
+        return no
+
+    def primario(self):
+        peca = self._atual()
+        if peca == "(":
+            self.pos += 1
+            no = self.ou()
+            if self._atual() != ")":
+                raise ConsultaInvalida('parêntese "(" sem o ")" correspondente.')
+            self.pos += 1
+            if no is None:
+                raise ConsultaInvalida("parênteses sem nenhum termo dentro.")
+            return no
+        if peca is None or peca in (")", ",", "OR", "NOT") or peca.startswith("NEAR/"):
+            return None
+        self.pos += 1
+        return _frase(peca)
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_CONSULTAS)
+def analisar_consulta(termo_pesquisa):
+    """
+    Árvore da consulta com operadores (ver acima), ou None se a consulta não
+    usa operadores e deve seguir pelo caminho comum (extrair_termos).
+    Levanta ConsultaInvalida se a consulta com operadores estiver malformada.
+    """
+    if not usa_operadores(termo_pesquisa):
+        return None
+    pecas = [peca.strip() for peca in PADRAO_PECAS.split(termo_pesquisa)]
+    return _Analisador([peca for peca in pecas if peca]).consulta()
+
+
+def termos_positivos(expressao):
+    """Textos que a expressão procura (fora de NOT), para pontuação e destaque."""
+    tipo = expressao[0]
+    if tipo == "frase":
+        return [expressao[1]]
+    if tipo == "curinga":
+        return [palavra for palavra, _ in expressao[1]]
+    if tipo == "nao":
+        return []
+    filhos = expressao[2:] if tipo == "perto" else expressao[1]
+    termos = []
+    for filho in filhos:
+        for termo in termos_positivos(filho):
+            if termo not in termos:
+                termos.append(termo)
+    return termos
+
+
+def termos_consulta(termo_pesquisa):
+    """Termos (dobrados) procurados pela consulta, com ou sem operadores."""
+    expressao = analisar_consulta(termo_pesquisa)
+    if expressao is None:
+        return extrair_termos(termo_pesquisa)
+    return termos_positivos(expressao)
+
+
+def chave_consulta(nome_arquivo, termos, versao=None, expressao=None):
+    """
+    Chave canônica: a ordem e as repetições dos termos não mudam o resultado.
+    Consultas com operadores usam a árvore como chave; o rótulo ("termos" ou
+    "expr") impede que uma lista de termos e uma árvore com as mesmas tuplas
+    (ex.: "frase, prazo" e "prazo OR" -> ("frase", "prazo")) se confundam.
+    """
+    if expressao is not None:
+        return (nome_arquivo, versao, "expr", expressao)
+    return (nome_arquivo, versao, "termos", tuple(sorted(set(termos))))
+
+
+def entradas_cache(termo_pesquisa):
+    """
+    Quantas entradas uma busca da consulta ocupa no cache de consultas, por
+    lei: a da consulta e, na ordem por relevância, a de cada termo (o df do
+    BM25, ver ranking.top_k_bm25). Levanta ConsultaInvalida como analisar_consulta.
+    """
+    expressao = analisar_consulta(termo_pesquisa)
+    if expressao is None:
+        termos = extrair_termos(termo_pesquisa)
+        if not termos:
+            return 0
+        chaves = {chave_consulta(None, termos)}
+    else:
+        termos = termos_positivos(expressao)
+        chaves = {chave_consulta(None, termos, expressao=expressao)}
+    chaves.update(chave_consulta(None, [termo]) for termo in termos)
+    return len(chaves)
+
+
+class IdsConsulta(tuple):
+    """Tupla de índices de artigos que sabe de qual versão da lei veio."""
+
+    def __new__(cls, ids, versao):
+        ids = super().__new__(cls, ids)
+        ids.versao = versao
+        return ids
+
+
+class CacheConsultas:
+    """LRU limitado de consulta -> tupla de índices de artigos (thread-safe)."""
+
+    def __init__(self, capacidade):
+        self.capacidade = capacidade
+        self.acertos = 0
+        self.faltas = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave):
+        with self._trava:
+            ids = self._itens.get(chave)
+            if ids is None:
+                self.faltas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return ids
+
+    def guardar(self, chave, ids):
+        with self._trava:
+            self._itens[chave] = ids
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+
+CACHE_CONSULTAS = CacheConsultas(TAMANHO_CACHE_CONSULTAS)
+
+
+def buscar_ids(nome_arquivo, sigla_lei, termos, anterior=None, expressao=None):
+    """
+    Índices (em ordem do arquivo) dos artigos da lei que contêm todos os termos.
+
+    `anterior` é um par opcional (termos_anteriores, ids_anteriores) da última
+    busca da sessão nesta lei; se a nova consulta o refina (e a lei não mudou
+    desde então), os ids anteriores são apenas filtrados. Levanta
+    FileNotFoundError se a lei não existir.
+
+    Com `expressao` (árvore de analisar_consulta), os artigos são os que
+    satisfazem a expressão; `termos` e `anterior` são ignorados.
+
+    Retorna um IdsConsulta (tupla com o atributo `versao` da lei).
+    """
+    indice = obter_indice(nome_arquivo, sigla_lei)
+    corpus = indice.corpus
+    chave = chave_consulta(nome_arquivo, termos, corpus.versao, expressao)
+
+    ids = CACHE_CONSULTAS.obter(chave)
+    if ids is not None:
+        contar("busca.cache_acertos")
+        return ids
+
+    if expressao is not None:
+        with fase("busca.operadores"):
+            ids = IdsConsulta(indice.avaliar(expressao), corpus.versao)
+    elif (anterior is not None and refina(termos, anterior[0])
+            and getattr(anterior[1], "versao", None) == corpus.versao):
+        with fase("busca.refinamento"):
+            ids = IdsConsulta(corpus.filtrar(anterior[1], termos), corpus.versao)
+    else:
+        with fase("busca.indice"):
+            ids = IdsConsulta(indice.buscar(termos), corpus.versao)
+    contar("busca.consultas")
+    contar("busca.acertos", len(ids))
+
+    CACHE_CONSULTAS.guardar(chave, ids)
+    return ids
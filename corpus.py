@@ -0,0 +1,552 @@
+import os
+import re
+import sys
+import mmap
+import glob
+import time
+import struct
+import bisect
+import difflib
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+from metricas import fase, contar
+
+# =========================================================================
+# ARMAZENAMENTO PRÉ-COMPILADO DOS ARTIGOS
+# =========================================================================
+#
+# Cada arquivo de lei (.txt) é dividido em artigos UMA ÚNICA VEZ e gravado em
+# um arquivo binário compacto dentro de DIRETORIO_INDICE. Na inicialização o
+# arquivo é mapeado em memória (mmap) e compartilhado por todas as sessões do
+# Streamlit, de modo que cada consulta faz apenas o trabalho de comparação.
+#
+# Layout do arquivo (little-endian):
+#   cabeçalho  -> FORMATO_CABECALHO (ver abaixo)
+#   colunas    -> 8 colunas de int64 com `total` posições cada:
+#                 numero_ini, numero_fim, texto_ini, texto_fim,
+#                 dobrado_ini, dobrado_fim, mapa_ini, mapa_fim
+#   mapa       -> pares int32 (posição no dobrado, posição no original) de
+#                 cada artigo, ver dobrar_com_mapa
+#   texto      -> conteúdo original da lei (UTF-8, sem BOM)
+#   dobrado    -> texto de cada artigo em minúsculas e sem acentos, separados
+#                 por \0 (ver dobrar)
+#
+# Os offsets de número/texto são offsets em BYTES dentro da seção `texto`,
+# que é idêntica ao arquivo de origem (sem o BOM). Os de `dobrado` são em
+# bytes da seção `dobrado`, e os de `mapa`, em pares.
+#
+# A busca (varredura, índice invertido, BM25) trabalha sobre a seção
+# `dobrado`, então "orgao" encontra "órgão" pelo mesmo find() de sempre.
+# O texto exibido (previews, texto_completo) continua vindo da seção `texto`.
+#
+# Atualização das leis com o servidor no ar: obter_corpus() confere o mtime e
+# o tamanho do arquivo de origem (no máximo a cada INTERVALO_VERIFICACAO
+# segundos). Se mudaram mas o hash do conteúdo é o mesmo, só o cabeçalho é
+# atualizado; se o conteúdo mudou, apenas essa lei é dividida de novo e o novo
+# CorpusLei substitui o antigo no registro. O novo corpus guarda a
+# correspondência com os artigos da versão anterior (mapa_anterior), usada para
+# reindexar só os artigos alterados (ver indice.py). Buscas em andamento
+# continuam usando o corpus antigo, cujo mapeamento segue válido.
+
+DIRETORIO_INDICE = ".indice"
+EXTENSAO_INDICE = ".artigos"
+
+MAGICO = b"MAPALEI1"
+VERSAO_FORMATO = 3
+# magico, versao, total de artigos, tamanho do texto, tamanho do dobrado,
+# número de pares do mapa, mtime_ns e tamanho do arquivo de origem, sigla,
+# SHA-256 do conteúdo
+FORMATO_CABECALHO = "<8sIIQQQqQ16s32s"
+TAMANHO_CABECALHO = struct.calcsize(FORMATO_CABECALHO)
+NUM_COLUNAS = 8
+
+# Mesma expressão usada desde a primeira versão do buscador
+PADRAO_ARTIGO = re.compile(r'(\sArt\.\s[\d\.]+)')
+SEPARADOR = b"\0"
+
+# Intervalo mínimo (segundos) entre verificações de mudança no arquivo de uma lei
+INTERVALO_VERIFICACAO = 2.0
+
+# Artigos por lei com o texto normalizado (previews) guardado em memória
+TAMANHO_CACHE_NORMALIZADOS = 1024
+
+
+# =========================================================================
+# TEXTO DOBRADO (MINÚSCULAS SEM ACENTOS) E MAPA DE POSIÇÕES
+# =========================================================================
+#
+# Cada caractere é dobrado isoladamente (lower() + NFD sem as marcas
+# combinantes), então quase sempre vira exatamente um caractere e as posições
+# do texto dobrado e do original coincidem. As exceções (marcas combinantes
+# soltas no texto, que somem; caracteres que viram dois) são guardadas em um
+# mapa compacto: pares (posição no dobrado, posição no original) logo depois
+# de cada exceção. Entre dois pares, as posições andam juntas.
+
+class _TabelaDobra(dict):
+    """Tabela de str.translate preenchida sob demanda: código do caractere -> texto dobrado."""
+
+    def __missing__(self, codigo):
+        decomposto = unicodedata.normalize('NFD', chr(codigo).lower())
+        dobrado = "".join(c for c in decomposto if not unicodedata.combining(c))
+        self[codigo] = dobrado
+        return dobrado
+
+
+_TABELA_DOBRA = _TabelaDobra()
+MAPA_VAZIO = ((), ())
+
+
+def dobrar(texto):
+    """Texto em minúsculas e sem acentos/diacríticos (ex.: 'Órgão' -> 'orgao')."""
+    return texto.translate(_TABELA_DOBRA)
+
+
+def dobrar_com_mapa(texto):
+    """
+    (dobrado, mapa): o texto dobrado e o mapa de posições dele para o
+    original, como par de sequências (posicoes_dobrado, posicoes_original).
+    O mapa é MAPA_VAZIO quando as posições coincidem (o caso comum).
+    """
+    dobrado = dobrar(texto)
+    excecoes = {c for c in set(texto) if len(_TABELA_DOBRA[ord(c)]) != 1}
+    if not excecoes:
+        return dobrado, MAPA_VAZIO
+    posicoes_dobrado, posicoes_original = array('i'), array('i')
+    pos = 0
+    for original, c in enumerate(texto):
+        if c in excecoes:
+            pos += len(_TABELA_DOBRA[ord(c)])
+            posicoes_dobrado.append(pos)
+            posicoes_original.append(original + 1)
+        else:
+            pos += 1
+    return dobrado, (posicoes_dobrado, posicoes_original)
+
+
+def para_original(mapa, pos):
+    """Posição no texto original correspondente à posição `pos` do dobrado."""
+    k = bisect.bisect_right(mapa[0], pos) - 1
+    return pos if k < 0 else mapa[1][k] + pos - mapa[0][k]
+
+
+def para_dobrado(mapa, pos):
+    """Posição no texto dobrado correspondente à posição `pos` do original."""
+    k = bisect.bisect_right(mapa[1], pos) - 1
+    return pos if k < 0 else mapa[0][k] + pos - mapa[1][k]
+
+
+def _ler_conteudo(nome_arquivo):
+    """Lê a lei exatamente como o open(..., encoding='utf-8-sig') em modo texto."""
+    with open(nome_arquivo, 'r', encoding='utf-8-sig') as f:
+        return f.read()
+
+
+def dividir_artigos(conteudo):
+    """
+    Divide o conteúdo da lei em artigos, com a mesma semântica de
+    re.split(r'(\\sArt\\.\\s[\\d\\.]+)', conteudo).
+
+    Retorna uma lista de tuplas (numero_ini, numero_fim, texto_ini, texto_fim)
+    em offsets de CARACTERES, já descontando os espaços removidos pelo strip().
+    """
+    marcadores = list(PADRAO_ARTIGO.finditer(conteudo))
+    artigos = []
+
+    for i, m in enumerate(marcadores):
+        # Número: grupo capturado com strip()
+        bruto = m.group()
+        numero_ini = m.start() + (len(bruto) - len(bruto.lstrip()))
+        numero_fim = m.end() - (len(bruto) - len(bruto.rstrip()))
+
+        # Texto: tudo até o próximo marcador (ou fim do arquivo), com strip()
+        fim_bruto = marcadores[i + 1].start() if i + 1 < len(marcadores) else len(conteudo)
+        trecho = conteudo[m.end():fim_bruto]
+        texto_ini = m.end() + (len(trecho) - len(trecho.lstrip()))
+        texto_fim = fim_bruto - (len(trecho) - len(trecho.rstrip()))
+        if texto_fim < texto_ini:
+            texto_fim = texto_ini
+
+        artigos.append((numero_ini, numero_fim, texto_ini, texto_fim))
+
+    return artigos
+
+
+def offsets_em_bytes(conteudo, posicoes):
+    """Converte offsets de caracteres (em ordem qualquer) para offsets em bytes UTF-8."""
+    mapa = {}
+    anterior_char = 0
+    anterior_byte = 0
+    for pos in sorted(set(posicoes)):
+        anterior_byte += len(conteudo[anterior_char:pos].encode('utf-8'))
+        anterior_char = pos
+        mapa[pos] = anterior_byte
+    return mapa
+
+
+def caminho_indice(nome_arquivo):
+    """Caminho do arquivo pré-compilado correspondente a uma lei."""
+    diretorio = os.path.join(os.path.dirname(os.path.abspath(nome_arquivo)), DIRETORIO_INDICE)
+    return os.path.join(diretorio, os.path.basename(nome_arquivo) + EXTENSAO_INDICE)
+
+
+def construir_indice(nome_arquivo, sigla_lei=""):
+    """
+    Etapa de build: lê a lei, divide em artigos e grava o arquivo pré-compilado.
+    A escrita é atômica (arquivo temporário + os.replace).
+    """
+    info = os.stat(nome_arquivo)
+    with fase("corpus.leitura"):
+        conteudo = _ler_conteudo(nome_arquivo)
+    contar("corpus.bytes_lidos", info.st_size)
+    with fase("corpus.divisao_artigos"):
+        artigos = dividir_artigos(conteudo)
+
+    posicoes = [p for artigo in artigos for p in artigo]
+    em_bytes = offsets_em_bytes(conteudo, posicoes)
+
+    colunas = [[] for _ in range(NUM_COLUNAS)]
+    partes_dobradas = []
+    cursor_dobrado = 0
+    mapa = array('i')
+
+    with fase("corpus.dobra"):
+        for numero_ini, numero_fim, texto_ini, texto_fim in artigos:
+            colunas[0].append(em_bytes[numero_ini])
+            colunas[1].append(em_bytes[numero_fim])
+            colunas[2].append(em_bytes[texto_ini])
+            colunas[3].append(em_bytes[texto_fim])
+
+            dobrado, (posicoes_dobrado, posicoes_original) = dobrar_com_mapa(conteudo[texto_ini:texto_fim])
+            dobrado = dobrado.encode('utf-8')
+            colunas[4].append(cursor_dobrado)
+            colunas[5].append(cursor_dobrado + len(dobrado))
+            partes_dobradas.append(dobrado)
+            cursor_dobrado += len(dobrado) + len(SEPARADOR)
+
+            colunas[6].append(len(mapa) // 2)
+            for par in zip(posicoes_dobrado, posicoes_original):
+                mapa.extend(par)
+            colunas[7].append(len(mapa) // 2)
+
+    texto = conteudo.encode('utf-8')
+    dobrado = SEPARADOR.join(partes_dobradas)
+    total = len(artigos)
+
+    cabecalho = struct.pack(
+        FORMATO_CABECALHO, MAGICO, VERSAO_FORMATO, total, len(texto), len(dobrado), len(mapa) // 2,
+        info.st_mtime_ns, info.st_size, sigla_lei.encode('utf-8')[:16], hashlib.sha256(texto).digest()
+    )
+    valores = [v for coluna in colunas for v in coluna]
+
+    destino = caminho_indice(nome_arquivo)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporario = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, 'wb') as f:
+        f.write(cabecalho)
+        f.write(struct.pack(f"<{len(valores)}q", *valores))
+        f.write(mapa.tobytes())
+        f.write(texto)
+        f.write(dobrado)
+    os.replace(temporario, destino)
+    return destino
+
+
+def _indice_atualizado(nome_arquivo, destino):
+    """Verifica se o arquivo pré-compilado existe e corresponde à lei no disco."""
+    try:
+        info = os.stat(nome_arquivo)
+        with open(destino, 'rb') as f:
+            dados = f.read(TAMANHO_CABECALHO)
+    except FileNotFoundError:
+        return False
+    if len(dados) < TAMANHO_CABECALHO:
+        return False
+    magico, versao, _, _, _, _, mtime_ns, tamanho, _, _ = struct.unpack(FORMATO_CABECALHO, dados)
+    return (
+        magico == MAGICO and versao == VERSAO_FORMATO
+        and mtime_ns == info.st_mtime_ns and tamanho == info.st_size
+    )
+
+
+def _reaproveitar_indice(nome_arquivo, destino):
+    """
+    Se o arquivo de origem mudou de mtime/tamanho mas não de conteúdo (ex.:
+    `touch`, cópia do mesmo texto), atualiza só o cabeçalho do arquivo
+    pré-compilado. Retorna True se o arquivo pré-compilado continua válido.
+    """
+    try:
+        with open(destino, 'rb') as f:
+            dados = f.read(TAMANHO_CABECALHO)
+    except FileNotFoundError:
+        return False
+    if len(dados) < TAMANHO_CABECALHO:
+        return False
+    campos = list(struct.unpack(FORMATO_CABECALHO, dados))
+    if campos[0] != MAGICO or campos[1] != VERSAO_FORMATO:
+        return False
+
+    info = os.stat(nome_arquivo)
+    with fase("corpus.leitura"):
+        conteudo = _ler_conteudo(nome_arquivo)
+    contar("corpus.bytes_lidos", info.st_size)
+    if hashlib.sha256(conteudo.encode('utf-8')).digest() != campos[9]:
+        return False
+
+    campos[6], campos[7] = info.st_mtime_ns, info.st_size
+    with open(destino, 'r+b') as f:
+        f.write(struct.pack(FORMATO_CABECALHO, *campos))
+    return True
+
+
+def hash_artigo(corpus, i):
+    """Hash curto do número + texto de um artigo (para comparar versões da lei)."""
+    return hashlib.blake2b(f"{corpus.numero(i)}\0{corpus.texto(i)}".encode('utf-8'), digest_size=16).digest()
+
+
+def mapear_artigos(anterior, novo):
+    """
+    Correspondência entre os artigos de duas versões da mesma lei.
+    Retorna um array com, para cada artigo de `novo`, o índice do artigo
+    IDÊNTICO em `anterior` (ou -1 se o artigo é novo ou foi alterado). Os
+    artigos inalterados mantêm a ordem relativa (blocos do difflib).
+    """
+    hashes_anteriores = [hash_artigo(anterior, i) for i in range(anterior.total)]
+    hashes_novos = [hash_artigo(novo, i) for i in range(novo.total)]
+    mapa = array('i', [-1]) * novo.total
+    comparador = difflib.SequenceMatcher(None, hashes_anteriores, hashes_novos, autojunk=False)
+    for bloco in comparador.get_matching_blocks():
+        for k in range(bloco.size):
+            mapa[bloco.b + k] = bloco.a + k
+    return mapa
+
+
+class CorpusLei:
+    """
+    Visão somente-leitura (mapeada em memória) dos artigos de uma lei.
+    Artigos são identificados pelo seu índice (0..total-1), na ordem do arquivo.
+    """
+
+    __slots__ = (
+        "nome_arquivo", "sigla", "total", "versao", "versao_anterior", "mapa_anterior",
+        "_mapa", "_colunas", "_texto", "_dobrado", "_base_dobrado", "_pares", "_verificado_em",
+        "_normalizados", "_trava_normalizados",
+    )
+
+    def __init__(self, nome_arquivo, caminho):
+        self.nome_arquivo = nome_arquivo
+        with open(caminho, 'rb') as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (_, _, total, tam_texto, tam_dobrado, num_pares, _, _, sigla, conteudo_hash) = struct.unpack_from(
+            FORMATO_CABECALHO, self._mapa
+        )
+        self.total = total
+        self.sigla = sigla.rstrip(b"\0").decode('utf-8')
+        # Identifica a versão do texto da lei (hash do conteúdo)
+        self.versao = conteudo_hash.hex()[:16]
+        # Preenchidos quando este corpus substitui uma versão anterior da lei
+        self.versao_anterior = None
+        self.mapa_anterior = None
+        self._verificado_em = time.monotonic()
+        # LRU de textos com espaços normalizados (previews), ver texto_normalizado()
+        self._normalizados = OrderedDict()
+        self._trava_normalizados = threading.Lock()
+
+        visao = memoryview(self._mapa)
+        fim_colunas = TAMANHO_CABECALHO + NUM_COLUNAS * total * 8
+        inteiros = visao[TAMANHO_CABECALHO:fim_colunas].cast('q')
+        self._colunas = [inteiros[c * total:(c + 1) * total] for c in range(NUM_COLUNAS)]
+        fim_mapa = fim_colunas + num_pares * 8
+        self._pares = visao[fim_colunas:fim_mapa].cast('i')
+        self._texto = visao[fim_mapa:fim_mapa + tam_texto]
+        self._dobrado = visao[fim_mapa + tam_texto:fim_mapa + tam_texto + tam_dobrado]
+        # Posição absoluta (no mmap) do início da seção dobrada
+        self._base_dobrado = fim_mapa + tam_texto
+
+    def __len__(self):
+        return self.total
+
+    def numero(self, i):
+        """Número do artigo, ex.: 'Art. 5'."""
+        return bytes(self._texto[self._colunas[0][i]:self._colunas[1][i]]).decode('utf-8')
+
+    def texto(self, i):
+        """Texto original do artigo (sem o número), já com strip()."""
+        return bytes(self._texto[self._colunas[2][i]:self._colunas[3][i]]).decode('utf-8')
+
+    def texto_dobrado(self, i):
+        """Texto do artigo em minúsculas e sem acentos (ver dobrar)."""
+        return bytes(self._dobrado[self._colunas[4][i]:self._colunas[5][i]]).decode('utf-8')
+
+    def mapa_dobrado(self, i):
+        """Mapa de posições de texto_dobrado(i) para texto(i) (ver para_original/para_dobrado)."""
+        inicio, fim = self._colunas[6][i], self._colunas[7][i]
+        if inicio == fim:
+            return MAPA_VAZIO
+        return self._pares[2 * inicio:2 * fim:2], self._pares[2 * inicio + 1:2 * fim:2]
+
+    def texto_normalizado(self, i):
+        """
+        Trio (texto, dobrado, mapa) do artigo com cada sequência de brancos
+        trocada por um espaço, usado nos previews (ver dobrar_com_mapa). Os
+        artigos exibidos recentemente ficam em um LRU
+        (TAMANHO_CACHE_NORMALIZADOS por lei).
+        """
+        with self._trava_normalizados:
+            trio = self._normalizados.get(i)
+            if trio is not None:
+                self._normalizados.move_to_end(i)
+                return trio
+        normalizado = " ".join(self.texto(i).split())
+        trio = (normalizado, *dobrar_com_mapa(normalizado))
+        with self._trava_normalizados:
+            self._normalizados[i] = trio
+            if len(self._normalizados) > TAMANHO_CACHE_NORMALIZADOS:
+                self._normalizados.popitem(last=False)
+        return trio
+
+    def trecho(self, inicio, fim):
+        """Texto entre dois offsets em bytes da seção de texto."""
+        return bytes(self._texto[inicio:fim]).decode('utf-8')
+
+    def conteudo(self):
+        """Texto completo da lei (igual ao arquivo de origem, sem BOM)."""
+        return bytes(self._texto).decode('utf-8')
+
+    def offsets(self, i):
+        """Offsets em bytes (numero_ini, numero_fim, texto_ini, texto_fim) no arquivo de origem."""
+        return tuple(coluna[i] for coluna in self._colunas[:4])
+
+    def artigos_com_termo(self, termo):
+        """
+        Índices dos artigos cujo texto dobrado contém `termo` (já dobrado).
+        Faz um único find() por artigo sobre o bloco mapeado.
+        """
+        agulha = termo.encode('utf-8')
+        if not agulha:
+            return list(range(self.total))
+
+        inicios, fins = self._colunas[4], self._colunas[5]
+        encontrados = []
+        base = self._base_dobrado
+        limite = base + len(self._dobrado)
+        pos = self._mapa.find(agulha, base, limite)
+
+        while pos != -1 and pos < limite:
+            relativo = pos - base
+            i = bisect.bisect_right(inicios, relativo) - 1
+            if relativo + len(agulha) <= fins[i]:
+                encontrados.append(i)
+                # Basta uma ocorrência por artigo: pula para o próximo
+                proximo = base + fins[i]
+            else:
+                # Ocorrência atravessando a fronteira entre artigos
+                proximo = pos + 1
+            pos = self._mapa.find(agulha, proximo, limite)
+
+        return encontrados
+
+    def buscar(self, termos):
+        """Índices (em ordem do arquivo) dos artigos que contêm TODOS os termos."""
+        contar("busca.artigos_varridos", self.total)
+        candidatos = None
+        for termo in termos:
+            if candidatos is None:
+                candidatos = self.artigos_com_termo(termo)
+            else:
+                agulha = termo.encode('utf-8')
+                candidatos = [i for i in candidatos if self._contem(i, agulha)]
+            if not candidatos:
+                return []
+        return candidatos if candidatos is not None else []
+
+    def contar(self, i, termo):
+        """Número de ocorrências (sem sobreposição) do termo (já dobrado) no artigo dobrado."""
+        return self.texto_dobrado(i).count(termo)
+
+    def filtrar(self, indices, termos):
+        """Mantém, dos índices dados, os artigos que contêm TODOS os termos."""
+        agulhas = [termo.encode('utf-8') for termo in termos]
+        contar("busca.artigos_varridos", len(indices))
+        return [i for i in indices if all(self._contem(i, agulha) for agulha in agulhas)]
+
+    def _contem(self, i, agulha):
+        base = self._base_dobrado
+        return self._mapa.find(agulha, base + self._colunas[4][i], base + self._colunas[5][i]) != -1
+
+
+# =========================================================================
+# REGISTRO COMPARTILHADO (um corpus por processo, para todas as sessões)
+# =========================================================================
+
+_CORPORA = {}
+_TRAVA = threading.Lock()
+
+
+def _abrir(nome_arquivo, sigla_lei):
+    """Abre o arquivo pré-compilado da lei, (re)construindo-o se estiver desatualizado."""
+    if not os.path.exists(nome_arquivo):
+        raise FileNotFoundError(nome_arquivo)
+    destino = caminho_indice(nome_arquivo)
+    if not _indice_atualizado(nome_arquivo, destino) and not _reaproveitar_indice(nome_arquivo, destino):
+        construir_indice(nome_arquivo, sigla_lei)
+    with fase("corpus.abertura"):
+        return CorpusLei(nome_arquivo, destino)
+
+
+def _mudou(corpus):
+    """Confere (no máximo a cada INTERVALO_VERIFICACAO s) se o arquivo da lei mudou no disco."""
+    agora = time.monotonic()
+    if agora - corpus._verificado_em < INTERVALO_VERIFICACAO:
+        return False
+    corpus._verificado_em = agora
+    try:
+        return not _indice_atualizado(corpus.nome_arquivo, caminho_indice(corpus.nome_arquivo))
+    except OSError:
+        return True
+
+
+def obter_corpus(nome_arquivo, sigla_lei=""):
+    """
+    Retorna o CorpusLei da lei, construindo o arquivo pré-compilado se ele não
+    existir ou estiver desatualizado. Levanta FileNotFoundError se a lei não
+    existir no disco.
+
+    Se o arquivo da lei mudar com o processo no ar, a próxima chamada (após
+    INTERVALO_VERIFICACAO s) devolve um CorpusLei novo, com `versao` diferente.
+    """
+    chave = os.path.abspath(nome_arquivo)
+    corpus = _CORPORA.get(chave)
+    if corpus is not None and not _mudou(corpus):
+        return corpus
+
+    with _TRAVA:
+        atual = _CORPORA.get(chave)
+        if atual is not None and atual is not corpus:
+            return atual  # outra thread já trocou a versão
+        novo = _abrir(nome_arquivo, sigla_lei or (atual.sigla if atual else ""))
+        if atual is not None:
+            if novo.versao == atual.versao:
+                # Só o mtime mudou (cabeçalho regravado): mantém o corpus em uso
+                novo = atual
+            else:
+                with fase("corpus.diferenca"):
+                    novo.mapa_anterior = mapear_artigos(atual, novo)
+                novo.versao_anterior = atual.versao
+                contar("corpus.atualizacoes")
+        _CORPORA[chave] = novo
+    return novo
+
+
+if __name__ == "__main__":
+    # Uso: python corpus.py [arquivo.txt ...]  (padrão: todas as leis do diretório)
+    arquivos = sys.argv[1:] or sorted(
+        f for f in glob.glob("*.txt") if f != "requirements.txt"
+    )
+    for nome in arquivos:
+        destino = construir_indice(nome)
+        print(f"{nome} -> {destino}")
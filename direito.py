@@ -1,9 +1,13 @@
-streamlit run app.py
+# Para executar: streamlit run direito.py
 import streamlit as st
+import re
 import json
-import difflib
 from typing import List, Dict
 
+from corpus import obter_corpus
+from trigramas import IndiceTrigramas, LIMITE_SIMILARIDADE as LIMITE_TRIGRAMAS
+from vetores import ModeloVetorial, LIMITE_SIMILARIDADE as LIMITE_VETORIAL
+
 # =====================================================
 # SIMULAÇÃO DE BASE DE DADOS (você depois substituirá pela API real)
 # =====================================================
@@ -33,10 +37,89 @@ CODES = {
     }
 }
 
+# Textos reais das leis (arquivos .txt do repositório). Quando presentes,
+# substituem os dados simulados acima.
+CODIGOS_REAIS = [
+    ("Constituição Federal", "constituicao.txt", "Constituição da República Federativa do Brasil de 1988"),
+    ("Código Civil", "codigo_civil.txt", "Lei nº 10.406, de 10 de janeiro de 2002"),
+    ("Código Penal", "codigo_penal.txt", "Decreto-Lei nº 2.848, de 7 de dezembro de 1940"),
+    ("Código de Processo Civil", "codigo_processo_civil.txt", "Lei nº 13.105, de 16 de março de 2015"),
+    ("Código de Processo Penal", "codigo_processo_penal.txt", "Decreto-Lei nº 3.689, de 3 de outubro de 1941"),
+    ("Código de Defesa do Consumidor", "codigo_defesa_consumidor.txt", "Lei nº 8.078, de 11 de setembro de 1990"),
+    ("Código Tributário Nacional", "codigo_tributario_nacional.txt", "Lei nº 5.172, de 25 de outubro de 1966"),
+    ("Consolidação das Leis do Trabalho", "consolidacao_leis_trabalho.txt", "Decreto-Lei nº 5.452, de 1º de maio de 1943"),
+    ("Estatuto da Criança e do Adolescente", "estatuto_crianca_adolescente.txt", "Lei nº 8.069, de 13 de julho de 1990"),
+]
+
+# Complemento do número no início do texto do artigo (ex.: "º", "-A")
+PADRAO_COMPLEMENTO = re.compile(r'([º°])?((?:-[A-Z]+)*)\.?\s*')
+
 # =====================================================
 # FUNÇÕES AUXILIARES
 # =====================================================
 
+def versoes_codigos_reais() -> tuple:
+    """Versão do texto de cada arquivo disponível; muda quando algum arquivo é atualizado."""
+    versoes = []
+    for _, arquivo, _ in CODIGOS_REAIS:
+        try:
+            versoes.append(obter_corpus(arquivo).versao)
+        except FileNotFoundError:
+            versoes.append(None)
+    return tuple(versoes)
+
+
+@st.cache_resource
+def carregar_codigos_reais(versoes) -> Dict[str, Dict]:
+    """
+    Monta, no formato de CODES, os artigos dos arquivos .txt disponíveis.
+    `versoes` (de versoes_codigos_reais) só entra na chave do cache.
+    """
+    codigos = {}
+    for nome, arquivo, lei in CODIGOS_REAIS:
+        try:
+            corpus = obter_corpus(arquivo)
+        except FileNotFoundError:
+            continue
+
+        artigos = {}
+        for i in range(corpus.total):
+            texto = corpus.texto(i)
+            complemento = PADRAO_COMPLEMENTO.match(texto)
+            numero = corpus.numero(i).replace("Art.", "").strip().rstrip(".")
+            numero += (complemento.group(1) or "") + complemento.group(2)
+
+            # Números repetidos (ex.: ADCT) recebem um sufixo para não se sobrescreverem
+            chave, repeticao = numero, 1
+            while chave in artigos:
+                repeticao += 1
+                chave = f"{numero} ({repeticao})"
+            artigos[chave] = texto[complemento.end():]
+
+        codigos[nome] = {"Lei": lei, "Artigos": artigos}
+    return codigos
+
+
+@st.cache_resource
+def obter_indice_trigramas(nomes_codigos, versoes) -> IndiceTrigramas:
+    """Índice de trigramas de todos os artigos de CODES (um por versão dos textos)."""
+    return IndiceTrigramas(
+        ((codigo, artigo), texto)
+        for codigo in nomes_codigos
+        for artigo, texto in CODES[codigo]["Artigos"].items()
+    )
+
+
+@st.cache_resource
+def obter_modelo_vetorial(nomes_codigos, versoes) -> ModeloVetorial:
+    """Vetores TF-IDF/LSA de todos os artigos de CODES (um modelo por versão dos textos)."""
+    return ModeloVetorial(
+        ((codigo, artigo), texto)
+        for codigo in nomes_codigos
+        for artigo, texto in CODES[codigo]["Artigos"].items()
+    )
+
+
 def buscar_artigos(codigo: str, termo: str) -> Dict[str, str]:
     """Busca literal do termo no texto dos artigos."""
     artigos_encontrados = {}
@@ -47,17 +130,48 @@ def buscar_artigos(codigo: str, termo: str) -> Dict[str, str]:
     return artigos_encontrados
 
 
-def buscar_semelhantes(codigo: str, termo: str, limite=0.5) -> Dict[str, str]:
-    """Busca aproximada (semântica simples) com base em similaridade de strings."""
+def buscar_semelhantes(codigo: str, termo: str, limite=None, maximo=10) -> Dict[str, str]:
+    """
+    Artigos relacionados ao termo pelo modelo vetorial (TF-IDF/LSA). Se
+    nenhuma palavra do termo existe nos textos (ex.: erro de digitação), usa
+    a busca aproximada do índice de trigramas.
+    Só entram artigos com similaridade >= limite, qualquer que seja a busca
+    que respondeu; sem `limite`, vale o padrão de cada uma (LIMITE_VETORIAL
+    ou LIMITE_TRIGRAMAS), já que as escalas das duas similaridades diferem.
+    Retorna até `maximo` artigos que NÃO contêm o termo literalmente (esses
+    já aparecem na busca exata).
+    """
     artigos_semelhantes = {}
     termo_lower = termo.lower()
-    for artigo, texto in CODES[codigo]["Artigos"].items():
-        ratio = difflib.SequenceMatcher(None, termo_lower, texto.lower()).ratio()
-        if limite <= ratio < 1.0:
-            artigos_semelhantes[artigo] = texto
+    modelo = obter_modelo_vetorial(tuple(CODES), VERSOES_CODIGOS)
+    vetor = modelo.vetor_consulta(termo)
+    if len(vetor[0]):
+        # Folga para os artigos descartados abaixo por conterem o termo
+        candidatos = modelo.mais_similares(
+            vetor, 3 * maximo, LIMITE_VETORIAL if limite is None else limite,
+            filtro=lambda chave: chave[0] == codigo,
+        )
+    else:
+        indice = obter_indice_trigramas(tuple(CODES), VERSOES_CODIGOS)
+        candidatos = indice.buscar(
+            termo, LIMITE_TRIGRAMAS if limite is None else limite, filtro=lambda chave: chave[0] == codigo
+        )
+    for (_, artigo), _ in candidatos:
+        texto = CODES[codigo]["Artigos"][artigo]
+        if termo_lower in texto.lower():
+            continue
+        artigos_semelhantes[artigo] = texto
+        if len(artigos_semelhantes) >= maximo:
+            break
     return artigos_semelhantes
 
 
+def artigos_relacionados(codigo: str, artigo: str, maximo=3) -> List[tuple]:
+    """Pares (codigo, artigo) mais parecidos com o artigo, em qualquer código."""
+    modelo = obter_modelo_vetorial(tuple(CODES), VERSOES_CODIGOS)
+    return [chave for chave, _ in modelo.relacionados((codigo, artigo), maximo)]
+
+
 def gerar_citacao_abnt(codigo: str, artigo: str) -> str:
     """Gera referência ABNT automática."""
     base = CODES[codigo]["Lei"]
@@ -70,6 +184,10 @@ def gerar_citacao_abnt(codigo: str, artigo: str) -> str:
 
 st.set_page_config(page_title="LexFinder ⚖️", page_icon="⚖️", layout="wide")
 
+# Usa os textos reais das leis quando os arquivos estão disponíveis
+VERSOES_CODIGOS = versoes_codigos_reais()
+CODES.update(carregar_codigos_reais(VERSOES_CODIGOS))
+
 st.title("⚖️ LexFinder — Buscador Inteligente de Artigos Jurídicos")
 st.markdown("Pesquise por palavras-chave nos principais diplomas legais brasileiros.")
 
@@ -104,6 +222,9 @@ if botao and termo:
             for art, texto in artigos.items():
                 with st.expander(f"Art. {art}"):
                     st.write(texto)
+                    relacionados = artigos_relacionados(cod, art)
+                    if relacionados:
+                        st.caption("🔗 Relacionados: " + " · ".join(f"{c}, Art. {a}" for c, a in relacionados))
                     citacao = gerar_citacao_abnt(cod, art)
                     st.code(citacao, language="markdown")
 
@@ -125,4 +246,4 @@ else:
 # Rodapé
 st.markdown("---")
 st.markdown("👩‍💻 Desenvolvido por [Seu Grupo] — Projeto de Programação e Direito")
-st.markdown("📚 Fonte: Dados simulados. Futuras versões utilizarão API pública (ex: LexML).")
+st.markdown("📚 Fonte: textos das leis incluídos no projeto (dados simulados quando os arquivos não estão disponíveis). Futuras versões utilizarão API pública (ex: LexML).")
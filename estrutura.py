@@ -0,0 +1,359 @@
+import os
+import re
+import threading
+from array import array
+
+from corpus import obter_corpus, dividir_artigos, offsets_em_bytes, para_dobrado
+from indice import obter_indice
+from metricas import fase
+
+# =========================================================================
+# ÁRVORE ESTRUTURAL DA LEI (Parte/Livro/Título/Capítulo/Seção/Artigo/§/inciso)
+# =========================================================================
+#
+# A divisão por regex em artigos trata cada lei como uma lista plana. Aqui a
+# lei vira uma árvore, guardada de forma compacta: os nós ficam em arrays
+# paralelos (tipo, pai, offsets) na ordem do texto (pré-ordem), então a
+# subárvore de um nó é o intervalo contíguo [no, fim_subarvore[no]) e não
+# existe uma string por nó - o texto é lido sob demanda do corpus mapeado.
+#
+# Isso permite:
+#   - restringir a busca a uma subárvore ("só o Título II da CF"), tocando
+#     apenas os artigos daquele trecho;
+#   - apontar o resultado no menor fragmento que contém os termos (caput,
+#     parágrafo, inciso ou alínea), em vez do artigo inteiro;
+#   - distinguir os artigos do ADCT dos artigos do corpo da Constituição.
+
+LEI, PARTE, LIVRO, TITULO, CAPITULO, SECAO, SUBSECAO, ARTIGO, CAPUT, PARAGRAFO, INCISO, ALINEA = range(12)
+
+NOMES_TIPOS = {
+    LEI: "Lei", PARTE: "Parte", LIVRO: "Livro", TITULO: "Título", CAPITULO: "Capítulo",
+    SECAO: "Seção", SUBSECAO: "Subseção", ARTIGO: "Art.", CAPUT: "caput",
+    PARAGRAFO: "§", INCISO: "inciso", ALINEA: "alínea",
+}
+
+# Nível hierárquico de cada tipo (um nó novo fecha os abertos de nível >= ao seu)
+NIVEL = {
+    LEI: 0, PARTE: 1, LIVRO: 2, TITULO: 3, CAPITULO: 4, SECAO: 5, SUBSECAO: 6,
+    ARTIGO: 7, CAPUT: 8, PARAGRAFO: 8, INCISO: 9, ALINEA: 10,
+}
+
+TIPOS_CABECALHO = {
+    "parte": PARTE, "livro": LIVRO, "título": TITULO, "capítulo": CAPITULO,
+    "seção": SECAO, "subseção": SUBSECAO,
+}
+
+# Cabeçalho em linha própria, ex.: "TÍTULO II", "Seção I", "CAPÍTULO II-A",
+# "PARTE ESPECIAL", "LIVRO PRIMEIRO" ou, no Código Civil, "P A R T E    G E R A L"
+PADRAO_CABECALHO = re.compile(
+    r'^[ \t]*(parte|p a r t e|livro|título|capítulo|subseção|seção)[ \t]*'
+    r'([IVXLCDM]+(?:-[A-Z])?|únic[oa]|geral|g e r a l|especial|e s p e c i a l|complementar'
+    r'|primeir[oa]|segund[oa]|terceir[oa]|quart[oa]|quint[oa]|sext[oa]|sétim[oa]|oitav[oa]|non[oa]|décim[oa])[ \t]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+PADRAO_ROMANO = re.compile(r'[IVXLCDM]+(?:-[A-Z])?')
+PADRAO_ADCT = re.compile(r'^[ \t]*ATO DAS DISPOSIÇÕES CONSTITUCIONAIS TRANSITÓRIAS[ \t]*$', re.MULTILINE)
+
+# Fragmentos dentro do artigo (início de linha)
+PADRAO_PARAGRAFO = re.compile(r'^[ \t]*(§[ \t]*\d+[º°o]?(?:-[A-Z])?|Parágrafo único)', re.MULTILINE)
+PADRAO_INCISO = re.compile(r'^[ \t]*([IVXLCDM]+(?:-[A-Z])?)[ \t]*[-–—]', re.MULTILINE)
+PADRAO_ALINEA = re.compile(r'^[ \t]*([a-z])\)', re.MULTILINE)
+
+
+class No:
+    """Visão leve de um nó da árvore (não guarda texto)."""
+
+    __slots__ = ("estrutura", "id")
+
+    def __init__(self, estrutura, id_no):
+        self.estrutura = estrutura
+        self.id = id_no
+
+    @property
+    def tipo(self):
+        return self.estrutura.tipos[self.id]
+
+    @property
+    def pai(self):
+        pai = self.estrutura.pais[self.id]
+        return No(self.estrutura, pai) if pai >= 0 else None
+
+    @property
+    def rotulo(self):
+        """Identificação do nó, ex.: 'Título II', 'Art. 5', '§ 1º', 'inciso III'."""
+        return self.estrutura.rotulo(self.id)
+
+    @property
+    def artigo(self):
+        """Índice do artigo no corpus (-1 para nós acima de artigo)."""
+        return self.estrutura.artigos[self.id]
+
+    def texto(self):
+        return self.estrutura.texto(self.id)
+
+    def caminho(self):
+        """Rótulos da raiz (exclusive) até este nó, ex.: ['Título II', 'Capítulo I', 'Art. 5', 'inciso III']."""
+        return self.estrutura.caminho(self.id)
+
+    def __repr__(self):
+        return f"No({' > '.join(self.caminho())})"
+
+
+class EstruturaLei:
+    """Árvore estrutural de uma lei, com nós em arrays paralelos."""
+
+    __slots__ = (
+        "corpus", "tipos", "pais", "inicios", "fins", "rotulo_inicios", "rotulo_fins",
+        "fim_subarvore", "artigos", "nos_artigos",
+    )
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        conteudo = corpus.conteudo()
+
+        # Eventos (offset, tipo, rotulo_ini, rotulo_fim, artigo), em ordem do texto
+        eventos = []
+        for m in PADRAO_CABECALHO.finditer(conteudo):
+            tipo = TIPOS_CABECALHO[m.group(1).lower().replace(" ", "")]
+            eventos.append((m.start(1), tipo, m.start(2), m.end(2), -1))
+        for m in PADRAO_ADCT.finditer(conteudo):
+            eventos.append((m.start(), PARTE, m.start(), m.end(), -1))
+
+        artigos = dividir_artigos(conteudo)
+        fins_artigos = []
+        for i, (numero_ini, numero_fim, texto_ini, texto_fim) in enumerate(artigos):
+            eventos.append((numero_ini, ARTIGO, numero_ini, numero_fim, i))
+            eventos.append((texto_ini, CAPUT, texto_ini, texto_ini, i))
+            fins_artigos.append(texto_fim)
+            for padrao, tipo in ((PADRAO_PARAGRAFO, PARAGRAFO), (PADRAO_INCISO, INCISO), (PADRAO_ALINEA, ALINEA)):
+                for m in padrao.finditer(conteudo, texto_ini, texto_fim):
+                    eventos.append((m.start(1), tipo, m.start(1), m.end(1), i))
+        eventos.sort(key=lambda e: (e[0], NIVEL[e[1]]))
+
+        self.tipos = array('B', [LEI])
+        self.pais = array('i', [-1])
+        inicios = [0]
+        fins = [len(conteudo)]
+        rotulos = [(0, 0)]
+        self.artigos = array('i', [-1])
+
+        pilha = [0]
+        for offset, tipo, rotulo_ini, rotulo_fim, artigo in eventos:
+            # Fragmentos só existem dentro de um artigo aberto
+            if NIVEL[tipo] > NIVEL[ARTIGO] and not any(self.tipos[n] == ARTIGO for n in pilha):
+                continue
+            # Cabeçalho repetido logo em seguida (ex.: "TÍTULO IV" duas vezes): mantém um só
+            ultimo = len(self.tipos) - 1
+            if (tipo < ARTIGO and pilha[-1] == ultimo and self.tipos[ultimo] == tipo
+                    and conteudo[slice(*rotulos[ultimo])].upper() == conteudo[rotulo_ini:rotulo_fim].upper()):
+                continue
+            # Fecha os nós de nível maior ou igual ao do novo nó
+            while len(pilha) > 1 and NIVEL[self.tipos[pilha[-1]]] >= NIVEL[tipo]:
+                fins[pilha.pop()] = offset
+            id_no = len(self.tipos)
+            self.tipos.append(tipo)
+            self.pais.append(pilha[-1])
+            inicios.append(offset)
+            # Um artigo termina no fim do seu texto (antes de cabeçalhos seguintes)
+            fins.append(fins_artigos[artigo] if artigo >= 0 else len(conteudo))
+            rotulos.append((rotulo_ini, rotulo_fim))
+            self.artigos.append(artigo)
+            pilha.append(id_no)
+        while len(pilha) > 1:
+            no = pilha.pop()
+            fins[no] = min(fins[no], len(conteudo))
+
+        # Fragmentos não passam do fim do seu artigo
+        for no in range(1, len(self.tipos)):
+            if self.artigos[no] >= 0:
+                fins[no] = min(fins[no], fins_artigos[self.artigos[no]])
+            fins[no] = max(fins[no], inicios[no])
+
+        # Offsets em bytes (compatíveis com o corpus mapeado em memória)
+        posicoes = inicios + fins + [p for par in rotulos for p in par]
+        em_bytes = offsets_em_bytes(conteudo, posicoes)
+        self.inicios = array('I', (em_bytes[p] for p in inicios))
+        self.fins = array('I', (em_bytes[p] for p in fins))
+        self.rotulo_inicios = array('I', (em_bytes[a] for a, _ in rotulos))
+        self.rotulo_fins = array('I', (em_bytes[b] for _, b in rotulos))
+
+        # Nó ARTIGO de cada índice de artigo do corpus
+        self.nos_artigos = array('I', bytes(4 * len(artigos)))
+        for no in range(len(self.tipos)):
+            if self.tipos[no] == ARTIGO:
+                self.nos_artigos[self.artigos[no]] = no
+
+        # Fim (exclusivo) da subárvore de cada nó, na numeração em pré-ordem
+        self.fim_subarvore = array('I', range(1, len(self.tipos) + 1))
+        for no in range(len(self.tipos) - 1, 0, -1):
+            pai = self.pais[no]
+            if self.fim_subarvore[no] > self.fim_subarvore[pai]:
+                self.fim_subarvore[pai] = self.fim_subarvore[no]
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def no(self, id_no):
+        return No(self, id_no)
+
+    def raiz(self):
+        return No(self, 0)
+
+    def filhos(self, id_no):
+        """Ids dos filhos diretos de um nó."""
+        filho = id_no + 1
+        fim = self.fim_subarvore[id_no]
+        resultado = []
+        while filho < fim:
+            resultado.append(filho)
+            filho = self.fim_subarvore[filho]
+        return resultado
+
+    def texto(self, id_no):
+        return self.corpus.trecho(self.inicios[id_no], self.fins[id_no])
+
+    def rotulo(self, id_no):
+        tipo = self.tipos[id_no]
+        if tipo == LEI:
+            return self.corpus.sigla or self.corpus.nome_arquivo
+        if tipo == CAPUT:
+            return "caput"
+        bruto = self.corpus.trecho(self.rotulo_inicios[id_no], self.rotulo_fins[id_no]).strip()
+        if tipo == PARTE and bruto.upper().startswith("ATO DAS"):
+            return "ADCT"
+        if tipo in (PARTE, LIVRO, TITULO, CAPITULO, SECAO, SUBSECAO):
+            identificador = bruto.replace(" ", "")
+            if not PADRAO_ROMANO.fullmatch(identificador):
+                identificador = identificador.capitalize()
+            return f"{NOMES_TIPOS[tipo]} {identificador}"
+        if tipo == INCISO:
+            return f"inciso {bruto}"
+        if tipo == ALINEA:
+            return f"alínea {bruto}"
+        return bruto.rstrip(".")
+
+    def caminho(self, id_no):
+        """Rótulos da raiz (exclusive) até o nó; o caput só aparece quando é o próprio nó."""
+        rotulos = [self.rotulo(id_no)] if id_no > 0 else []
+        id_no = self.pais[id_no]
+        while id_no > 0:
+            if self.tipos[id_no] != CAPUT:
+                rotulos.append(self.rotulo(id_no))
+            id_no = self.pais[id_no]
+        return rotulos[::-1]
+
+    def intervalo_artigos(self, id_no):
+        """Intervalo [inicio, fim) dos índices de artigos do corpus dentro da subárvore."""
+        primeiro = ultimo = None
+        for no in range(id_no, self.fim_subarvore[id_no]):
+            if self.tipos[no] == ARTIGO:
+                if primeiro is None:
+                    primeiro = self.artigos[no]
+                ultimo = self.artigos[no]
+        if primeiro is None:
+            return (0, 0)
+        return (primeiro, ultimo + 1)
+
+    def no_do_artigo(self, artigo):
+        """Id do nó ARTIGO correspondente ao índice de artigo do corpus."""
+        return self.nos_artigos[artigo]
+
+    def divisoes(self, nivel_maximo=CAPITULO):
+        """
+        Nós de divisão (Parte...nivel_maximo) com o caminho, para escolha de escopo.
+        Divisões sem artigos (ex.: cabeçalhos repetidos) são omitidas.
+        """
+        resultado = []
+        for no in range(1, len(self.tipos)):
+            tipo = self.tipos[no]
+            if PARTE <= tipo <= nivel_maximo and self.intervalo_artigos(no) != (0, 0):
+                resultado.append((no, " › ".join(self.caminho(no))))
+        return resultado
+
+    # ---------------------------------------------------------------------
+    # Busca por escopo e por fragmento
+    # ---------------------------------------------------------------------
+
+    def buscar(self, termos, id_escopo=0):
+        """
+        Busca os termos (minúsculos, lógica AND) apenas nos artigos da
+        subárvore `id_escopo`, e retorna os ids dos MENORES fragmentos
+        (caput/§/inciso/alínea, ou o artigo inteiro se os termos estiverem
+        espalhados) que contêm todos os termos, em ordem do texto.
+        """
+        inicio, fim = self.intervalo_artigos(id_escopo)
+        if inicio == fim:
+            return []
+        artigos = set(obter_indice(self.corpus.nome_arquivo).buscar(termos, (inicio, fim)))
+        if not artigos:
+            return []
+
+        fragmentos = []
+        for artigo in sorted(artigos):
+            fragmentos.extend(self._menores_fragmentos(self.nos_artigos[artigo], termos))
+        return fragmentos
+
+    def buscar_expressao(self, expressao, id_escopo=0):
+        """
+        Como `buscar`, para consultas com operadores (ver
+        consultas.analisar_consulta): OR, NOT e NEAR não se decompõem em
+        trechos, então cada artigo encontrado volta inteiro.
+        """
+        inicio, fim = self.intervalo_artigos(id_escopo)
+        if inicio == fim:
+            return []
+        artigos = obter_indice(self.corpus.nome_arquivo).avaliar(expressao, (inicio, fim))
+        return [self.nos_artigos[artigo] for artigo in artigos]
+
+    def _menores_fragmentos(self, id_artigo, termos):
+        """Nós do artigo que contêm todos os termos (já dobrados) e cujos filhos não contêm (o artigo, no mínimo)."""
+        # Usa o texto dobrado do artigo já guardado no corpus: cada nó é
+        # testado com find() no seu intervalo, levado do texto original para
+        # o dobrado pelo mapa de posições.
+        artigo = self.artigos[id_artigo]
+        dobrado = self.corpus.texto_dobrado(artigo)
+        mapa = self.corpus.mapa_dobrado(artigo)
+        _, _, base, fim_texto = self.corpus.offsets(artigo)
+
+        def posicao(offset):
+            # Offset em bytes do nó -> posição no texto dobrado (o número do artigo fica de fora)
+            offset = min(max(offset, base), fim_texto)
+            return para_dobrado(mapa, len(self.corpus.trecho(base, offset)))
+
+        def contem(no):
+            inicio, fim = posicao(self.inicios[no]), posicao(self.fins[no])
+            return all(dobrado.find(termo, inicio, fim) != -1 for termo in termos)
+
+        def menores(no):
+            encontrados = []
+            for filho in self.filhos(no):
+                if contem(filho):
+                    encontrados.extend(menores(filho))
+            return encontrados or [no]
+
+        return menores(id_artigo)
+
+
+# =========================================================================
+# REGISTRO COMPARTILHADO
+# =========================================================================
+
+_ESTRUTURAS = {}
+_TRAVA = threading.Lock()
+
+
+def obter_estrutura(nome_arquivo, sigla_lei=""):
+    """Árvore estrutural da lei, construída uma vez por versão do texto."""
+    corpus = obter_corpus(nome_arquivo, sigla_lei)
+    chave = os.path.abspath(nome_arquivo)
+    estrutura = _ESTRUTURAS.get(chave)
+    if estrutura is not None and estrutura.corpus is corpus:
+        return estrutura
+
+    with _TRAVA:
+        estrutura = _ESTRUTURAS.get(chave)
+        if estrutura is None or estrutura.corpus is not corpus:
+            with fase("estrutura.construcao"):
+                estrutura = EstruturaLei(corpus)
+            _ESTRUTURAS[chave] = estrutura
+    return estrutura
@@ -0,0 +1,160 @@
+import time
+import asyncio
+import threading
+
+from google.genai.errors import APIError
+
+from limitador import obter_limitador
+from metricas import registrar_fase, contar, propagar_corrotina
+
+# =========================================================================
+# EXPLICAÇÕES POR IA (GEMINI) - CONCORRENTES E EM STREAMING
+# =========================================================================
+#
+# Cada artigo selecionado é explicado em uma corrotina própria: as chamadas
+# acontecem ao mesmo tempo, o texto chega em pedaços (streaming) e o backoff
+# entre tentativas usa asyncio.sleep, então uma chamada lenta ou em espera
+# não bloqueia as demais.
+#
+# Nenhuma função daqui usa o Streamlit: a página recebe o texto parcial e os
+# avisos por meio de callbacks.
+#
+# Todas as corrotinas rodam em um único laço asyncio do processo (em uma
+# thread de fundo), de modo que o cliente Gemini e suas conexões HTTP são
+# reutilizados entre cliques e sessões, e toda tentativa passa pelo
+# limitador de taxa global (ver limitador.py).
+
+MODELO = 'gemini-2.5-flash'
+# Incrementar sempre que o prompt mudar: invalida as explicações em cache
+VERSAO_PROMPT = 1
+
+MAX_RETRIES = 5
+ATRASO_INICIAL = 1  # segundos
+
+MENSAGEM_FALHA_API = "Não foi possível gerar a explicação. Tente novamente mais tarde."
+MENSAGEM_ERRO_DESCONHECIDO = "Erro desconhecido ao processar a requisição."
+MENSAGEM_FALHA_TOTAL = "Falha total na comunicação com a API."
+# Respostas que indicam falha (não devem ir para o cache)
+MENSAGENS_FALHA = (MENSAGEM_FALHA_API, MENSAGEM_ERRO_DESCONHECIDO, MENSAGEM_FALHA_TOTAL)
+
+# System Instruction incorporada ao prompt para garantir a compatibilidade com o SDK
+SYSTEM_INSTRUCTION = (
+    "INSTRUÇÃO DE ROLEPLAY: Você é um tutor jurídico prestativo. Sua tarefa é simplificar textos legais "
+    "complexos (artigos de lei) para que sejam compreendidos por leigos. "
+    "Sua resposta deve ser escrita em linguagem clara, acessível e objetiva, "
+    "evitando jargões desnecessários, mantendo a fidelidade ao sentido legal."
+)
+
+
+def montar_prompt(artigo_completo):
+    """Prompt enviado ao modelo para explicar um artigo."""
+    return (
+        f"{SYSTEM_INSTRUCTION}\n\n"
+        "Com base no seu roleplay, por favor, analise o seguinte artigo de lei e forneça uma explicação "
+        "com linguagem simples e acessível. Mantenha o tom de um tutor amigo. "
+        f"Artigo: \n\n{artigo_completo}"
+    )
+
+
+def _ignorar(*_):
+    pass
+
+
+async def explicar_em_streaming(client, artigo_completo, ao_receber=_ignorar, ao_avisar=_ignorar, ao_errar=_ignorar,
+                                limitador=None):
+    """
+    Gera a explicação de um artigo em streaming, com Exponential Backoff.
+    Cada tentativa aguarda a sua vez no limitador de taxa global.
+
+    ao_receber(texto_acumulado): chamado a cada pedaço recebido;
+    ao_avisar(mensagem) / ao_errar(mensagem): avisos de nova tentativa e erros.
+    Se uma tentativa falhar no meio do streaming, o texto recomeça do zero.
+    Retorna o texto final (ou a mensagem de falha).
+    """
+    prompt = montar_prompt(artigo_completo)
+    limitador = limitador or obter_limitador()
+    delay = ATRASO_INICIAL
+
+    for attempt in range(MAX_RETRIES):
+        partes = []
+        contar("ia.tentativas")
+        inicio = time.perf_counter()
+        try:
+            espera = await limitador.aguardar_async()
+            registrar_fase("ia.espera_limitador", espera)
+            inicio = time.perf_counter()
+            resposta = await client.aio.models.generate_content_stream(model=MODELO, contents=prompt)
+            async for pedaco in resposta:
+                if pedaco.text:
+                    partes.append(pedaco.text)
+                    ao_receber("".join(partes))
+            registrar_fase("ia.chamada", time.perf_counter() - inicio)
+            return "".join(partes)
+        except APIError as e:
+            registrar_fase("ia.chamada", time.perf_counter() - inicio)
+            contar("ia.erros_api")
+            if attempt < MAX_RETRIES - 1:
+                ao_avisar(f"Erro na API (Tentativa {attempt + 1}/{MAX_RETRIES}). Tentando novamente em {delay}s...")
+                contar("ia.backoff_segundos", delay)
+                await asyncio.sleep(delay)  # não bloqueia as outras explicações
+                delay *= 2  # Aumenta o atraso
+            else:
+                ao_errar(f"Falha ao gerar explicação após {MAX_RETRIES} tentativas. Erro final: {e}")
+                return MENSAGEM_FALHA_API
+        except Exception as e:
+            ao_errar(f"Erro inesperado durante a chamada da API: {e}")
+            return MENSAGEM_ERRO_DESCONHECIDO
+    return MENSAGEM_FALHA_TOTAL
+
+
+async def explicar_artigos(client, artigos, ao_receber=_ignorar, ao_avisar=_ignorar, ao_errar=_ignorar,
+                           limitador=None):
+    """
+    Explica vários artigos ao mesmo tempo. Os callbacks recebem o índice do
+    artigo como primeiro argumento. Retorna as explicações na ordem de `artigos`.
+    `limitador`: ver explicar_em_streaming (padrão: o limitador global).
+    """
+    return await asyncio.gather(*(
+        explicar_em_streaming(
+            client,
+            artigo,
+            lambda texto, i=i: ao_receber(i, texto),
+            lambda mensagem, i=i: ao_avisar(i, mensagem),
+            lambda mensagem, i=i: ao_errar(i, mensagem),
+            limitador,
+        )
+        for i, artigo in enumerate(artigos)
+    ))
+
+
+# =========================================================================
+# LAÇO ASYNCIO COMPARTILHADO
+# =========================================================================
+
+class LacoCompartilhado:
+    """Laço asyncio rodando em uma thread de fundo, aceitando corrotinas de qualquer thread."""
+
+    def __init__(self):
+        self.laco = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.laco.run_forever, name="laco_ia", daemon=True)
+        self._thread.start()
+
+    def enviar(self, corrotina):
+        """
+        Agenda a corrotina no laço e retorna um concurrent.futures.Future.
+        As métricas medidas nela vão para a coleta de quem a enviou (ver metricas.py).
+        """
+        return asyncio.run_coroutine_threadsafe(propagar_corrotina(corrotina), self.laco)
+
+
+_LACO = None
+_TRAVA_LACO = threading.Lock()
+
+
+def obter_laco():
+    """Laço único do processo."""
+    global _LACO
+    with _TRAVA_LACO:
+        if _LACO is None:
+            _LACO = LacoCompartilhado()
+    return _LACO
@@ -0,0 +1,547 @@
+import os
+import re
+import sys
+import glob
+import bisect
+import random
+import threading
+from array import array
+from collections import OrderedDict
+
+from corpus import obter_corpus, dobrar
+from metricas import fase
+
+# =========================================================================
+# ÍNDICE INVERTIDO COM POSIÇÕES
+# =========================================================================
+#
+# Para cada lei, cada token (sequência de caracteres \w do texto dobrado,
+# em minúsculas e sem acentos, ver corpus.dobrar) aponta para a lista de artigos onde aparece e, em cada artigo,
+# para as posições (ordinais) do token. A busca continua com a semântica de
+# SUBSTRING do buscador original: o índice apenas produz um conjunto de
+# candidatos que é garantidamente um SUPERCONJUNTO da resposta, e cada
+# candidato é confirmado com uma busca literal no texto mapeado em memória.
+#
+# Por que o superconjunto é garantido: se um termo da consulta aparece como
+# substring de um artigo, os tokens da consulta aparecem no artigo em posições
+# CONSECUTIVAS, e cada token da consulta é
+#   - igual ao token do artigo, se estiver cercado por não-\w na consulta;
+#   - prefixo do token do artigo, se só houver não-\w à esquerda;
+#   - sufixo do token do artigo, se só houver não-\w à direita;
+#   - substring do token do artigo, caso contrário.
+
+PADRAO_TOKEN = re.compile(r'\w+')
+
+# Acima desta fração de artigos candidatos, varrer o texto mapeado é mais
+# barato do que unir listas de posições.
+FRACAO_MAXIMA_CANDIDATOS = 0.25
+
+# Contagem de ocorrências (tf do BM25, ver ranking.py): acima de tantas
+# entradas de listas de posições por artigo pedido, contar no texto é mais
+# barato. Termos com pontuação também são contados no texto.
+FATOR_MAXIMO_POSTINGS = 4
+PADRAO_PONTUACAO = re.compile(r'[^\w\s]')
+
+# Expansões de tokens da consulta guardadas por índice (LRU, como o cache de
+# consultas em consultas.py): cada token distinto digitado gera uma entrada.
+TAMANHO_CACHE_EXPANSOES = 2048
+
+
+class IndiceInvertido:
+    """Índice invertido posicional sobre os artigos de um CorpusLei."""
+
+    def __init__(self, corpus, anterior=None):
+        """
+        Com `anterior` (índice da versão anterior da mesma lei, ver
+        corpus.mapa_anterior), só os artigos novos ou alterados são
+        tokenizados; as listas dos demais são reaproveitadas.
+        """
+        self.corpus = corpus
+        self.total = corpus.total
+
+        if anterior is None:
+            reaproveitados = array('i', [-1]) * corpus.total
+        else:
+            reaproveitados = corpus.mapa_anterior
+
+        # Número de tokens de cada artigo (usado na normalização do BM25)
+        self.comprimentos = array('I')
+        acumulado = {}
+        for doc in range(corpus.total):
+            if reaproveitados[doc] >= 0:
+                self.comprimentos.append(anterior.comprimentos[reaproveitados[doc]])
+                continue
+            pos = -1
+            for pos, m in enumerate(PADRAO_TOKEN.finditer(corpus.texto_dobrado(doc))):
+                token = m.group()
+                entrada = acumulado.get(token)
+                if entrada is None:
+                    entrada = acumulado[token] = ([], [])
+                docs, posicoes = entrada
+                if not docs or docs[-1] != doc:
+                    docs.append(doc)
+                    posicoes.append([])
+                posicoes[-1].append(pos)
+            self.comprimentos.append(pos + 1)
+        self.comprimento_medio = sum(self.comprimentos) / self.total if self.total else 0.0
+
+        # token -> (docs, inicios, posicoes): as posições do k-ésimo documento
+        # ficam em posicoes[inicios[k]:inicios[k + 1]]
+        self._postings = {}
+        if anterior is not None:
+            self._reaproveitar_postings(anterior, reaproveitados)
+        for token, (docs, listas) in acumulado.items():
+            existente = self._postings.get(token)
+            if existente is not None:
+                # Junta as listas reaproveitadas com as dos artigos reindexados
+                antigos_docs, antigos_inicios, antigas_planas = existente
+                for k, doc in enumerate(antigos_docs):
+                    docs.append(doc)
+                    listas.append(antigas_planas[antigos_inicios[k]:antigos_inicios[k + 1]])
+                ordem = sorted(range(len(docs)), key=docs.__getitem__)
+                docs = [docs[k] for k in ordem]
+                listas = [listas[k] for k in ordem]
+            inicios = array('I', [0])
+            planas = array('I')
+            for lista in listas:
+                planas.extend(lista)
+                inicios.append(len(planas))
+            self._postings[token] = (array('I', docs), inicios, planas)
+
+        # Dicionário ordenado (prefixos por busca binária), também concatenado
+        # para buscas de sufixo e substring com str.find()
+        self.termos = sorted(self._postings)
+        self._dicionario = "\n" + "\n".join(self.termos) + "\n"
+        self._inicio_termo = array('I')
+        cursor = 1
+        for termo in self.termos:
+            self._inicio_termo.append(cursor)
+            cursor += len(termo) + 1
+
+        self._cache_expansao = OrderedDict()
+        self._trava = threading.Lock()
+
+    def _reaproveitar_postings(self, anterior, reaproveitados):
+        """Copia as listas do índice anterior, renumerando os artigos inalterados."""
+        novo_de_antigo = array('i', [-1]) * anterior.total
+        for doc, antigo in enumerate(reaproveitados):
+            if antigo >= 0:
+                novo_de_antigo[antigo] = doc
+
+        for token, (docs, inicios, planas) in anterior._postings.items():
+            novos = [novo_de_antigo[doc] for doc in docs]
+            if -1 not in novos:
+                # Nenhum artigo removido/alterado: posições reaproveitadas sem cópia
+                self._postings[token] = (array('I', novos), inicios, planas)
+                continue
+            mantidos = [k for k, doc in enumerate(novos) if doc >= 0]
+            if not mantidos:
+                continue
+            novos_inicios = array('I', [0])
+            novas_planas = array('I')
+            for k in mantidos:
+                novas_planas.extend(planas[inicios[k]:inicios[k + 1]])
+                novos_inicios.append(len(novas_planas))
+            self._postings[token] = (array('I', (novos[k] for k in mantidos)), novos_inicios, novas_planas)
+
+    # ---------------------------------------------------------------------
+    # Dicionário de termos
+    # ---------------------------------------------------------------------
+
+    def _expansao_em_cache(self, chave):
+        """Valor guardado para a chave (marcado como recente), ou None."""
+        with self._trava:
+            valor = self._cache_expansao.get(chave)
+            if valor is not None:
+                self._cache_expansao.move_to_end(chave)
+            return valor
+
+    def _guardar_expansao(self, chave, valor):
+        """Guarda o valor e descarta os menos recentes acima de TAMANHO_CACHE_EXPANSOES."""
+        with self._trava:
+            self._cache_expansao[chave] = valor
+            self._cache_expansao.move_to_end(chave)
+            while len(self._cache_expansao) > TAMANHO_CACHE_EXPANSOES:
+                self._cache_expansao.popitem(last=False)
+
+    def expandir(self, token, prefixo_fixo, sufixo_fixo):
+        """
+        Termos do dicionário compatíveis com um token da consulta.
+        prefixo_fixo: o token do artigo deve COMEÇAR com `token`;
+        sufixo_fixo: o token do artigo deve TERMINAR com `token`.
+        """
+        chave = (token, prefixo_fixo, sufixo_fixo)
+        termos = self._expansao_em_cache(chave)
+        if termos is not None:
+            return termos
+
+        if prefixo_fixo and sufixo_fixo:
+            termos = (token,) if token in self._postings else ()
+        elif prefixo_fixo:
+            # Prefixo: faixa contígua do dicionário ordenado (busca binária)
+            inicio = bisect.bisect_left(self.termos, token)
+            fim = bisect.bisect_left(self.termos, token + "\U0010ffff", inicio)
+            termos = tuple(self.termos[inicio:fim])
+        else:
+            agulha = token + ("\n" if sufixo_fixo else "")
+            encontrados = []
+            pos = self._dicionario.find(agulha)
+            while pos != -1:
+                # Índice do termo que contém a posição encontrada
+                i = bisect.bisect_right(self._inicio_termo, pos) - 1
+                encontrados.append(self.termos[i])
+                # Continua a partir do termo seguinte
+                proximo = self._inicio_termo[i + 1] if i + 1 < len(self.termos) else len(self._dicionario)
+                pos = self._dicionario.find(agulha, proximo)
+            termos = tuple(encontrados)
+
+        self._guardar_expansao(chave, termos)
+        return termos
+
+    def frequencia(self, termo):
+        """Número de artigos em que o termo do dicionário aparece."""
+        entrada = self._postings.get(termo)
+        return len(entrada[0]) if entrada else 0
+
+    def posicoes(self, termo, doc):
+        """Posições do termo no artigo `doc` (vazio se não aparecer)."""
+        entrada = self._postings.get(termo)
+        if entrada is None:
+            return ()
+        docs, inicios, planas = entrada
+        k = bisect.bisect_left(docs, doc)
+        if k == len(docs) or docs[k] != doc:
+            return ()
+        return planas[inicios[k]:inicios[k + 1]]
+
+    def contagens(self, termo, docs):
+        """
+        Ocorrências do termo (já dobrado) em cada artigo de `docs`, tiradas
+        das listas de posições, sem reler o texto: {doc: ocorrências}. Um
+        termo de vários tokens conta uma vez por posição em que eles
+        aparecem consecutivos.
+        Retorna None quando as listas de posições não servem e é melhor
+        contar no texto: termo com pontuação (ex.: "§ 1º" ou "art. 5", que
+        as posições não distinguem de "1º" e "art 5") ou tão comum que
+        percorrer as listas de todas as expansões sairia mais caro do que
+        varrer os artigos (ex.: "a").
+        """
+        tokens = self._tokens_consulta(termo)
+        if not tokens or PADRAO_PONTUACAO.search(termo):
+            return None
+        if min(estimativa for _, estimativa in tokens) > FATOR_MAXIMO_POSTINGS * len(docs):
+            return None
+
+        contagens = dict.fromkeys(docs, 0)
+        if len(tokens) > 1:
+            ordem = sorted(range(len(tokens)), key=lambda j: tokens[j][1])
+            for doc in contagens:
+                contagens[doc] = len(self._inicios(tokens, doc, ordem))
+            return contagens
+        # Um token: soma o tamanho das listas de posições de cada expansão
+        for expansao in tokens[0][0]:
+            docs_termo, inicios, _ = self._postings[expansao]
+            for k, doc in enumerate(docs_termo):
+                if doc in contagens:
+                    contagens[doc] += inicios[k + 1] - inicios[k]
+        return contagens
+
+    def documentos(self, termo):
+        entrada = self._postings.get(termo)
+        return entrada[0] if entrada else ()
+
+    # ---------------------------------------------------------------------
+    # Busca
+    # ---------------------------------------------------------------------
+
+    def _tokens_consulta(self, termo):
+        """Lista de (expansões, frequência estimada) para cada token do termo."""
+        chave = ("termo", termo)
+        tokens = self._expansao_em_cache(chave)
+        if tokens is not None:
+            return tokens
+        tokens = []
+        for m in PADRAO_TOKEN.finditer(termo):
+            expansoes = self.expandir(m.group(), m.start() > 0, m.end() < len(termo))
+            estimativa = sum(self.frequencia(t) for t in expansoes)
+            tokens.append((expansoes, estimativa))
+        self._guardar_expansao(chave, tokens)
+        return tokens
+
+    def _candidatos_termo(self, tokens, restricao):
+        """
+        Artigos (ordenados) onde os tokens aparecem em posições consecutivas,
+        opcionalmente restritos ao conjunto `restricao`.
+        """
+        # Começa pelo token mais raro
+        ordem = sorted(range(len(tokens)), key=lambda j: tokens[j][1])
+        mais_raro = ordem[0]
+
+        docs = set()
+        for termo in tokens[mais_raro][0]:
+            docs.update(self.documentos(termo))
+        if restricao is not None:
+            docs &= restricao
+        if len(tokens) == 1:
+            return docs
+
+        return {doc for doc in docs if self._inicios(tokens, doc, ordem)}
+
+    def _inicios(self, tokens, doc, ordem=None):
+        """Posições do artigo onde os tokens aparecem consecutivos (conjunto, talvez vazio)."""
+        inicios = None
+        for j in ordem or range(len(tokens)):
+            deslocados = set()
+            for termo in tokens[j][0]:
+                deslocados.update(p - j for p in self.posicoes(termo, doc))
+            inicios = deslocados if inicios is None else inicios & deslocados
+            if not inicios:
+                break
+        return inicios or set()
+
+    def buscar(self, termos, intervalo=None):
+        """
+        Índices (em ordem do arquivo) dos artigos que contêm TODOS os termos
+        (já dobrados, ver corpus.dobrar), com a mesma semântica de substring
+        de `termo in dobrar(texto_do_artigo)`.
+
+        `intervalo` = (inicio, fim) restringe a busca aos artigos desse
+        trecho da lei (ex.: um Título ou Capítulo, ver estrutura.py).
+        """
+        if not termos:
+            return []
+
+        limite = FRACAO_MAXIMA_CANDIDATOS * self.total
+        planos = []
+        sem_indice = []
+        for termo in termos:
+            tokens = self._tokens_consulta(termo)
+            if not tokens:
+                # Termo sem nenhum caractere \w (ex.: "§"): só por varredura
+                sem_indice.append(termo)
+                continue
+            estimativa = min(est for _, est in tokens)
+            if estimativa == 0:
+                return []
+            planos.append((estimativa, termo, tokens))
+
+        # Interseção das listas, começando pelo termo mais raro
+        planos.sort(key=lambda plano: plano[0])
+        candidatos = None if intervalo is None else set(range(*intervalo))
+        varrer = list(sem_indice)
+        for estimativa, termo, tokens in planos:
+            if estimativa > limite:
+                varrer.append(termo)
+                continue
+            candidatos = self._candidatos_termo(tokens, candidatos)
+            if not candidatos:
+                return []
+
+        if candidatos is None:
+            # Nenhum termo seletivo: varredura direta no texto mapeado
+            return self.corpus.buscar(termos)
+        if intervalo is not None and len(candidatos) == intervalo[1] - intervalo[0]:
+            # Nenhum termo seletivo dentro do trecho: varre só o trecho
+            return self.corpus.filtrar(range(*intervalo), termos)
+
+        # Confirmação literal (substring) de todos os termos nos candidatos
+        return self.corpus.filtrar(sorted(candidatos), termos)
+
+
+    # ---------------------------------------------------------------------
+    # Consultas com operadores (ver consultas.analisar_consulta)
+    # ---------------------------------------------------------------------
+
+    def avaliar(self, expressao, intervalo=None):
+        """
+        Índices (em ordem do arquivo) dos artigos que satisfazem a árvore de
+        uma consulta com operadores. Frases sem curinga mantêm a semântica de
+        substring de `buscar`; curingas (palavras inteiras ou prefixos) e
+        NEAR usam o dicionário de termos e as posições dos tokens.
+        """
+        docs = self._avaliar(expressao, intervalo)
+        if intervalo is not None:
+            inicio, fim = intervalo
+            docs = {doc for doc in docs if inicio <= doc < fim}
+        return sorted(docs)
+
+    def _avaliar(self, no, intervalo):
+        tipo = no[0]
+        if tipo == "frase":
+            return set(self.buscar([no[1]], intervalo))
+        if tipo == "curinga":
+            return self._candidatos_termo(self._tokens_frase(no), None)
+        if tipo == "perto":
+            docs = self._avaliar(no[2], intervalo) & self._avaliar(no[3], intervalo)
+            return {doc for doc in docs if self._ocorrencias(no, doc) != []}
+        if tipo == "nao":
+            return set(range(*(intervalo or (0, self.total)))) - self._avaliar(no[1], intervalo)
+        if tipo == "ou":
+            docs = set()
+            for filho in no[1]:
+                docs |= self._avaliar(filho, intervalo)
+            return docs
+
+        # "e": as frases literais vão juntas para buscar() (interseção pelo
+        # termo mais raro); depois os demais filhos e, por último, as negações
+        frases = [filho[1] for filho in no[1] if filho[0] == "frase"]
+        docs = set(self.buscar(frases, intervalo)) if frases else None
+        for filho in no[1]:
+            if filho[0] in ("frase", "nao"):
+                continue
+            if docs is not None and not docs:
+                return docs
+            encontrados = self._avaliar(filho, intervalo)
+            docs = encontrados if docs is None else docs & encontrados
+        if docs is None:
+            docs = set(range(*(intervalo or (0, self.total))))
+        for filho in no[1]:
+            if filho[0] == "nao" and docs:
+                docs -= self._avaliar(filho[1], intervalo)
+        return docs
+
+    def _tokens_frase(self, no):
+        """Tokens (expansões, frequência estimada) de um nó "frase" ou "curinga"."""
+        chave = ("frase", no)
+        tokens = self._expansao_em_cache(chave)
+        if tokens is not None:
+            return tokens
+        if no[0] == "frase":
+            tokens = self._tokens_consulta(no[1])
+        else:
+            tokens = []
+            for palavra, prefixo in no[1]:
+                expansoes = self.expandir(palavra, True, not prefixo)
+                tokens.append((expansoes, sum(self.frequencia(t) for t in expansoes)))
+        self._guardar_expansao(chave, tokens)
+        return tokens
+
+    def _ocorrencias(self, no, doc):
+        """
+        Trechos (inicio, fim), em posições de token, onde o nó ocorre no
+        artigo; None se o nó não tem posição (AND, NOT), caso em que NEAR
+        vale como AND.
+        """
+        tipo = no[0]
+        if tipo in ("frase", "curinga"):
+            tokens = self._tokens_frase(no)
+            if not tokens:
+                return []
+            return [(inicio, inicio + len(tokens)) for inicio in sorted(self._inicios(tokens, doc))]
+        if tipo == "ou":
+            ocorrencias = []
+            for filho in no[1]:
+                encontradas = self._ocorrencias(filho, doc)
+                if encontradas is None:
+                    return None
+                ocorrencias.extend(encontradas)
+            return sorted(ocorrencias)
+        if tipo == "perto":
+            _, distancia, a, b = no
+            ocorrencias_a = self._ocorrencias(a, doc)
+            ocorrencias_b = self._ocorrencias(b, doc)
+            if ocorrencias_a is None or ocorrencias_b is None:
+                return None
+            # Palavras entre os dois trechos: max(inícios) - min(fins)
+            trechos = {
+                (min(inicio_a, inicio_b), max(fim_a, fim_b))
+                for inicio_a, fim_a in ocorrencias_a
+                for inicio_b, fim_b in ocorrencias_b
+                if max(inicio_a, inicio_b) - min(fim_a, fim_b) <= distancia
+            }
+            return sorted(trechos)
+        return None
+
+
+# =========================================================================
+# REGISTRO COMPARTILHADO
+# =========================================================================
+
+_INDICES = {}
+_TRAVA = threading.Lock()
+
+
+def obter_indice(nome_arquivo, sigla_lei=""):
+    """Índice invertido da lei, construído uma vez por processo (e atualizado quando a lei muda)."""
+    corpus = obter_corpus(nome_arquivo, sigla_lei)
+    chave = os.path.abspath(nome_arquivo)
+    indice = _INDICES.get(chave)
+    if indice is not None and indice.corpus is corpus:
+        return indice
+
+    with _TRAVA:
+        indice = _INDICES.get(chave)
+        if indice is None or indice.corpus is not corpus:
+            if (indice is not None and corpus.mapa_anterior is not None
+                    and corpus.versao_anterior == indice.corpus.versao):
+                # Nova versão da lei: reindexa só os artigos alterados
+                with fase("indice.atualizacao"):
+                    indice = IndiceInvertido(corpus, indice)
+            else:
+                with fase("indice.construcao"):
+                    indice = IndiceInvertido(corpus)
+            _INDICES[chave] = indice
+    return indice
+
+
+# =========================================================================
+# VERIFICAÇÃO DIFERENCIAL (índice x varredura literal)
+# =========================================================================
+#
+# Roda para todas as leis em tests/test_indice.py (python -m pytest tests);
+# `python indice.py` faz a mesma verificação na linha de comando.
+
+CONSULTAS_VERIFICACAO = [
+    "dignidade da pessoa humana", "lei", "prazo", "contrib", "a", "art. 5",
+    "ção", "prazo, recurso", "zzzz", "º", "órgão", "salário, férias", "§ 1º",
+    "dano, moral, reparação", "i -", "(vide", "nos termos", "-se", "5º,",
+]
+
+
+def verificar_equivalencia(nome_arquivo, amostras=300, semente=0):
+    """
+    Compara o índice com a semântica de substring (`dobrar(termo) in
+    dobrar(texto)` em cada artigo) para consultas fixas e substrings
+    sorteadas do próprio texto.
+    Retorna a lista de consultas divergentes (vazia se tudo confere).
+    """
+    corpus = obter_corpus(nome_arquivo)
+    indice = obter_indice(nome_arquivo)
+    textos = [corpus.texto_dobrado(i) for i in range(corpus.total)]
+
+    sorteio = random.Random(semente)
+    consultas = [[dobrar(c)] for c in CONSULTAS_VERIFICACAO]
+    for _ in range(amostras):
+        if not textos:
+            break
+        texto = sorteio.choice(textos)
+        if not texto:
+            continue
+        inicio = sorteio.randrange(len(texto))
+        termo = texto[inicio:inicio + sorteio.randint(1, 30)].strip()
+        if termo:
+            consultas.append([termo])
+    for a, b in zip(consultas[::2], consultas[1::2]):
+        consultas.append(a + b)
+
+    divergentes = []
+    for termos in consultas:
+        esperado = [i for i, texto in enumerate(textos) if all(t in texto for t in termos)]
+        if indice.buscar(termos) != esperado:
+            divergentes.append(termos)
+    return divergentes
+
+
+if __name__ == "__main__":
+    # Uso: python indice.py [arquivo.txt ...]  (padrão: todas as leis do diretório)
+    arquivos = sys.argv[1:] or sorted(
+        f for f in glob.glob("*.txt") if f != "requirements.txt"
+    )
+    falhas = 0
+    for nome in arquivos:
+        divergentes = verificar_equivalencia(nome)
+        falhas += len(divergentes)
+        print(f"{nome}: {'OK' if not divergentes else f'{len(divergentes)} divergências'}")
+        for termos in divergentes[:10]:
+            print(f"  {termos!r}")
+    sys.exit(1 if falhas else 0)
@@ -0,0 +1,160 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+
+# =========================================================================
+# LIMITADOR DE TAXA GLOBAL (TOKEN BUCKET COM FILA JUSTA)
+# =========================================================================
+#
+# Um único balde de tokens por processo, compartilhado por todas as sessões.
+# Cada chamada à API (inclusive as novas tentativas) reserva um token; se o
+# balde estiver vazio, a reserva recebe o próximo horário livre. Como os
+# horários são distribuídos na ordem em que as reservas chegam, a fila é
+# justa (FIFO) e nenhuma sessão "fura" a fila com retries agressivos.
+#
+# As estatísticas (profundidade da fila e tempos de espera) servem para
+# dimensionar a cota da API a partir de dados reais.
+#
+# Trabalho de fundo (o aquecimento do cache de explicações, ver
+# aquecimento.py) não entra na fila: usa uma ReservaOciosa, que só pega um
+# token quando o balde está cheio, isto é, quando ninguém está usando a API.
+# Assim um clique em "Explicar" logo depois de um reinício nunca espera
+# atrás do aquecimento.
+
+REQUISICOES_POR_MINUTO_PADRAO = float(os.environ.get("GEMINI_REQUISICOES_POR_MINUTO", "10"))
+RAJADA_PADRAO = int(os.environ.get("GEMINI_RAJADA", "3"))
+AMOSTRAS_ESPERA = 1000
+
+
+class LimitadorTaxa:
+    """Token bucket thread-safe com reservas em ordem de chegada."""
+
+    def __init__(self, requisicoes_por_minuto=REQUISICOES_POR_MINUTO_PADRAO, rajada=RAJADA_PADRAO):
+        self.taxa = requisicoes_por_minuto / 60.0  # tokens por segundo
+        self.capacidade = rajada
+        self._tokens = float(rajada)
+        self._atualizado = time.monotonic()
+        self._trava = threading.Lock()
+
+        # Estatísticas
+        self.total = 0
+        self.em_espera = 0
+        self.maior_fila = 0
+        self.espera_total = 0.0
+        self._esperas = deque(maxlen=AMOSTRAS_ESPERA)
+
+    def reservar(self):
+        """Reserva um token e retorna quantos segundos é preciso esperar por ele."""
+        with self._trava:
+            agora = time.monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._atualizado) * self.taxa)
+            self._atualizado = agora
+            self._tokens -= 1.0
+            espera = -self._tokens / self.taxa if self._tokens < 0 else 0.0
+
+            self.total += 1
+            self.espera_total += espera
+            self._esperas.append(espera)
+            if espera > 0:
+                self.em_espera += 1
+                self.maior_fila = max(self.maior_fila, self.em_espera)
+            return espera
+
+    def reservar_se_cheio(self):
+        """
+        Reserva um token só se o balde estiver cheio (sem fila nem uso
+        recente). Retorna 0.0 se reservou; senão, não reserva e retorna
+        quantos segundos faltam para o balde encher.
+        """
+        with self._trava:
+            agora = time.monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._atualizado) * self.taxa)
+            self._atualizado = agora
+            if self._tokens < self.capacidade:
+                return (self.capacidade - self._tokens) / self.taxa
+            self._tokens -= 1.0
+            self.total += 1
+            return 0.0
+
+    def _liberar(self, espera):
+        if espera > 0:
+            with self._trava:
+                self.em_espera -= 1
+
+    def aguardar(self):
+        """Bloqueia a thread até o token reservado ficar disponível."""
+        espera = self.reservar()
+        try:
+            if espera > 0:
+                time.sleep(espera)
+        finally:
+            self._liberar(espera)
+        return espera
+
+    async def aguardar_async(self):
+        """Versão assíncrona: espera com asyncio.sleep, sem bloquear o laço."""
+        espera = self.reservar()
+        try:
+            if espera > 0:
+                await asyncio.sleep(espera)
+        finally:
+            self._liberar(espera)
+        return espera
+
+    def estatisticas(self):
+        """Fila atual, maior fila e tempos de espera (média e percentis recentes)."""
+        with self._trava:
+            esperas = sorted(self._esperas)
+            total = self.total
+            em_espera = self.em_espera
+            maior_fila = self.maior_fila
+            espera_total = self.espera_total
+
+        def percentil(p):
+            if not esperas:
+                return 0.0
+            return esperas[min(len(esperas) - 1, int(p / 100 * len(esperas)))]
+
+        return {
+            "requisicoes": total,
+            "fila_atual": em_espera,
+            "maior_fila": maior_fila,
+            "espera_media_s": espera_total / total if total else 0.0,
+            "espera_p50_s": percentil(50),
+            "espera_p95_s": percentil(95),
+            "espera_max_s": esperas[-1] if esperas else 0.0,
+        }
+
+
+class ReservaOciosa:
+    """
+    Acesso de baixa prioridade a um LimitadorTaxa: aguardar_async só
+    devolve quando consegue um token com o balde cheio, cedendo a vez a
+    qualquer chamada interativa.
+    """
+
+    def __init__(self, limitador):
+        self.limitador = limitador
+
+    async def aguardar_async(self):
+        inicio = time.monotonic()
+        while True:
+            falta = self.limitador.reservar_se_cheio()
+            if not falta:
+                return time.monotonic() - inicio
+            await asyncio.sleep(falta)
+
+
+_LIMITADOR = None
+_TRAVA = threading.Lock()
+
+
+def obter_limitador():
+    """Limitador único do processo (compartilhado por todas as sessões)."""
+    global _LIMITADOR
+    with _TRAVA:
+        if _LIMITADOR is None:
+            _LIMITADOR = LimitadorTaxa()
+    return _LIMITADOR
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import logging
+import functools
+import threading
+import contextvars
+
+# =========================================================================
+# INSTRUMENTAÇÃO (TEMPORIZADORES POR FASE E CONTADORES)
+# =========================================================================
+#
+# Mede onde o tempo de uma página vai: leitura dos arquivos, divisão em
+# artigos, busca no índice, confirmação literal, previews, renderização e
+# chamadas à API do Gemini (tentativas, backoff e espera no limitador).
+#
+#     with fase("busca.indice"):
+#         ...
+#     contar("busca.artigos_varridos", len(candidatos))
+#
+# Desativada por padrão: `fase()` devolve um objeto nulo compartilhado e
+# `contar()` retorna logo no início, então o custo é uma verificação de flag
+# (e de uma ContextVar) por chamada.
+#
+# Há dois modos de coleta:
+#   - do processo inteiro (todas as sessões), com a variável de ambiente
+#     MAPA_LEI_METRICAS=1 ou com `ativar()` (scripts, benchmarks). Esses
+#     dados podem ser exportados como JSON (`exportar_json`) ou no formato
+#     texto do Prometheus (`exportar_prometheus`);
+#   - de uma execução só, com `iniciar_coleta()` (ex.: o painel de depuração
+#     da barra lateral, por sessão). A coleta fica em uma ContextVar: mede só
+#     o que roda no contexto de quem a iniciou, sem ligar nada para as outras
+#     sessões. Trabalho entregue a outras threads (pool de busca, laço asyncio
+#     da IA) leva a coleta junto por meio de `propagar` e `propagar_corrotina`.
+#
+# Com o logger "mapa_lei.metricas" em nível DEBUG, cada fase também é
+# registrada como uma linha JSON.
+
+PREFIXO_PROMETHEUS = "mapa_lei"
+
+logger = logging.getLogger("mapa_lei.metricas")
+
+_ativo = os.environ.get("MAPA_LEI_METRICAS", "") not in ("", "0")
+_trava = threading.Lock()
+_fases = {}       # nome -> [chamadas, segundos_total, segundos_max]
+_contadores = {}  # nome -> valor
+
+
+class Coleta:
+    """Fases e contadores de uma única execução (ver iniciar_coleta)."""
+
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.fases = {}
+        self.contadores = {}
+
+    def instantaneo(self):
+        """Dados da coleta, no formato de metricas.instantaneo()."""
+        return _formatar(self.trava, self.fases, self.contadores)
+
+
+_coleta = contextvars.ContextVar("mapa_lei_coleta", default=None)
+
+
+def ativa():
+    return _ativo
+
+
+def ativar(valor=True):
+    """Liga (ou desliga) a coleta no processo."""
+    global _ativo
+    _ativo = bool(valor)
+
+
+def iniciar_coleta(ativa=True):
+    """
+    Começa a coletar, só no contexto atual, em uma Coleta nova (devolvida).
+    Com ativa=False, encerra a coleta que estiver no contexto e devolve None.
+    """
+    coleta = Coleta() if ativa else None
+    _coleta.set(coleta)
+    return coleta
+
+
+def propagar(funcao):
+    """`funcao` para rodar em outra thread (ex.: executor.submit) somando na coleta do contexto atual."""
+    return functools.partial(contextvars.copy_context().run, funcao)
+
+
+async def _na_coleta(coleta, corrotina):
+    _coleta.set(coleta)  # vale para esta tarefa e para as que ela criar (gather)
+    return await corrotina
+
+
+def propagar_corrotina(corrotina):
+    """A corrotina, para rodar em outro laço asyncio somando na coleta do contexto atual."""
+    coleta = _coleta.get()
+    return corrotina if coleta is None else _na_coleta(coleta, corrotina)
+
+
+def limpar():
+    """Zera todas as fases e contadores do processo."""
+    with _trava:
+        _fases.clear()
+        _contadores.clear()
+
+
+def _somar_fase(trava, fases, nome, segundos):
+    with trava:
+        dados = fases.get(nome)
+        if dados is None:
+            fases[nome] = [1, segundos, segundos]
+        else:
+            dados[0] += 1
+            dados[1] += segundos
+            if segundos > dados[2]:
+                dados[2] = segundos
+
+
+def _somar_contador(trava, contadores, nome, valor):
+    with trava:
+        contadores[nome] = contadores.get(nome, 0) + valor
+
+
+def registrar_fase(nome, segundos):
+    """Soma uma duração já medida à fase `nome`."""
+    coleta = _coleta.get()
+    if not _ativo and coleta is None:
+        return
+    if _ativo:
+        _somar_fase(_trava, _fases, nome, segundos)
+    if coleta is not None:
+        _somar_fase(coleta.trava, coleta.fases, nome, segundos)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps({"fase": nome, "segundos": round(segundos, 6)}))
+
+
+def contar(nome, valor=1):
+    """Soma `valor` ao contador `nome`."""
+    coleta = _coleta.get()
+    if not _ativo and coleta is None:
+        return
+    if _ativo:
+        _somar_contador(_trava, _contadores, nome, valor)
+    if coleta is not None:
+        _somar_contador(coleta.trava, coleta.contadores, nome, valor)
+
+
+class _Fase:
+    __slots__ = ("nome", "inicio")
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        registrar_fase(self.nome, time.perf_counter() - self.inicio)
+        return False
+
+
+class _FaseNula:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+
+_FASE_NULA = _FaseNula()
+
+
+def fase(nome):
+    """Gerenciador de contexto que cronometra o bloco como a fase `nome`."""
+    return _Fase(nome) if _ativo or _coleta.get() is not None else _FASE_NULA
+
+
+# =========================================================================
+# LEITURA E EXPORTAÇÃO
+# =========================================================================
+
+def _formatar(trava, fases, contadores):
+    with trava:
+        fases = {nome: list(dados) for nome, dados in fases.items()}
+        contadores = dict(contadores)
+    return {
+        "fases": {
+            nome: {"chamadas": chamadas, "segundos": total, "segundos_max": maximo}
+            for nome, (chamadas, total, maximo) in sorted(fases.items())
+        },
+        "contadores": dict(sorted(contadores.items())),
+    }
+
+
+def instantaneo():
+    """Cópia dos dados atuais do processo: {"fases": {nome: {...}}, "contadores": {nome: valor}}."""
+    return _formatar(_trava, _fases, _contadores)
+
+
+def exportar_json(dados=None):
+    """Registro estruturado (JSON) dos dados atuais."""
+    dados = dados or instantaneo()
+    return json.dumps({"timestamp": time.time(), **dados}, ensure_ascii=False)
+
+
+def _nome_prometheus(nome):
+    return "".join(c if c.isalnum() else "_" for c in nome)
+
+
+def exportar_prometheus(dados=None):
+    """Dump no formato texto de exposição do Prometheus."""
+    dados = dados or instantaneo()
+    linhas = [
+        f"# HELP {PREFIXO_PROMETHEUS}_fase_segundos Tempo gasto em cada fase.",
+        f"# TYPE {PREFIXO_PROMETHEUS}_fase_segundos summary",
+    ]
+    for nome, fase_dados in dados["fases"].items():
+        rotulo = f'{{fase="{nome}"}}'
+        linhas.append(f"{PREFIXO_PROMETHEUS}_fase_segundos_count{rotulo} {fase_dados['chamadas']}")
+        linhas.append(f"{PREFIXO_PROMETHEUS}_fase_segundos_sum{rotulo} {fase_dados['segundos']:.6f}")
+    for nome, valor in dados["contadores"].items():
+        metrica = f"{PREFIXO_PROMETHEUS}_{_nome_prometheus(nome)}_total"
+        linhas.append(f"# TYPE {metrica} counter")
+        linhas.append(f"{metrica} {valor}")
+    return "\n".join(linhas) + "\n"
@@ -0,0 +1,439 @@
+import re
+import time
+
+from corpus import obter_corpus, dobrar, dobrar_com_mapa, para_original, para_dobrado
+from consultas import extrair_termos, analisar_consulta, termos_positivos, termos_consulta, buscar_ids
+from ranking import ORDEM_DOCUMENTO, ORDEM_RELEVANCIA, TOP_K_PADRAO, top_k_bm25, mesclar_top_k
+from estrutura import obter_estrutura
+from metricas import fase, contar, propagar
+
+# =========================================================================
+# MOTOR DE BUSCA (SEM STREAMLIT)
+# =========================================================================
+#
+# Núcleo da busca usado pela página (buscar.py) e pelos scripts de linha de
+# comando (benchmark_busca.py, busca_lote.py). Nada aqui depende do Streamlit
+# ou do session_state: o estado da sessão é passado e devolvido explicitamente.
+#
+#     from motor import buscar
+#     resposta = buscar("dignidade da pessoa humana", limite=5)
+#     for artigo in resposta["todos"]:
+#         print(artigo["label"])
+
+# =========================================================================
+# CONFIGURAÇÃO CENTRALIZADA
+# =========================================================================
+
+# Configuração de todas as leis, incluindo arquivo, sigla e âncora
+LEIS_CONFIG = {
+    "1. Constituição Federal": {"file": "constituicao.txt", "sigla": "CF", "anchor": "cf_anchor", "emoji": "🇧🇷"},
+    "2. Código Civil": {"file": "codigo_civil.txt", "sigla": "CC", "anchor": "cc_anchor", "emoji": "🙋‍♀️"},
+    "3. Código Penal": {"file": "codigo_penal.txt", "sigla": "CP", "anchor": "cp_anchor", "emoji": "🚨"},
+    "4. Código de Processo Civil": {"file": "codigo_processo_civil.txt", "sigla": "CPC", "anchor": "cpc_anchor", "emoji": "👥"},    
+    "5. Código de Processo Penal": {"file": "codigo_processo_penal.txt", "sigla": "CPP", "anchor": "cpp_anchor", "emoji": "👨‍⚖️"},
+    "6. Código de Defesa do Consumidor": {"file": "codigo_defesa_consumidor.txt", "sigla": "CDC", "anchor": "cdc_anchor", "emoji": "🛍️"},
+    "7. Código Tributário Nacional": {"file": "codigo_tributario_nacional.txt", "sigla": "CTN", "anchor": "ctn_anchor", "emoji": "💵"},
+    "8. Consolidação das Leis de Trabalho": {"file": "consolidacao_leis_trabalho.txt", "sigla": "CLT", "anchor": "clt_anchor", "emoji": "👷"},
+    "9. Estatuto da Criança e do Adolescente": {"file": "estatuto_crianca_adolescente.txt", "sigla": "ECA", "anchor": "eca_anchor", "emoji": "🧒"},
+}
+
+SIGLA_POR_ARQUIVO = {config['file']: config['sigla'] for config in LEIS_CONFIG.values()}
+
+# Artigos exibidos por página em cada lei (o botão "Carregar mais" adiciona outra página)
+TAMANHO_PAGINA = TOP_K_PADRAO
+
+# Tamanho do preview (caracteres) e quanto dele fica antes da primeira ocorrência
+LIMITE_PREVIEW = 300
+CONTEXTO_ANTES = 80
+
+# =========================================================================
+# FUNÇÕES DE BUSCA (Lógica)
+# =========================================================================
+
+def formatar_artigo(texto_artigo):
+    """Pega os primeiros 300 caracteres do artigo para dar um 'preview'."""
+    preview = texto_artigo.strip()
+
+    if len(preview) > LIMITE_PREVIEW:
+        preview = preview[:LIMITE_PREVIEW] + "..."
+
+    # Remove quebras de linha e múltiplos espaços do preview para exibição limpa
+    preview = re.sub(r'\s+', ' ', preview)
+    
+    return preview
+
+
+def trecho_kwic(normalizado, dobrado, mapa, termos, largura=LIMITE_PREVIEW):
+    """
+    Preview "palavra-chave em contexto": até `largura` caracteres do texto
+    (já com espaços normalizados, ver CorpusLei.texto_normalizado) em volta
+    da primeira ocorrência dos termos, cortado em limites de palavra.
+
+    Os termos são procurados em `dobrado` (sem acentos, ver corpus.dobrar) e
+    as posições voltam ao texto original pelo `mapa`; o preview é sempre um
+    pedaço do texto original, com acentos.
+
+    Retorna (preview, destaques): destaques são os intervalos (inicio, fim)
+    das ocorrências dos termos DENTRO do preview, para realce na exibição.
+    Sem ocorrência (ou sem termos), o preview é o início do texto.
+    """
+    termos = [" ".join(dobrar(termo).split()) for termo in termos]
+    termos = [termo for termo in termos if termo]
+
+    primeira = min(
+        (para_original(mapa, pos) for pos in (dobrado.find(termo) for termo in termos) if pos != -1),
+        default=-1,
+    )
+    inicio = 0
+    if primeira > CONTEXTO_ANTES and len(normalizado) > largura:
+        inicio = min(primeira - CONTEXTO_ANTES, len(normalizado) - largura)
+        espaco = normalizado.find(" ", inicio, primeira)
+        if espaco != -1:
+            inicio = espaco + 1
+    fim = min(len(normalizado), inicio + largura)
+    if fim < len(normalizado):
+        espaco = normalizado.rfind(" ", max(inicio, primeira + 1), fim)
+        if espaco != -1:
+            fim = espaco
+
+    prefixo = "..." if inicio > 0 else ""
+    preview = prefixo + normalizado[inicio:fim] + ("..." if fim < len(normalizado) else "")
+
+    # Ocorrências dentro da janela (sobrepostas são unidas)
+    ocorrencias = []
+    inicio_dobrado, fim_dobrado = para_dobrado(mapa, inicio), para_dobrado(mapa, fim)
+    for termo in termos:
+        pos = dobrado.find(termo, inicio_dobrado, fim_dobrado)
+        while pos != -1 and pos + len(termo) <= fim_dobrado:
+            ocorrencias.append((para_original(mapa, pos), para_original(mapa, pos + len(termo))))
+            pos = dobrado.find(termo, pos + 1, fim_dobrado)
+    destaques = []
+    for a, b in sorted(ocorrencias):
+        if destaques and a <= destaques[-1][1]:
+            destaques[-1][1] = max(destaques[-1][1], b)
+        else:
+            destaques.append([a, b])
+    deslocamento = len(prefixo) - inicio
+    return preview, [(a + deslocamento, b + deslocamento) for a, b in destaques]
+
+
+def resultado_artigo(corpus, sigla_lei, i, pontuacao=None, termos=()):
+    """
+    Resultado (dicionário exibido na página) do artigo `i` do corpus, com o
+    preview em volta da primeira ocorrência dos `termos` (ver trecho_kwic).
+    """
+    numero_artigo = corpus.numero(i)
+    texto_do_artigo = corpus.texto(i)
+    preview, destaques = trecho_kwic(*corpus.texto_normalizado(i), termos)
+
+    # O label inclui a sigla da lei para melhor identificação
+    return {
+        "id": f"{corpus.nome_arquivo}_{numero_artigo}",
+        "arquivo": corpus.nome_arquivo,
+        "versao": corpus.versao,
+        "indice": i,
+        "pontuacao": pontuacao,
+        "numero": numero_artigo,
+        "preview": preview,
+        "destaques": destaques,
+        "label": f"{sigla_lei} - {numero_artigo} | {preview}",
+        "texto_completo": f"{numero_artigo}{texto_do_artigo}"
+    }
+
+
+def resultado_trecho(estrutura, sigla_lei, no, termos=()):
+    """Resultado de uma busca por escopo: o trecho `no` da árvore estrutural."""
+    nome_arquivo = estrutura.corpus.nome_arquivo
+    caminho = " › ".join(estrutura.caminho(no))
+    normalizado = " ".join(estrutura.texto(no).split())
+    preview, destaques = trecho_kwic(normalizado, *dobrar_com_mapa(normalizado), termos)
+    return {
+        "id": f"{nome_arquivo}_{no}",
+        "arquivo": nome_arquivo,
+        "versao": estrutura.corpus.versao,
+        "indice": estrutura.artigos[no],
+        "no": no,
+        "pontuacao": None,
+        "numero": caminho,
+        "preview": preview,
+        "destaques": destaques,
+        "label": f"{sigla_lei} - {caminho} | {preview}",
+        "texto_completo": texto_trecho(estrutura, no)
+    }
+
+
+def buscar_em_arquivo(termo_pesquisa, nome_arquivo, sigla_lei, anterior=None,
+                      ordem=ORDEM_DOCUMENTO, limite=TOP_K_PADRAO):
+    """
+    Busca um termo em um arquivo de texto. A busca é exata (substring literal).
+    
+    Se o termo_pesquisa contiver vírgulas (,), a busca exigirá que TODAS 
+    as expressões separadas por vírgula estejam presentes no artigo (lógica AND).
+    Consultas com operadores (curinga *, OR, NOT, NEAR/n) seguem
+    consultas.analisar_consulta.
+
+    `anterior` (opcional) é o par (termos, ids) da busca anterior nesta lei; se
+    a nova busca apenas a restringe, os resultados anteriores são filtrados.
+
+    Apenas os `limite` primeiros artigos (a janela exibida) viram resultados com
+    preview e label. Com ordem=ORDEM_RELEVANCIA, são os `limite` artigos de maior
+    pontuação BM25, do mais para o menos relevante; senão, os primeiros do texto.
+
+    Retorna (resultados, ids): ids são os índices de TODOS os artigos
+    encontrados, em ordem do arquivo (None em caso de erro de arquivo).
+    """
+    encontrados = []
+
+    # 1. Determina os termos OBRIGATÓRIOS (requeridos), ou a árvore da consulta com operadores
+    expressao = analisar_consulta(termo_pesquisa)
+    if expressao is None:
+        required_terms = extrair_termos(termo_pesquisa)
+    else:
+        # Na expressão, os termos positivos servem só para a pontuação (BM25)
+        required_terms = termos_positivos(expressao)
+    
+    # Se a lista de termos requeridos estiver vazia após a limpeza (ex: só vírgulas), retorna vazio.
+    if not required_terms and expressao is None:
+        return [], ()
+
+    try:
+        # 2. Seleciona os artigos que contêm TODAS as substrings requeridas
+        #    (cache LRU, refinamento da busca anterior ou índice invertido)
+        ids = buscar_ids(nome_arquivo, sigla_lei, required_terms, anterior, expressao)
+
+        # Artigos pré-compilados e mapeados em memória (compartilhados entre sessões).
+        # Se a lei foi atualizada durante a busca, refaz a busca na versão nova.
+        corpus = obter_corpus(nome_arquivo, sigla_lei)
+        if ids.versao != corpus.versao:
+            ids = buscar_ids(nome_arquivo, sigla_lei, required_terms, expressao=expressao)
+            corpus = obter_corpus(nome_arquivo, sigla_lei)
+
+        if ordem == ORDEM_RELEVANCIA:
+            with fase("busca.ranking"):
+                selecionados = top_k_bm25(nome_arquivo, sigla_lei, required_terms, ids, limite)
+        else:
+            selecionados = [(None, i) for i in ids[:limite]]
+
+        with fase("busca.preview"):
+            encontrados = [
+                resultado_artigo(corpus, sigla_lei, i, pontuacao, required_terms)
+                for pontuacao, i in selecionados
+            ]
+        contar("busca.previews", len(encontrados))
+            
+    except FileNotFoundError:
+        # Adiciona o campo 'label' para evitar KeyError na seção de IA.
+        error_message = f"🚨 ERRO: O arquivo '{nome_arquivo}' não foi encontrado!"
+        return [
+            {
+                "id": "error", 
+                "numero": "ERRO", 
+                "preview": error_message,
+                "label": error_message,
+                "texto_completo": ""
+            }
+        ], None
+
+    return encontrados, ids
+
+
+def texto_trecho(estrutura, id_no):
+    """Texto enviado à IA para um trecho: o caminho na lei seguido do texto do trecho."""
+    return f"{' › '.join(estrutura.caminho(id_no))}\n\n{estrutura.texto(id_no).strip()}"
+
+
+def buscar_em_escopo(termo_pesquisa, nome_arquivo, sigla_lei, id_escopo, limite=TOP_K_PADRAO):
+    """
+    Busca restrita a uma divisão da lei (Título, Capítulo, ADCT...), ver estrutura.py.
+
+    Os resultados são os menores trechos que contêm todos os termos (caput,
+    parágrafo, inciso ou alínea), em ordem do texto, com o caminho do trecho
+    na lei como número (ex.: 'Título II › Capítulo I › Art. 5 › inciso LXVIII').
+    Com operadores (ver consultas.analisar_consulta), os trechos são os
+    artigos inteiros que satisfazem a consulta.
+
+    Retorna (resultados, ids) como buscar_em_arquivo, mas com ids dos nós da
+    árvore estrutural em vez de índices de artigos.
+    """
+    expressao = analisar_consulta(termo_pesquisa)
+    required_terms = extrair_termos(termo_pesquisa)
+    if not required_terms:
+        return [], ()
+
+    try:
+        estrutura = obter_estrutura(nome_arquivo, sigla_lei)
+    except FileNotFoundError:
+        error_message = f"🚨 ERRO: O arquivo '{nome_arquivo}' não foi encontrado!"
+        return [
+            {
+                "id": "error",
+                "numero": "ERRO",
+                "preview": error_message,
+                "label": error_message,
+                "texto_completo": ""
+            }
+        ], None
+
+    with fase("busca.escopo"):
+        if expressao is None:
+            ids = tuple(estrutura.buscar(required_terms, id_escopo))
+        else:
+            ids = tuple(estrutura.buscar_expressao(expressao, id_escopo))
+    termos = required_terms if expressao is None else termos_positivos(expressao)
+    encontrados = [resultado_trecho(estrutura, sigla_lei, no, termos) for no in ids[:limite]]
+    return encontrados, ids
+
+
+# =========================================================================
+# REFERÊNCIAS COMPACTAS
+# =========================================================================
+#
+# O estado de cada sessão guarda só referências (arquivo, índice do artigo,
+# nó) aos resultados, e não os textos: o arquivo é a própria string de
+# LEIS_CONFIG, e os textos, previews e labels são refeitos quando preciso a
+# partir do corpus e da árvore estrutural, compartilhados por todas as
+# sessões. Assim a memória de uma sessão cresce com o número de resultados,
+# não com o tamanho dos artigos.
+#
+# A referência guarda também a versão do corpus (corpus.versao) em que foi
+# criada: se a lei for recarregada com o processo no ar (ver
+# corpus.obter_corpus), os índices antigos podem apontar para outros artigos,
+# ou para além do fim da lei. Referências da versão imediatamente anterior
+# são remapeadas pelo corpus.mapa_anterior; as demais são descartadas.
+
+def referencia(resultado):
+    """Referência compacta de um resultado: (arquivo, índice do artigo, nó ou -1, versão do corpus)."""
+    return (resultado['arquivo'], resultado['indice'], resultado.get('no', -1), resultado['versao'])
+
+
+def atualizar_referencia(ref):
+    """
+    A referência equivalente na versão atual da lei, ou None se o artigo
+    mudou, saiu da lei ou a referência é de uma versão que não dá para
+    remapear. Trechos (nó >= 0) de versões anteriores são sempre
+    descartados: a árvore estrutural é refeita a cada versão.
+    """
+    nome_arquivo, i, no, versao = ref
+    try:
+        corpus = obter_corpus(nome_arquivo, SIGLA_POR_ARQUIVO.get(nome_arquivo, ""))
+    except FileNotFoundError:
+        return None
+    if versao == corpus.versao:
+        return ref
+    if no >= 0 or corpus.mapa_anterior is None or versao != corpus.versao_anterior:
+        return None
+    # mapa_anterior: para cada artigo novo, o índice do artigo idêntico na versão anterior
+    try:
+        novo = corpus.mapa_anterior.index(i)
+    except ValueError:
+        return None
+    return (nome_arquivo, novo, -1, corpus.versao)
+
+
+def atualizar_referencias(refs):
+    """atualizar_referencia de cada referência, sem as descartadas e sem repetições."""
+    atualizadas = (atualizar_referencia(ref) for ref in refs)
+    return list(dict.fromkeys(ref for ref in atualizadas if ref is not None))
+
+
+def resolver_referencia(ref, termos=()):
+    """
+    Refaz o resultado completo (texto, preview, label...) de uma referência;
+    com `termos`, o preview fica em volta da primeira ocorrência deles.
+    Retorna None se a referência não vale mais (ver atualizar_referencia).
+    """
+    ref = atualizar_referencia(ref)
+    if ref is None:
+        return None
+    nome_arquivo, i, no, _ = ref
+    sigla_lei = SIGLA_POR_ARQUIVO.get(nome_arquivo, "")
+    if no >= 0:
+        return resultado_trecho(obter_estrutura(nome_arquivo, sigla_lei), sigla_lei, no, termos)
+    return resultado_artigo(obter_corpus(nome_arquivo, sigla_lei), sigla_lei, i, termos=termos)
+
+
+def buscar_lei_cronometrado(termo_pesquisa, config, anterior=None, ordem=ORDEM_DOCUMENTO, limite=TAMANHO_PAGINA):
+    """Executa buscar_em_arquivo para uma lei e mede o tempo de parede (em segundos)."""
+    inicio = time.perf_counter()
+    resultados, ids = buscar_em_arquivo(termo_pesquisa, config['file'], config['sigla'], anterior, ordem, limite)
+    return resultados, ids, time.perf_counter() - inicio
+
+
+def buscar_todas_as_leis(termo_pesquisa, anteriores=None, ordem=ORDEM_DOCUMENTO, limites=None, executor=None,
+                         leis=None):
+    """
+    Executa buscar_em_arquivo em todas as leis de LEIS_CONFIG (ou só nos
+    títulos da lista `leis`).
+
+    `anteriores` e `limites` são dicionários por título de lei (base do
+    refinamento e tamanho da janela exibida). Com um `executor`
+    (ThreadPoolExecutor), cada lei é buscada em uma thread; os resultados
+    voltam na ordem de LEIS_CONFIG.
+
+    Retorna {titulo: (resultados, ids, duracao_em_segundos)}.
+    """
+    anteriores = anteriores or {}
+    limites = limites or {}
+    argumentos = {
+        titulo: (termo_pesquisa, config, anteriores.get(titulo), ordem, limites.get(titulo, TAMANHO_PAGINA))
+        for titulo, config in LEIS_CONFIG.items()
+        if leis is None or titulo in leis
+    }
+    if executor is None:
+        return {titulo: buscar_lei_cronometrado(*args) for titulo, args in argumentos.items()}
+
+    # Cada lei leva junto a coleta de métricas de quem pediu a busca (painel de depuração)
+    futuros = {
+        titulo: executor.submit(propagar(buscar_lei_cronometrado), *args)
+        for titulo, args in argumentos.items()
+    }
+    return {titulo: futuro.result() for titulo, futuro in futuros.items()}
+
+
+def mesclar_por_relevancia(resultados_por_lei):
+    """Une as janelas de todas as leis pela pontuação BM25 (mais relevantes primeiro)."""
+    pontuados = {
+        titulo: [(res['pontuacao'], posicao) for posicao, res in enumerate(resultados)]
+        for titulo, resultados in resultados_por_lei.items()
+        if not (resultados and resultados[0]['id'] == "error")
+    }
+    total = sum(len(pontos) for pontos in pontuados.values())
+    return [
+        resultados_por_lei[titulo][posicao]
+        for _, titulo, posicao in mesclar_top_k(pontuados, total)
+    ]
+
+
+def buscar(termo_pesquisa, ordem=ORDEM_DOCUMENTO, limite=TOP_K_PADRAO, leis=None, executor=None):
+    """
+    Busca completa em uma chamada, para uso fora da página (scripts, testes).
+
+    Retorna um dicionário:
+        "termos": termos extraídos da consulta;
+        "leis": {titulo: {"resultados", "total", "duracao_s", "erro"}};
+        "todos": resultados de todas as leis (por relevância com
+                 ordem=ORDEM_RELEVANCIA, senão na ordem de LEIS_CONFIG).
+    Levanta consultas.ConsultaInvalida se a consulta com operadores estiver malformada.
+    """
+    analisar_consulta(termo_pesquisa)  # recusa a consulta malformada antes de buscar nas leis
+    limites = {titulo: limite for titulo in LEIS_CONFIG}
+    execucoes = buscar_todas_as_leis(termo_pesquisa, None, ordem, limites, executor, leis)
+
+    por_lei = {}
+    resultados_por_lei = {}
+    for titulo, (resultados, ids, duracao) in execucoes.items():
+        erro = resultados[0]['preview'] if ids is None else None
+        resultados_por_lei[titulo] = [] if erro else resultados
+        por_lei[titulo] = {
+            "resultados": resultados_por_lei[titulo],
+            "total": 0 if ids is None else len(ids),
+            "duracao_s": duracao,
+            "erro": erro,
+        }
+
+    if ordem == ORDEM_RELEVANCIA:
+        todos = mesclar_por_relevancia(resultados_por_lei)
+    else:
+        todos = [resultado for resultados in resultados_por_lei.values() for resultado in resultados]
+
+    return {"termos": termos_consulta(termo_pesquisa), "leis": por_lei, "todos": todos}
@@ -1,16 +1,99 @@
+import io
+import os
+import time
+import hashlib
+import threading
+import urllib.request
+from urllib.error import URLError
+
 import pandas as pd
 import streamlit as st
 import plotly.express as px
 
-dataset = pd.read_csv('https://www.irdx.com.br/media/uploads/paises.csv')
+# =========================================================================
+# DADOS DOS PAÍSES (SNAPSHOT LOCAL)
+# =========================================================================
+#
+# O CSV é baixado no máximo uma vez a cada VALIDADE_SNAPSHOT segundos e
+# guardado em Parquet (colunar) dentro de DIRETORIO_SNAPSHOT. Nas demais vezes
+# a página lê só o snapshot local; se o download falhar (sem rede, servidor
+# fora do ar), o snapshot antigo continua valendo. Os dados são lidos uma vez
+# por processo (st.cache_resource) e a figura é montada uma vez por versão
+# dos dados, então cada interação com a página só reenvia a figura pronta.
+
+URL_DADOS = 'https://www.irdx.com.br/media/uploads/paises.csv'
+# Mesmo diretório local dos índices das leis (ver corpus.py), fora do git
+DIRETORIO_SNAPSHOT = ".indice"
+CAMINHO_SNAPSHOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), DIRETORIO_SNAPSHOT, "paises.parquet")
+
+VALIDADE_SNAPSHOT = 24 * 60 * 60  # segundos
+TEMPO_LIMITE_DOWNLOAD = 10        # segundos
+
+_TRAVA = threading.Lock()
+
+
+def baixar_snapshot(destino=CAMINHO_SNAPSHOT):
+    """Baixa o CSV e grava o snapshot em Parquet (escrita atômica). Levanta URLError/OSError em falha."""
+    with urllib.request.urlopen(URL_DADOS, timeout=TEMPO_LIMITE_DOWNLOAD) as resposta:
+        conteudo = resposta.read()
+    dataset = pd.read_csv(io.BytesIO(conteudo))
+
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporario = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    dataset.to_parquet(temporario, index=False)
+    os.replace(temporario, destino)
+
+
+def versao_snapshot(caminho=CAMINHO_SNAPSHOT):
+    """Versão dos dados (hash do conteúdo do snapshot)."""
+    with open(caminho, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+@st.cache_resource(ttl=VALIDADE_SNAPSHOT)
+def carregar_dados():
+    """
+    (dataset, versao, aviso) lidos do snapshot local, renovado pela rede
+    quando tem mais de VALIDADE_SNAPSHOT segundos. `aviso` é None, ou a
+    mensagem da falha de download quando o snapshot antigo foi usado.
+    Levanta a exceção do download se não houver rede nem snapshot.
+    """
+    aviso = None
+    with _TRAVA:
+        try:
+            idade = time.time() - os.stat(CAMINHO_SNAPSHOT).st_mtime
+        except FileNotFoundError:
+            idade = None
+        if idade is None or idade > VALIDADE_SNAPSHOT:
+            try:
+                baixar_snapshot()
+            except (URLError, OSError, ValueError) as e:
+                if idade is None:
+                    raise
+                aviso = f"Não foi possível atualizar os dados ({e}); usando a cópia local."
+    return pd.read_parquet(CAMINHO_SNAPSHOT), versao_snapshot(), aviso
+
+
+@st.cache_resource
+def construir_figura(versao, _dataset):
+    """Mapa coroplético, montado uma vez por versão dos dados (`_dataset` não entra na chave)."""
+    fig = px.choropleth(_dataset,
+                        locations=_dataset['iso3'],
+                         color=_dataset['nome'],
+                         hover_name=_dataset['nome'])
+
+    fig.update_layout(title= 'Mapa Coroplético dos Países',
+                      geo_scope='world')
+    return fig
 
-fig = px.choropleth(dataset,
-                    locations=dataset['iso3'],
-                     color=dataset['nome'],
-                     hover_name=dataset['nome'])
 
-fig.update_layout(title= 'Mapa Coroplético dos Países',
-                  geo_scope='world')
+try:
+    dataset, versao, aviso = carregar_dados()
+except (URLError, OSError, ValueError) as e:
+    st.error(f"🚨 ERRO: não foi possível baixar os dados dos países e não há cópia local ({e}).")
+    st.stop()
 
-st.plotly_chart(fig, use_container_width=True, theme="streamlit")
+if aviso:
+    st.warning(aviso)
 
+st.plotly_chart(construir_figura(versao, dataset), use_container_width=True, theme="streamlit")
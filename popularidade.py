@@ -0,0 +1,183 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+
+from corpus import DIRETORIO_INDICE
+
+# =========================================================================
+# REGISTRO AGREGADO DE USO (CONSULTAS E ARTIGOS EXPLICADOS)
+# =========================================================================
+#
+# Base do aquecimento dos caches após um reinício (ver aquecimento.py): quais
+# consultas são mais buscadas e quais artigos são mais mandados para
+# "Explicar artigos". O registro é só de CONTAGENS agregadas:
+#   - nada identifica quem buscou (sem sessão, IP ou horário exato; só o dia
+#     do último uso, para descartar entradas antigas);
+#   - consultas longas ou com cara de dado pessoal (sequências longas de
+#     dígitos como CPF, telefone ou número de processo; e-mails) não são
+#     registradas;
+#   - só consultas e artigos vistos pelo menos MINIMO_OCORRENCIAS vezes são
+#     considerados populares, então uma busca feita uma única vez nunca é
+#     repetida pelo aquecimento;
+#   - o registro guarda no máximo MAXIMO_ENTRADAS linhas por tabela.
+#
+# O registro é acessório: falhas do SQLite ou do disco (diretório somente
+# leitura, banco travado, disco cheio) são ignoradas e nunca atrapalham a
+# busca. Se o banco não abrir, o registro fica desligado: nada é contado e
+# não há consultas nem artigos populares.
+
+CAMINHO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), DIRETORIO_INDICE, "uso.sqlite3")
+
+TAMANHO_MAXIMO_CONSULTA = 80  # caracteres
+MINIMO_OCORRENCIAS = 3
+MAXIMO_ENTRADAS = 5000
+
+PADRAO_DADO_PESSOAL = re.compile(r'@|\d(?:[\d.\-/ ]*\d){6,}')
+PADRAO_ESPACOS = re.compile(r'\s+')
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS consultas (
+    consulta TEXT PRIMARY KEY,
+    contagem INTEGER NOT NULL,
+    dia INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artigos (
+    arquivo TEXT NOT NULL,
+    hash_texto TEXT NOT NULL,
+    indice INTEGER NOT NULL,
+    no INTEGER NOT NULL,
+    contagem INTEGER NOT NULL,
+    dia INTEGER NOT NULL,
+    PRIMARY KEY (arquivo, hash_texto)
+);
+"""
+
+
+def normalizar_consulta(termo_pesquisa):
+    """
+    Consulta como é registrada (espaços colapsados), ou None se não deve ser
+    registrada. Maiúsculas são mantidas: os operadores (OR, NOT...) dependem delas.
+    """
+    consulta = PADRAO_ESPACOS.sub(" ", termo_pesquisa).strip()
+    if not consulta or len(consulta) > TAMANHO_MAXIMO_CONSULTA or PADRAO_DADO_PESSOAL.search(consulta):
+        return None
+    return consulta
+
+
+def _dia():
+    return int(time.time() // 86400)
+
+
+class RegistroUso:
+    """Contagens agregadas de consultas e artigos explicados, em SQLite (thread-safe)."""
+
+    def __init__(self, caminho=CAMINHO_PADRAO, maximo_entradas=MAXIMO_ENTRADAS):
+        self.caminho = caminho
+        self.maximo_entradas = maximo_entradas
+        self._trava = threading.Lock()
+        self._conexao = None
+        try:
+            diretorio = os.path.dirname(caminho)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            conexao = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+            with conexao:
+                conexao.execute("PRAGMA journal_mode=WAL")
+                conexao.executescript(ESQUEMA)
+        except (OSError, sqlite3.Error):
+            return  # registro desligado
+        self._conexao = conexao
+
+    @property
+    def ativo(self):
+        """False se o banco não pôde ser aberto (nada é registrado)."""
+        return self._conexao is not None
+
+    def registrar_consulta(self, termo_pesquisa):
+        """Conta mais um uso da consulta (se ela puder ser registrada)."""
+        consulta = normalizar_consulta(termo_pesquisa)
+        if consulta is None or self._conexao is None:
+            return
+        try:
+            with self._trava, self._conexao:
+                self._conexao.execute(
+                    "INSERT INTO consultas VALUES (?, 1, ?) "
+                    "ON CONFLICT(consulta) DO UPDATE SET contagem = contagem + 1, dia = excluded.dia",
+                    (consulta, _dia())
+                )
+                self._remover_excesso("consultas")
+        except sqlite3.Error:
+            pass
+
+    def registrar_artigo(self, arquivo, hash_texto, indice, no=-1):
+        """
+        Conta mais um pedido de explicação do artigo (ou trecho, com `no`).
+        A chave é o hash do texto; `indice`/`no` (ver motor.referencia) são
+        só o endereço mais recente, conferido pelo hash antes de ser usado.
+        """
+        if self._conexao is None:
+            return
+        try:
+            with self._trava, self._conexao:
+                self._conexao.execute(
+                    "INSERT INTO artigos VALUES (?, ?, ?, ?, 1, ?) "
+                    "ON CONFLICT(arquivo, hash_texto) DO UPDATE SET contagem = contagem + 1, "
+                    "indice = excluded.indice, no = excluded.no, dia = excluded.dia",
+                    (arquivo, hash_texto, indice, no, _dia())
+                )
+                self._remover_excesso("artigos")
+        except sqlite3.Error:
+            pass
+
+    def consultas_populares(self, n, minimo=MINIMO_OCORRENCIAS):
+        """As n consultas mais usadas (com pelo menos `minimo` usos), da mais para a menos usada."""
+        if self._conexao is None:
+            return []
+        try:
+            with self._trava:
+                linhas = self._conexao.execute(
+                    "SELECT consulta FROM consultas WHERE contagem >= ? "
+                    "ORDER BY contagem DESC, dia DESC LIMIT ?", (minimo, n)
+                ).fetchall()
+        except sqlite3.Error:
+            return []
+        return [consulta for (consulta,) in linhas]
+
+    def artigos_populares(self, n, minimo=MINIMO_OCORRENCIAS):
+        """Os n artigos mais explicados: lista de (arquivo, hash_texto, indice, no)."""
+        if self._conexao is None:
+            return []
+        try:
+            with self._trava:
+                return self._conexao.execute(
+                    "SELECT arquivo, hash_texto, indice, no FROM artigos WHERE contagem >= ? "
+                    "ORDER BY contagem DESC, dia DESC LIMIT ?", (minimo, n)
+                ).fetchall()
+        except sqlite3.Error:
+            return []
+
+    def _remover_excesso(self, tabela):
+        (total,) = self._conexao.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()
+        if total <= self.maximo_entradas:
+            return
+        # Saem primeiro as menos usadas e, entre elas, as mais antigas
+        self._conexao.execute(
+            f"DELETE FROM {tabela} WHERE rowid IN "
+            f"(SELECT rowid FROM {tabela} ORDER BY contagem, dia LIMIT ?)",
+            (total - self.maximo_entradas,)
+        )
+
+
+_REGISTRO = None
+_TRAVA = threading.Lock()
+
+
+def obter_registro_uso():
+    """Instância única do registro no processo."""
+    global _REGISTRO
+    with _TRAVA:
+        if _REGISTRO is None:
+            _REGISTRO = RegistroUso()
+    return _REGISTRO
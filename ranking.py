@@ -0,0 +1,87 @@
+import math
+import heapq
+
+from indice import obter_indice
+from consultas import buscar_ids
+
+# =========================================================================
+# RANKING BM25 (TOP-K)
+# =========================================================================
+#
+# Em vez de devolver TODOS os artigos encontrados na ordem do arquivo, o modo
+# de relevância pontua cada artigo com BM25 e mantém apenas os K melhores em
+# um heap de tamanho fixo. Só esses K artigos viram preview/label, então o
+# trabalho de exibição e a memória ficam limitados por K, não pelo total de
+# resultados.
+#
+# - tf: ocorrências do termo no artigo, contadas nas listas de posições do
+#   índice invertido, sem reler o texto (exceto termos com pontuação ou
+#   muito comuns; ver IndiceInvertido.contagens);
+# - df: número de artigos da lei que contêm o termo (via cache de consultas);
+# - comprimento: número de tokens do artigo (do índice invertido).
+
+ORDEM_RELEVANCIA = "relevancia"
+ORDEM_DOCUMENTO = "documento"
+
+TOP_K_PADRAO = 20
+K1 = 1.2
+B = 0.75
+
+
+def idf(total_artigos, frequencia_documentos):
+    """IDF do BM25 (variante sempre positiva)."""
+    return math.log((total_artigos - frequencia_documentos + 0.5) / (frequencia_documentos + 0.5) + 1.0)
+
+
+def top_k_bm25(nome_arquivo, sigla_lei, termos, ids, k=TOP_K_PADRAO):
+    """
+    Os k artigos (entre `ids`) com maior pontuação BM25 para os termos.
+    Retorna uma lista de pares (pontuacao, indice_do_artigo), do maior para o menor.
+    """
+    if k <= 0 or not ids:
+        return []
+
+    indice = obter_indice(nome_arquivo, sigla_lei)
+    corpus = indice.corpus
+    media = indice.comprimento_medio or 1.0
+
+    pesos = []
+    for termo in set(termos):
+        peso = idf(corpus.total, len(buscar_ids(nome_arquivo, sigla_lei, [termo])))
+        contagens = indice.contagens(termo, ids)
+        if contagens is None:
+            # Pontuação ou termo muito comum: conta direto no texto
+            contagens = {i: corpus.contar(i, termo) for i in ids}
+        pesos.append((peso, contagens))
+
+    # Heap mínimo de tamanho k: o topo é o pior dos k melhores até agora
+    melhores = []
+    for i in ids:
+        normalizacao = K1 * (1.0 - B + B * indice.comprimentos[i] / media)
+        pontuacao = 0.0
+        for peso, contagens in pesos:
+            tf = contagens[i]
+            pontuacao += peso * tf * (K1 + 1.0) / (tf + normalizacao)
+
+        # Em caso de empate, o artigo que aparece antes no texto vence
+        item = (pontuacao, -i)
+        if len(melhores) < k:
+            heapq.heappush(melhores, item)
+        elif item > melhores[0]:
+            heapq.heapreplace(melhores, item)
+
+    return [(pontuacao, -negativo) for pontuacao, negativo in sorted(melhores, reverse=True)]
+
+
+def mesclar_top_k(pontuados_por_lei, k=TOP_K_PADRAO):
+    """
+    Junta os top-k de cada lei no top-k geral.
+    `pontuados_por_lei`: {chave_da_lei: [(pontuacao, item), ...]}.
+    Retorna [(pontuacao, chave_da_lei, item), ...] do maior para o menor.
+    """
+    candidatos = (
+        (pontuacao, chave, item)
+        for chave, pontuados in pontuados_por_lei.items()
+        for pontuacao, item in pontuados
+    )
+    return heapq.nlargest(k, candidatos, key=lambda c: c[0])
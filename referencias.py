@@ -0,0 +1,335 @@
+import os
+import re
+import sys
+import bisect
+import threading
+from array import array
+
+from corpus import obter_corpus, dividir_artigos
+from estrutura import PADRAO_ADCT
+from metricas import fase
+
+# =========================================================================
+# GRAFO DE REFERÊNCIAS CRUZADAS ENTRE ARTIGOS
+# =========================================================================
+#
+# Uma passada pelo texto de cada artigo extrai as citações ("nos termos do
+# art. 5º", "arts. 1.272 e 1.273", "art. 299 do Código Penal", "art. 611-A
+# desta Consolidação") e resolve cada uma para um artigo concreto (lei,
+# índice). Citações de leis que não estão carregadas ("art. 72 da Lei nº
+# 8.213") são descartadas.
+#
+# O grafo guarda as duas direções em formato CSR (compressed sparse row):
+# os artigos de todas as leis recebem ids globais consecutivos, e
+#   citados[inicio_citados[no]:inicio_citados[no + 1]]
+# são os artigos citados por `no` (igualmente para citantes). "Cita" e
+# "citado por" custam uma fatia de array por artigo, sem varrer o texto.
+#
+# Números repetidos na mesma lei (o ADCT da Constituição recomeça do art. 1º)
+# são resolvidos pela parte: uma citação sem qualificador vai para a parte do
+# artigo que cita (de dentro do ADCT, "art. 2º" é o art. 2º do ADCT); uma
+# citação que menciona o Ato das Disposições Transitórias vai para o ADCT e
+# uma que menciona a Constituição ("desta Constituição"), para o corpo dela. Se a parte não tem
+# artigo com aquele número, vale o da outra parte.
+#
+# Limitação conhecida: a extração é heurística (incisos, parágrafos e
+# alíneas são ignorados; só o artigo importa).
+
+# Nomes pelos quais cada lei é citada nas outras (em minúsculas, sem artigo)
+NOMES_LEIS = {
+    "CF": (r"constitui[çc][ãa]o(?: federal| da rep[úu]blica)?", r"carta magna"),
+    "CC": (r"c[óo]digo civil", r"lei n[º°o.]*\s*10\.406"),
+    "CP": (r"c[óo]digo penal", r"decreto-lei n[º°o.]*\s*2\.848"),
+    "CPC": (r"c[óo]digo de processo civil", r"lei n[º°o.]*\s*13\.105"),
+    "CPP": (r"c[óo]digo de processo penal", r"decreto-lei n[º°o.]*\s*3\.689"),
+    "CDC": (r"c[óo]digo de defesa do consumidor", r"lei n[º°o.]*\s*8\.078"),
+    "CTN": (r"c[óo]digo tribut[áa]rio nacional", r"lei n[º°o.]*\s*5\.172"),
+    "CLT": (r"consolida[çc][ãa]o das leis do trabalho", r"clt\b", r"decreto-lei n[º°o.]*\s*5\.452"),
+    "ECA": (r"estatuto da crian[çc]a e do adolescente", r"eca\b", r"lei n[º°o.]*\s*8\.069"),
+}
+NOME_ADCT = r"ato das disposi[çc][õo]es constitucionais transit[óo]rias|adct\b"
+
+# Início de uma citação: "art.", "arts.", "artigo", "artigos"
+PADRAO_INICIO = re.compile(r'\b[Aa]rt(?:igos?\b|s?\.)\s*')
+
+# Itens da lista que segue "arts.": números de artigo (ex.: "5º", "1.228",
+# "611-A") e as subdivisões que podem aparecer entre eles (ignoradas)
+PADRAO_ITEM = re.compile(r'''
+    \s*(?P<separador>,|\be\b|\bou\b|\ba\b)?\s*
+    (?:
+        (?P<numero>\d{1,3}(?:\.\d{3})*)(?:\s*[º°o](?![a-z]))?(?P<sufixo>-[A-Z]{1,2}\b)?
+      | (?P<paragrafo>§+\s*\d+\s*[º°o]?)
+      | \b(?:caput|par[áa]grafo\s+[úu]nico|incisos?|inc\.|al[íi]neas?|itens?)\b
+      | \b[IVXLC]+\b
+      | "[a-z]"
+      | \b[a-z]\)
+    )
+''', re.VERBOSE)
+
+# O que vem depois da lista: "desta Lei", ", do Código Penal", "da Lei nº ..."
+PADRAO_QUALIFICADOR = re.compile(
+    r'\s*,?\s*(?:(?P<mesma>dest[ae]|nest[ae])\s+(?P<propria>[\w-]+)|d[oa]s?\s+(?:referid[oa]\s+)?(?P<nome>[^,;:()]{0,80}))',
+    re.IGNORECASE,
+)
+PADRAO_NOMES = {
+    sigla: re.compile("|".join(nomes), re.IGNORECASE) for sigla, nomes in NOMES_LEIS.items()
+}
+PADRAO_ADCT_CITADO = re.compile(NOME_ADCT, re.IGNORECASE)
+# Outras normas: a citação é de uma lei que não está no grafo
+PADRAO_OUTRA_NORMA = re.compile(
+    r'(?:lei|decreto|medida provis[óo]ria|emenda|resolu[çc][ãa]o|regulamento|portaria|'
+    r'instru[çc][ãa]o|conven[çc][ãa]o|tratado|c[óo]digo|estatuto|consolida[çc][ãa]o|constitui[çc][ãa]o)\b',
+    re.IGNORECASE,
+)
+
+# Complemento do número no início do texto do artigo (ex.: "º", "-A")
+PADRAO_COMPLEMENTO = re.compile(r'[º°o]?((?:-[A-Z]+)*)')
+
+# O mesmo complemento seguido da pontuação que separa o número do texto
+PADRAO_ABERTURA = re.compile(r'(?:[º°]|o\b)?(?:-[A-Z]+)*[\s.\-–]*')
+
+# Listas como "arts. 1º a 5º" são expandidas até este tamanho
+MAXIMO_INTERVALO = 50
+
+
+def chave_numero(numero, sufixo=""):
+    """Chave de um número de artigo: '1.228' -> '1228', '611' + '-A' -> '611-A'."""
+    return numero.replace(".", "") + sufixo.upper()
+
+
+def numero_completo(corpus, i):
+    """Número do artigo com o sufixo que fica no início do texto, ex.: 'Art. 452-F'."""
+    sufixo = PADRAO_COMPLEMENTO.match(corpus.texto(i)).group(1)
+    return corpus.numero(i).rstrip(".") + sufixo
+
+
+def texto_sem_numero(corpus, i):
+    """Texto normalizado do artigo sem o complemento do número, ex.: 'As verbas...' em vez de '-F. As verbas...'."""
+    texto = corpus.texto_normalizado(i)[0]
+    return texto[PADRAO_ABERTURA.match(texto).end():]
+
+
+def chave_artigo(corpus, i):
+    """Chave (ver chave_numero) do artigo `i` do corpus."""
+    return chave_numero(numero_completo(corpus, i).replace("Art.", "").strip())
+
+
+def inicio_adct(corpus):
+    """Índice do primeiro artigo do ADCT na lei (corpus.total se ela não tem ADCT)."""
+    conteudo = corpus.conteudo()
+    m = PADRAO_ADCT.search(conteudo)
+    if m is None:
+        return corpus.total
+    return sum(1 for numero_ini, _, _, _ in dividir_artigos(conteudo) if numero_ini < m.start())
+
+
+def escolher_na_parte(indices, inicio, no_adct):
+    """Primeiro dos `indices` (artigos com o mesmo número) na parte pedida, ou o primeiro de todos."""
+    for i in indices:
+        if (i >= inicio) == no_adct:
+            return i
+    return indices[0]
+
+
+def extrair_citacoes(texto):
+    """
+    Citações de artigos no texto, como pares (chave_numero, destino):
+    destino é a sigla da lei citada, "" para a própria lei, "ADCT" para o
+    Ato das Disposições Constitucionais Transitórias ou None para outras normas.
+    """
+    citacoes = []
+    for inicio in PADRAO_INICIO.finditer(texto):
+        pos = inicio.end()
+        numeros = []
+        em_paragrafo = False
+        while True:
+            m = PADRAO_ITEM.match(texto, pos)
+            if m is None or (m.group('separador') and not numeros):
+                break
+            pos = m.end()
+            if m.group('paragrafo'):
+                em_paragrafo = True
+            elif m.group('numero'):
+                # "§§ 1º e 2º": números pequenos logo após um § são parágrafos
+                valor = int(m.group('numero').replace(".", ""))
+                if em_paragrafo and valor < 10:
+                    continue
+                em_paragrafo = False
+                chave = chave_numero(m.group('numero'), m.group('sufixo') or "")
+                if m.group('separador') == "a" and numeros and numeros[-1].isdigit() and chave.isdigit():
+                    # Intervalo "arts. 1º a 5º"
+                    primeiro = int(numeros[-1])
+                    if 0 < valor - primeiro <= MAXIMO_INTERVALO:
+                        numeros.extend(str(n) for n in range(primeiro + 1, valor + 1))
+                        continue
+                numeros.append(chave)
+        if not numeros:
+            continue
+
+        destino = ""
+        q = PADRAO_QUALIFICADOR.match(texto, pos)
+        if q is not None:
+            if q.group('mesma'):
+                propria = q.group('propria').lower()
+                if propria == "ato":
+                    destino = "ADCT"
+                elif PADRAO_NOMES["CF"].match(propria):
+                    destino = "CF"  # "desta Constituição", inclusive de dentro do ADCT: o corpo
+            else:
+                nome = q.group('nome')
+                if PADRAO_ADCT_CITADO.match(nome):
+                    destino = "ADCT"
+                else:
+                    for sigla, padrao in PADRAO_NOMES.items():
+                        if padrao.match(nome):
+                            destino = sigla
+                            break
+                    else:
+                        if PADRAO_OUTRA_NORMA.match(nome):
+                            destino = None
+        citacoes.extend((numero, destino) for numero in numeros)
+    return citacoes
+
+
+class GrafoReferencias:
+    """Citações entre os artigos de um conjunto de leis, nas duas direções (CSR)."""
+
+    def __init__(self, corpora, siglas):
+        """`corpora`: lista de CorpusLei; `siglas`: a sigla de cada lei (ex.: "CLT")."""
+        self.corpora = list(corpora)
+        self.arquivos = [corpus.nome_arquivo for corpus in self.corpora]
+        # Id global do primeiro artigo de cada lei
+        self.bases = array('I', [0])
+        for corpus in self.corpora:
+            self.bases.append(self.bases[-1] + corpus.total)
+        self.total = self.bases[-1]
+
+        # chave do número -> índices dos artigos com esse número, por lei
+        numeros = []
+        for corpus in self.corpora:
+            por_chave = {}
+            for i in range(corpus.total):
+                por_chave.setdefault(chave_artigo(corpus, i), []).append(i)
+            numeros.append(por_chave)
+        # Primeiro artigo do ADCT de cada lei (só a Constituição tem)
+        inicios_adct = [inicio_adct(corpus) for corpus in self.corpora]
+        lei_por_sigla = {sigla: k for k, sigla in enumerate(siglas)}
+
+        arestas = set()
+        for k, corpus in enumerate(self.corpora):
+            for i in range(corpus.total):
+                origem = self.bases[k] + i
+                for chave, destino in extrair_citacoes(corpus.texto(i)):
+                    if destino is None:
+                        continue
+                    if destino == "ADCT":
+                        lei = lei_por_sigla.get("CF")
+                    elif destino:
+                        lei = lei_por_sigla.get(destino)
+                    else:
+                        lei = k
+                    if lei is None:
+                        continue
+                    indices = numeros[lei].get(chave)
+                    if not indices:
+                        continue
+                    if destino == "ADCT":
+                        no_adct = True
+                    elif destino:
+                        no_adct = False
+                    else:
+                        no_adct = i >= inicios_adct[k]  # a mesma parte do artigo que cita
+                    alvo = self.bases[lei] + escolher_na_parte(indices, inicios_adct[lei], no_adct)
+                    if alvo != origem:
+                        arestas.add((origem, alvo))
+
+        self.inicio_citados, self.citados = self._csr(sorted(arestas))
+        self.inicio_citantes, self.citantes = self._csr(sorted((b, a) for a, b in arestas))
+
+    def _csr(self, arestas):
+        """Arrays (inicios, vizinhos) a partir de arestas (origem, destino) ordenadas."""
+        inicios = array('I', [0]) * (self.total + 1)
+        vizinhos = array('I', (destino for _, destino in arestas))
+        for origem, _ in arestas:
+            inicios[origem + 1] += 1
+        for no in range(self.total):
+            inicios[no + 1] += inicios[no]
+        return inicios, vizinhos
+
+    def no(self, nome_arquivo, i):
+        """Id global do artigo `i` da lei."""
+        return self.bases[self.arquivos.index(nome_arquivo)] + i
+
+    def artigo(self, no):
+        """(nome_arquivo, índice) do id global."""
+        k = bisect.bisect_right(self.bases, no) - 1
+        return self.arquivos[k], no - self.bases[k]
+
+    def cita(self, nome_arquivo, i):
+        """Artigos (nome_arquivo, índice) citados pelo artigo `i` da lei."""
+        no = self.no(nome_arquivo, i)
+        return [self.artigo(v) for v in self.citados[self.inicio_citados[no]:self.inicio_citados[no + 1]]]
+
+    def citado_por(self, nome_arquivo, i):
+        """Artigos (nome_arquivo, índice) que citam o artigo `i` da lei."""
+        no = self.no(nome_arquivo, i)
+        return [self.artigo(v) for v in self.citantes[self.inicio_citantes[no]:self.inicio_citantes[no + 1]]]
+
+    def __len__(self):
+        return len(self.citados)
+
+
+# =========================================================================
+# REGISTRO COMPARTILHADO
+# =========================================================================
+
+_GRAFOS = {}
+_TRAVA = threading.Lock()
+
+
+def obter_grafo(leis):
+    """
+    Grafo de referências entre as leis `leis` (tupla de pares (nome_arquivo,
+    sigla)), construído uma vez por processo e refeito quando alguma das leis
+    muda de versão. Leis cujo arquivo não existe ficam de fora.
+    """
+    corpora = []
+    siglas = []
+    for nome_arquivo, sigla in leis:
+        try:
+            corpora.append(obter_corpus(nome_arquivo, sigla))
+        except FileNotFoundError:
+            continue
+        siglas.append(sigla)
+    chave = tuple((os.path.abspath(corpus.nome_arquivo), corpus.versao) for corpus in corpora)
+
+    grafo = _GRAFOS.get(chave)
+    if grafo is not None:
+        return grafo
+    with _TRAVA:
+        grafo = _GRAFOS.get(chave)
+        if grafo is None:
+            with fase("referencias.construcao"):
+                grafo = GrafoReferencias(corpora, siglas)
+            # Só a versão atual das leis interessa
+            _GRAFOS.clear()
+            _GRAFOS[chave] = grafo
+    return grafo
+
+
+if __name__ == "__main__":
+    # Uso: python referencias.py SIGLA NUMERO  (ex.: python referencias.py CLT 477)
+    from motor import LEIS_CONFIG
+
+    leis = tuple((config['file'], config['sigla']) for config in LEIS_CONFIG.values())
+    grafo = obter_grafo(leis)
+    print(f"{len(grafo)} citações entre {grafo.total} artigos")
+    if len(sys.argv) == 3:
+        sigla_por_arquivo = dict(leis)
+        arquivo = next(nome for nome, sigla in leis if sigla == sys.argv[1].upper())
+        corpus = obter_corpus(arquivo)
+        i = next(i for i in range(corpus.total) if chave_artigo(corpus, i) == chave_numero(sys.argv[2]))
+        for titulo, artigos in (("Cita", grafo.cita(arquivo, i)), ("Citado por", grafo.citado_por(arquivo, i))):
+            print(f"{titulo} ({len(artigos)}):")
+            for nome, j in artigos:
+                print(f"  {sigla_por_arquivo[nome]} - {obter_corpus(nome).numero(j)}")
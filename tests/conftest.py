@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos do projeto ficam soltos na raiz do repositório (sem pacote)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture
+def na_raiz(monkeypatch):
+    """Roda o teste com a raiz do repositório como diretório atual (onde ficam as leis)."""
+    monkeypatch.chdir(RAIZ)
+    return RAIZ
+
+
+@pytest.fixture
+def lei_temporaria(tmp_path):
+    """
+    Grava uma lei pequena em um diretório temporário (o arquivo pré-compilado
+    fica no .indice de lá) e retorna o caminho. Chamar de novo com outro
+    texto reescreve o mesmo arquivo, como uma edição da lei.
+    """
+    caminho = tmp_path / "lei.txt"
+
+    def escrever(texto):
+        caminho.write_text(texto, encoding="utf-8")
+        return str(caminho)
+
+    return escrever
@@ -0,0 +1,41 @@
+import aquecimento
+from consultas import CACHE_CONSULTAS, TAMANHO_CACHE_CONSULTAS, entradas_cache
+from motor import LEIS_CONFIG
+
+
+class RegistroFalso:
+    def __init__(self, consultas):
+        self.consultas = consultas
+
+    def consultas_populares(self, n):
+        return self.consultas[:n]
+
+
+def test_entradas_cache():
+    assert entradas_cache("prazo") == 1
+    assert entradas_cache("prazo, recurso") == 3
+    assert entradas_cache("prazo, prazo") == 1
+    assert entradas_cache("prazo OR recurso") == 3
+    assert entradas_cache(" , ") == 0
+
+
+def test_aquecimento_cabe_no_cache(monkeypatch):
+    buscadas = []
+    monkeypatch.setattr(aquecimento, "buscar", lambda consulta, ordem: buscadas.append(consulta))
+    consultas = [f"termo{n}, outro{n}" for n in range(50)] + ["prazo OR", "prazo"]
+
+    refeitas = aquecimento.aquecer_consultas(RegistroFalso(consultas), len(consultas))
+
+    ocupadas = sum(entradas_cache(c) for c in buscadas) * len(LEIS_CONFIG)
+    assert refeitas == len(buscadas)
+    assert "prazo OR" not in buscadas  # malformada
+    assert ocupadas <= TAMANHO_CACHE_CONSULTAS * aquecimento.FRACAO_CACHE_AQUECIMENTO
+    assert "prazo" in buscadas  # barata: ainda cabe depois das caras
+
+
+def test_aquecimento_nao_expulsa_as_proprias_entradas(na_raiz):
+    # A estimativa de entradas_cache não pode ficar abaixo do que a busca ocupa de fato
+    populares = ["prazo", "dano moral", "contrato, rescisão", "férias", "lei, prazo", "recurso OR apelação"]
+    CACHE_CONSULTAS.limpar()
+    aquecimento.aquecer_consultas(RegistroFalso(populares), len(populares))
+    assert 0 < len(CACHE_CONSULTAS) <= sum(entradas_cache(c) for c in populares) * len(LEIS_CONFIG)
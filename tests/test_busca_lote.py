@@ -0,0 +1,40 @@
+import json
+
+from busca_lote import ler_consultas, main
+
+
+def test_ler_consultas():
+    linhas = [
+        "dano moral\n",
+        "\n",
+        '{"id": "a1", "consulta": "habeas corpus"}\n',
+        '{"id": "a2", "texto": "sem consulta"}\n',
+        '{"id": "a3", "consulta": 42}\n',
+        '{"consulta": \n',
+    ]
+    lidas = list(ler_consultas(linhas))
+
+    assert lidas[:2] == [(1, "dano moral", None), ("a1", "habeas corpus", None)]
+    assert [(id_consulta, consulta) for id_consulta, consulta, _ in lidas[2:]] == [("a2", None), ("a3", None), (6, None)]
+    assert all(erro for _, _, erro in lidas[2:])
+
+
+def test_linha_invalida_nao_interrompe_o_lote(na_raiz, tmp_path):
+    entrada = tmp_path / "consultas.jsonl"
+    entrada.write_text(
+        '{"id": 1, "consulta": "habeas corpus"}\n'
+        '{"id": 2}\n'
+        '{"id": 3, "consulta": \n'
+        'prazo, recurso\n',
+        encoding="utf-8",
+    )
+    saida = tmp_path / "resultados.jsonl"
+
+    assert main([str(entrada), "-o", str(saida), "-p", "1", "--leis", "CF,CPP", "--limite", "2"]) == 0
+
+    linhas = [json.loads(linha) for linha in saida.read_text(encoding="utf-8").splitlines()]
+    assert [linha["id"] for linha in linhas] == [1, 2, 3, 4]
+    assert linhas[0]["total"] > 0 and "erro" not in linhas[0]
+    assert linhas[1]["consulta"] is None and "consulta" in linhas[1]["erro"]
+    assert linhas[2]["consulta"] is None and linhas[2]["erro"].startswith("JSON inválido")
+    assert linhas[3]["consulta"] == "prazo, recurso"
@@ -0,0 +1,47 @@
+from cache_explicacoes import CacheExplicacoes
+
+MODELO = "modelo"
+
+
+def test_guarda_e_obtem(tmp_path):
+    cache = CacheExplicacoes(str(tmp_path / "explicacoes.sqlite3"))
+    assert cache.obter("Art. 1", MODELO, 1) is None
+    cache.guardar("Art. 1", MODELO, 1, "explicação", "lei.txt")
+
+    assert cache.obter("Art. 1", MODELO, 1) == "explicação"
+    assert cache.obter("Art. 1", MODELO, 2) is None  # outra versão do prompt
+    assert cache.estatisticas()["entradas"] == 1
+
+
+def test_diretorio_invalido_desliga_o_cache(tmp_path):
+    arquivo = tmp_path / "nao_e_diretorio"
+    arquivo.write_text("")
+    cache = CacheExplicacoes(str(arquivo / "explicacoes.sqlite3"))
+
+    assert not cache.ativo
+    cache.guardar("Art. 1", MODELO, 1, "explicação")
+    assert cache.obter("Art. 1", MODELO, 1) is None
+    assert not cache.contem("Art. 1", MODELO, 1)
+    assert cache.invalidar_lei("lei.txt", set()) == 0
+    assert cache.estatisticas()["entradas"] == 0
+
+
+def test_banco_corrompido_desliga_o_cache(tmp_path):
+    caminho = tmp_path / "explicacoes.sqlite3"
+    caminho.write_bytes(b"isto nao e um banco sqlite" * 100)
+    cache = CacheExplicacoes(str(caminho))
+
+    assert not cache.ativo
+    assert cache.obter("Art. 1", MODELO, 1) is None
+
+
+def test_erro_do_sqlite_conta_como_falta(tmp_path):
+    cache = CacheExplicacoes(str(tmp_path / "explicacoes.sqlite3"))
+    cache.guardar("Art. 1", MODELO, 1, "explicação")
+    cache._conexao.close()  # qualquer operação passa a levantar sqlite3.Error
+
+    assert cache.obter("Art. 1", MODELO, 1) is None
+    assert not cache.contem("Art. 1", MODELO, 1)
+    cache.guardar("Art. 2", MODELO, 1, "outra")
+    assert cache.invalidar_lei("lei.txt", set()) == 0
+    assert cache.estatisticas()["entradas"] == 0
@@ -0,0 +1,99 @@
+import pytest
+
+from consultas import CACHE_CONSULTAS, ConsultaInvalida, analisar_consulta, buscar_ids, extrair_termos
+from indice import obter_indice
+
+# Operadores de consulta: a árvore de analisar_consulta e a avaliação dela
+# no índice invertido (IndiceInvertido.avaliar), sobre uma lei pequena.
+
+ARQUIVO = "constituicao.txt"
+SIGLA = "CF"
+
+LEI = """LEI DE TESTE
+
+Art. 1º O prazo do recurso é de quinze dias.
+Art. 2º O prazo para a contestação é de trinta dias.
+Art. 3º A contribuição social incide sobre a folha.
+Art. 4º O contribuinte paga o tributo.
+Art. 5º Alfa um dois três beta.
+Art. 6º Beta gama alfa.
+"""
+
+
+def frase(texto):
+    return ("frase", texto)
+
+
+@pytest.fixture
+def avaliar(lei_temporaria):
+    indice = obter_indice(lei_temporaria(LEI), "TST")
+    return lambda consulta: indice.avaliar(analisar_consulta(consulta))
+
+
+def test_chave_de_expressao_nao_colide_com_lista_de_termos(na_raiz):
+    expressao = ("frase", "prazo")
+    termos = extrair_termos("frase, prazo")
+    assert expressao == tuple(termos)  # mesmas tuplas, consultas diferentes
+
+    CACHE_CONSULTAS.limpar()
+    por_expressao = buscar_ids(ARQUIVO, SIGLA, [], expressao=expressao)
+    por_termos = buscar_ids(ARQUIVO, SIGLA, termos)
+    assert por_expressao == buscar_ids(ARQUIVO, SIGLA, ["prazo"])
+    assert set(por_termos) <= set(por_expressao)
+    assert por_termos != por_expressao
+
+
+def test_sem_operadores_segue_o_caminho_comum():
+    assert analisar_consulta("dignidade da pessoa humana") is None
+    assert analisar_consulta("prazo, (recurso)") is None
+    assert analisar_consulta("prazo or recurso") is None  # só em maiúsculas
+
+
+@pytest.mark.parametrize("consulta, arvore", [
+    ("a OR b, c", ("ou", (frase("a"), ("e", (frase("b"), frase("c")))))),
+    ("(a OR b), c", ("e", (("ou", (frase("a"), frase("b"))), frase("c")))),
+    ("NOT a NEAR/2 b", ("nao", ("perto", 2, frase("a"), frase("b")))),
+    ("a, NOT b", ("e", (frase("a"), ("nao", frase("b"))))),
+    ("a OR b OR c", ("ou", (frase("a"), frase("b"), frase("c")))),
+    ("Contribu* Soc*", ("curinga", (("contribu", True), ("soc", True)))),
+])
+def test_precedencia(consulta, arvore):
+    assert analisar_consulta(consulta) == arvore
+
+
+@pytest.mark.parametrize("consulta", [
+    "OR", "NOT", "NEAR/3", "prazo OR", "OR prazo", "prazo NOT", "prazo NEAR/3", "NEAR/3 prazo",
+    "prazo)) OR (dano", "(prazo OR dano", "prazo OR dano)", "() OR prazo",
+])
+def test_consulta_malformada_e_recusada(consulta):
+    with pytest.raises(ConsultaInvalida):
+        analisar_consulta(consulta)
+
+
+def test_or_e_precedencia_na_avaliacao(avaliar):
+    assert avaliar("recurso OR contribuição, folha") == [0, 2]
+    assert avaliar("(recurso OR contribuição), folha") == [2]
+
+
+def test_not(avaliar):
+    assert avaliar("prazo NOT recurso") == [1]
+    assert avaliar("prazo, NOT recurso") == [1]
+    assert avaliar("NOT prazo") == [2, 3, 4, 5]
+
+
+def test_curinga_usa_palavras_inteiras(avaliar):
+    assert avaliar("tribu*") == [3]            # "tributo", não "contribuição"/"contribuinte"
+    assert avaliar("contribu* soc*") == [2]
+    assert avaliar("dias, tribu*") == []
+    assert avaliar("contribui* OR tribu*") == [2, 3]
+
+
+def test_near_conta_palavras_entre_os_trechos(avaliar):
+    # Art. 5: "alfa um dois três beta" -> 3 palavras entre alfa e beta
+    # (max(inícios) - min(fins) = 4 - 1); Art. 6: "beta gama alfa" -> 1
+    assert avaliar("alfa NEAR/3 beta") == [4, 5]
+    assert avaliar("alfa NEAR/2 beta") == [5]
+    assert avaliar("beta NEAR/2 alfa") == [5]
+    assert avaliar("gama NEAR/0 alfa") == [5]
+    assert avaliar("alfa NEAR/0 beta") == []
+    assert avaliar("(um OR gama) NEAR/0 alfa") == [4, 5]
@@ -0,0 +1,48 @@
+import unicodedata
+
+import pytest
+
+from corpus import MAPA_VAZIO, dobrar, dobrar_com_mapa, para_dobrado, para_original
+
+# Dobra de acentos e mapa de posições entre o texto dobrado e o original
+# (base do destaque dos termos nos trechos, ver motor.trecho_kwic).
+
+TEXTOS = [
+    "Órgão da União",
+    unicodedata.normalize("NFD", "Órgão da União, ação e ônus"),  # acentos como marcas combinantes
+    "Straße ﬁscal Ǆ",                                              # ß, ligadura e dígrafo: mesmo tamanho
+    "İstanbul e İ",                                                # lower() de İ é i + ponto combinante
+    "á̀̂b c",                                      # várias marcas seguidas
+    "́inicio e fiḿ",                                    # marca solta nas pontas
+    "texto কো বৌ misto",                                           # vira dois caracteres dobrado
+]
+
+
+def test_dobrar():
+    assert dobrar("Órgão da União") == "orgao da uniao"
+    assert dobrar("AÇÃO") == "acao"
+    assert dobrar(unicodedata.normalize("NFD", "Ação")) == "acao"
+    assert dobrar("Straße") == "straße"
+
+
+def test_mapa_vazio_quando_as_posicoes_coincidem():
+    assert dobrar_com_mapa("Órgão da União, AÇÃO") == ("orgao da uniao, acao", MAPA_VAZIO)
+
+
+@pytest.mark.parametrize("texto", TEXTOS)
+def test_ida_e_volta_das_posicoes(texto):
+    dobrado, mapa = dobrar_com_mapa(texto)
+    assert dobrado == dobrar(texto)
+
+    # Posições do dobrado que correspondem a uma fronteira do original
+    fronteiras = sorted({para_dobrado(mapa, p) for p in range(len(texto) + 1)})
+    assert fronteiras[0] == 0 and fronteiras[-1] == len(dobrado)
+    for q in fronteiras:
+        assert para_dobrado(mapa, para_original(mapa, q)) == q
+
+    # Um trecho do dobrado (ex.: o termo encontrado) volta para os caracteres
+    # originais que, dobrados, dão exatamente o mesmo trecho
+    for a in fronteiras:
+        for b in fronteiras:
+            if a <= b:
+                assert dobrar(texto[para_original(mapa, a):para_original(mapa, b)]) == dobrado[a:b]
@@ -0,0 +1,86 @@
+from estrutura import obter_estrutura
+
+LEI = """LEI DE TESTE
+
+PARTE GERAL
+
+TÍTULO I
+Das Pessoas
+
+Art. 1º Toda pessoa é capaz de direitos e deveres.
+§ 1º A capacidade começa com o nascimento.
+§ 2º A lei põe a salvo os direitos do nascituro.
+Art. 2º São absolutamente incapazes:
+I - os menores de dezesseis anos;
+II - os que não tiverem discernimento.
+
+TÍTULO II
+Dos Bens
+
+Art. 3º Os bens são móveis ou imóveis.
+Art. 4º O prazo para usucapião de bens móveis é de três anos.
+
+PARTE ESPECIAL
+
+TÍTULO I
+Das Obrigações
+
+Art. 5º O devedor responde pelos bens e pelo prazo.
+"""
+
+
+def estrutura(lei_temporaria):
+    return obter_estrutura(lei_temporaria(LEI), "TST")
+
+
+def caminhos(e, ids):
+    return [e.caminho(id_no) for id_no in ids]
+
+
+def test_divisoes(lei_temporaria):
+    assert [rotulo for _, rotulo in estrutura(lei_temporaria).divisoes()] == [
+        "Parte Geral",
+        "Parte Geral › Título I",
+        "Parte Geral › Título II",
+        "Parte Especial",
+        "Parte Especial › Título I",
+    ]
+
+
+def test_menor_fragmento_e_o_paragrafo_ou_inciso(lei_temporaria):
+    e = estrutura(lei_temporaria)
+    assert caminhos(e, e.buscar(["nascimento"])) == [["Parte Geral", "Título I", "Art. 1", "§ 1º"]]
+    assert caminhos(e, e.buscar(["menores"])) == [["Parte Geral", "Título I", "Art. 2", "inciso I"]]
+
+
+def test_um_fragmento_por_trecho_que_contem_o_termo(lei_temporaria):
+    e = estrutura(lei_temporaria)
+    assert caminhos(e, e.buscar(["direitos"])) == [
+        ["Parte Geral", "Título I", "Art. 1", "caput"],
+        ["Parte Geral", "Título I", "Art. 1", "§ 2º"],
+    ]
+
+
+def test_termos_espalhados_devolvem_o_artigo(lei_temporaria):
+    e = estrutura(lei_temporaria)
+    # "capaz" está no caput e "nascimento" no § 1º: nenhum trecho tem os dois
+    assert caminhos(e, e.buscar(["capaz", "nascimento"])) == [["Parte Geral", "Título I", "Art. 1"]]
+
+
+def test_busca_sem_acento(lei_temporaria):
+    e = estrutura(lei_temporaria)
+    assert caminhos(e, e.buscar(["imoveis"])) == [["Parte Geral", "Título II", "Art. 3", "caput"]]
+
+
+def test_busca_restrita_a_divisao(lei_temporaria):
+    e = estrutura(lei_temporaria)
+    divisoes = {rotulo: id_no for id_no, rotulo in e.divisoes()}
+    assert len(e.buscar(["bens"])) == 4
+    assert caminhos(e, e.buscar(["bens"], divisoes["Parte Geral › Título II"])) == [
+        ["Parte Geral", "Título II", "Art. 3", "caput"],
+        ["Parte Geral", "Título II", "Art. 4", "caput"],
+    ]
+    assert caminhos(e, e.buscar(["prazo"], divisoes["Parte Especial"])) == [
+        ["Parte Especial", "Título I", "Art. 5", "caput"],
+    ]
+    assert e.buscar(["nascimento"], divisoes["Parte Especial"]) == []
@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+from google.genai.errors import APIError
+
+import ia
+from ia import explicar_em_streaming, explicar_artigos, LacoCompartilhado, MODELO, MENSAGEM_FALHA_API
+from limitador import LimitadorTaxa
+
+# =========================================================================
+# CLIENTE FALSO (SEM REDE)
+# =========================================================================
+#
+# Imita client.aio.models.generate_content_stream do google-genai: uma
+# corrotina que devolve um iterador assíncrono de pedaços com `.text`. As
+# respostas são escolhidas pelo texto do artigo (que vai no prompt).
+
+
+class Pedaco:
+    def __init__(self, text):
+        self.text = text
+
+
+class ModelosFalsos:
+    def __init__(self, respostas, falhas=None, eventos=None):
+        self.respostas = respostas          # artigo -> lista de pedaços
+        self.falhas = dict(falhas or {})    # artigo -> quantas chamadas falham antes de funcionar
+        self.eventos = eventos if eventos is not None else []
+        self.chamadas = []
+
+    def _artigo(self, contents):
+        return next(artigo for artigo in self.respostas if contents.endswith(artigo))
+
+    async def generate_content_stream(self, model, contents):
+        artigo = self._artigo(contents)
+        self.chamadas.append((model, artigo))
+        if self.falhas.get(artigo, 0) > 0:
+            self.falhas[artigo] -= 1
+            self.eventos.append(("falha", artigo))
+            raise APIError(429, {"error": {"message": "quota", "status": "RESOURCE_EXHAUSTED"}})
+
+        async def pedacos():
+            for texto in self.respostas[artigo]:
+                await asyncio.sleep(0)  # devolve o controle ao laço entre pedaços
+                self.eventos.append(("pedaco", artigo))
+                yield Pedaco(texto)
+        return pedacos()
+
+
+class ClienteFalso:
+    def __init__(self, *args, **kwargs):
+        self.models = ModelosFalsos(*args, **kwargs)
+        self.aio = self
+
+
+@pytest.fixture
+def limitador():
+    """Limitador sem espera: os testes não dependem do relógio."""
+    return LimitadorTaxa(requisicoes_por_minuto=60000, rajada=100)
+
+
+@pytest.fixture
+def esperas(monkeypatch):
+    """Troca o asyncio.sleep do backoff por um que só registra o atraso e cede o laço."""
+    registradas = []
+    dormir = asyncio.sleep
+
+    async def sleep_falso(atraso, *args, **kwargs):
+        if atraso:
+            registradas.append(atraso)
+        await dormir(0)
+
+    monkeypatch.setattr(ia.asyncio, "sleep", sleep_falso)
+    return registradas
+
+
+def test_pedacos_chegam_em_ordem(limitador):
+    cliente = ClienteFalso({"Art. 1º": ["A lei ", "diz ", "isto."]})
+    recebidos = []
+
+    texto = asyncio.run(explicar_em_streaming(cliente, "Art. 1º", ao_receber=recebidos.append, limitador=limitador))
+
+    assert texto == "A lei diz isto."
+    assert recebidos == ["A lei ", "A lei diz ", "A lei diz isto."]
+    assert cliente.models.chamadas == [(MODELO, "Art. 1º")]
+
+
+def test_erro_da_api_e_nova_tentativa(limitador, esperas):
+    cliente = ClienteFalso({"Art. 2º": ["Explicação."]}, falhas={"Art. 2º": 1})
+    avisos, erros = [], []
+
+    texto = asyncio.run(explicar_em_streaming(
+        cliente, "Art. 2º", ao_avisar=avisos.append, ao_errar=erros.append, limitador=limitador
+    ))
+
+    assert texto == "Explicação."
+    assert len(cliente.models.chamadas) == 2
+    assert len(avisos) == 1 and "Tentativa 1/" in avisos[0]
+    assert erros == []
+    assert esperas == [ia.ATRASO_INICIAL]
+
+
+def test_falha_em_todas_as_tentativas(limitador, esperas):
+    cliente = ClienteFalso({"Art. 3º": ["nunca"]}, falhas={"Art. 3º": ia.MAX_RETRIES})
+    erros = []
+
+    texto = asyncio.run(explicar_em_streaming(cliente, "Art. 3º", ao_errar=erros.append, limitador=limitador))
+
+    assert texto == MENSAGEM_FALHA_API
+    assert len(erros) == 1
+    # Backoff exponencial entre as tentativas, nenhum depois da última
+    assert esperas == [ia.ATRASO_INICIAL * 2 ** k for k in range(ia.MAX_RETRIES - 1)]
+
+
+def test_varios_artigos_ao_mesmo_tempo(monkeypatch, limitador):
+    monkeypatch.setattr(ia, "obter_limitador", lambda: limitador)
+    respostas = {f"Art. {n}º": [f"{n}a ", f"{n}b ", f"{n}c"] for n in range(1, 4)}
+    cliente = ClienteFalso(respostas)
+    recebidos = []
+
+    explicacoes = asyncio.run(explicar_artigos(
+        cliente, list(respostas), ao_receber=lambda i, texto: recebidos.append((i, texto))
+    ))
+
+    assert explicacoes == ["1a 1b 1c", "2a 2b 2c", "3a 3b 3c"]
+    # Os pedaços dos artigos se intercalam: as chamadas correm juntas, não uma após a outra
+    ordem = [artigo for _, artigo in cliente.models.eventos]
+    assert ordem[:3] == list(respostas)
+    # Cada artigo recebe os seus próprios pedaços, em ordem
+    for i in range(3):
+        assert [texto for j, texto in recebidos if j == i] == [
+            f"{i + 1}a ", f"{i + 1}a {i + 1}b ", f"{i + 1}a {i + 1}b {i + 1}c"
+        ]
+
+
+def test_backoff_nao_bloqueia_o_laco(monkeypatch, limitador, esperas):
+    monkeypatch.setattr(ia, "obter_limitador", lambda: limitador)
+    monkeypatch.setattr(ia.time, "sleep", pytest.fail)  # nada pode dormir bloqueando a thread
+    eventos = []
+    cliente = ClienteFalso(
+        {"Art. 4º": ["lento"], "Art. 5º": ["x ", "y ", "z"]},
+        falhas={"Art. 4º": 1},
+        eventos=eventos,
+    )
+
+    explicacoes = asyncio.run(explicar_artigos(cliente, ["Art. 4º", "Art. 5º"]))
+
+    assert explicacoes == ["lento", "x y z"]
+    assert esperas == [ia.ATRASO_INICIAL]
+    # Enquanto o Art. 4º espera o backoff, o Art. 5º continua recebendo pedaços
+    assert eventos.index(("falha", "Art. 4º")) < eventos.index(("pedaco", "Art. 5º"))
+    assert eventos.index(("pedaco", "Art. 5º")) < eventos.index(("pedaco", "Art. 4º"))
+
+
+def test_laco_compartilhado(limitador):
+    cliente = ClienteFalso({"Art. 6º": ["um ", "dois"]})
+    laco = LacoCompartilhado()
+
+    futuro = laco.enviar(explicar_em_streaming(cliente, "Art. 6º", limitador=limitador))
+
+    assert futuro.result(timeout=5) == "um dois"
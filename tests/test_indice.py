@@ -0,0 +1,86 @@
+import pytest
+
+from corpus import obter_corpus
+from indice import IndiceInvertido, verificar_equivalencia, obter_indice
+from consultas import buscar_ids
+from motor import LEIS_CONFIG
+
+# Verificação diferencial do índice invertido: para cada lei do repositório,
+# consultas fixas e substrings sorteadas do próprio texto devem devolver
+# exatamente os artigos de uma varredura literal (ver indice.verificar_equivalencia).
+
+
+@pytest.mark.parametrize("nome_arquivo", [config['file'] for config in LEIS_CONFIG.values()])
+def test_indice_equivale_a_varredura(na_raiz, nome_arquivo):
+    assert verificar_equivalencia(nome_arquivo) == []
+
+
+@pytest.mark.parametrize("termo", ["lei", "direito", "prazo", "ferias", "dano moral", "pessoa humana"])
+def test_contagens_iguais_as_do_texto(na_raiz, termo):
+    # O tf do BM25 vem das listas de posições; deve bater com a contagem no texto
+    # (None: contagens() preferiu o texto para esta lei)
+    usadas = 0
+    for config in LEIS_CONFIG.values():
+        indice = obter_indice(config['file'], config['sigla'])
+        ids = buscar_ids(config['file'], config['sigla'], [termo])
+        contagens = indice.contagens(termo, ids)
+        if contagens is not None:
+            usadas += 1
+            assert contagens == {i: indice.corpus.contar(i, termo) for i in ids}
+    assert usadas
+
+
+def test_contagens_recusa_pontuacao(na_raiz):
+    config = next(iter(LEIS_CONFIG.values()))
+    indice = obter_indice(config['file'], config['sigla'])
+    assert indice.contagens("art. 5", [0, 1]) is None
+
+
+def test_cache_de_expansoes_e_limitado(na_raiz, monkeypatch):
+    monkeypatch.setattr("indice.TAMANHO_CACHE_EXPANSOES", 8)
+    config = next(iter(LEIS_CONFIG.values()))
+    indice = obter_indice(config['file'], config['sigla'])
+    for n in range(50):
+        indice.buscar([f"termo{n}"])
+    assert len(indice._cache_expansao) <= 8
+    assert indice.buscar(["dignidade"]) == indice.buscar(["dignidade"])
+
+
+def _artigos(*textos):
+    return "LEI DE TESTE\n\n" + "".join(f"Art. {numero} {texto}\n" for numero, texto in textos)
+
+
+def _postings(indice):
+    return {termo: tuple(map(list, entrada)) for termo, entrada in indice._postings.items()}
+
+
+def test_atualizacao_incremental_igual_a_construcao_do_zero(lei_temporaria, monkeypatch):
+    monkeypatch.setattr("corpus.INTERVALO_VERIFICACAO", 0)
+    v1 = [
+        ("1º", "O prazo do recurso é de quinze dias."),
+        ("2º", "O dano moral é indenizável."),
+        ("3º", "O contrato faz lei entre as partes."),
+        ("4º", "As férias são remuneradas."),
+        ("5º", "O prazo prescricional é de dez anos."),
+    ]
+    arquivo = lei_temporaria(_artigos(*v1))
+    anterior = obter_indice(arquivo, "TST")
+    assert anterior.buscar(["ferias"]) == [3]
+
+    # Edita o art. 2º, insere o art. 3º-A e remove o art. 4º
+    v2 = [v1[0], ("2º", "O dano moral e o dano estético são indenizáveis."), v1[2],
+          ("3", "-A. O contrato de adesão tem prazo."), v1[4]]
+    lei_temporaria(_artigos(*v2))
+    indice = obter_indice(arquivo, "TST")
+    corpus = obter_corpus(arquivo, "TST")
+
+    assert indice is not anterior and indice.corpus is corpus
+    assert corpus.versao_anterior == anterior.corpus.versao
+    assert list(corpus.mapa_anterior) == [0, -1, 2, -1, 4]
+
+    do_zero = IndiceInvertido(corpus)
+    assert _postings(indice) == _postings(do_zero)
+    assert indice.termos == do_zero.termos
+    assert list(indice.comprimentos) == list(do_zero.comprimentos)
+    for termo in ("prazo", "dano", "ferias", "adesao", "contrato"):
+        assert indice.buscar([termo]) == do_zero.buscar([termo])
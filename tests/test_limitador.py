@@ -0,0 +1,34 @@
+import asyncio
+
+from limitador import LimitadorTaxa, ReservaOciosa
+
+
+def test_reserva_ociosa_so_usa_balde_cheio():
+    limitador = LimitadorTaxa(requisicoes_por_minuto=600, rajada=2)  # 10 tokens/s
+    assert limitador.reservar_se_cheio() == 0.0
+    # Com o balde pela metade, nada é reservado: só diz quanto falta para encher
+    falta = limitador.reservar_se_cheio()
+    assert 0 < falta <= 0.1
+    assert limitador.reservar() == 0.0  # a chamada interativa usa o token que sobrou
+
+
+def test_aquecimento_cede_a_vez_as_chamadas_interativas():
+    limitador = LimitadorTaxa(requisicoes_por_minuto=600, rajada=2)
+    ordem = []
+
+    async def aquecimento():
+        await ReservaOciosa(limitador).aguardar_async()
+        ordem.append("aquecimento")
+
+    async def cenario():
+        limitador.reservar()  # uso recente: o balde não está cheio
+        fundo = asyncio.ensure_future(aquecimento())
+        await asyncio.sleep(0)
+        # O usuário chega depois do aquecimento, mas é atendido primeiro e sem espera
+        espera = await limitador.aguardar_async()
+        ordem.append("usuario")
+        await fundo
+        return espera
+
+    assert asyncio.run(cenario()) == 0.0
+    assert ordem == ["usuario", "aquecimento"]
@@ -0,0 +1,98 @@
+from corpus import obter_corpus, dobrar_com_mapa
+from motor import trecho_kwic, referencia, resultado_artigo, atualizar_referencia, atualizar_referencias, resolver_referencia
+
+
+def _artigos(*textos):
+    return "LEI DE TESTE\n\n" + "".join(f"Art. {numero} {texto}\n" for numero, texto in textos)
+
+
+PRAZO = ("1º", "O prazo é de dez dias.")
+DANO = ("2º", "O dano moral é indenizável.")
+FERIAS = ("3º", "As férias são remuneradas.")
+
+
+def kwic(texto, termos, largura=300):
+    """(preview, trechos destacados) de trecho_kwic sobre o texto."""
+    preview, destaques = trecho_kwic(texto, *dobrar_com_mapa(texto), termos, largura)
+    return preview, [preview[a:b] for a, b in destaques]
+
+
+def test_kwic_ocorrencia_no_inicio():
+    preview, destaques = trecho_kwic("Prazo de dez dias.", *dobrar_com_mapa("Prazo de dez dias."), ["prazo"])
+    assert preview == "Prazo de dez dias."
+    assert destaques == [(0, 5)]
+
+
+def test_kwic_ocorrencia_no_fim_de_artigo_longo():
+    texto = " ".join(f"palavra{i}" for i in range(60)) + " o prazo final"
+    preview, destaques = kwic(texto, ["prazo final"], largura=100)
+    assert preview.startswith("...palavra") and preview.endswith(" o prazo final")
+    assert destaques == ["prazo final"]
+    assert preview.rindex("prazo final") + len("prazo final") == len(preview)
+
+
+def test_kwic_ocorrencia_no_meio_corta_nos_dois_lados():
+    texto = " ".join(f"antes{i}" for i in range(60)) + " início " + " ".join(f"depois{i}" for i in range(60))
+    preview, destaques = kwic(texto, ["inicio"], largura=100)
+    assert preview.startswith("...antes") and preview.endswith("...")
+    assert " início " in preview and destaques == ["início"]
+
+
+def test_kwic_ocorrencias_sobrepostas_sao_unidas():
+    assert kwic("O dano moral e material.", ["dano moral", "moral e material"])[1] == ["dano moral e material"]
+    assert kwic("O dano moral e o dano.", ["dano"])[1] == ["dano", "dano"]
+
+
+def test_kwic_destaque_cai_nos_caracteres_acentuados():
+    assert kwic("A ação da União é de ofício.", ["acao", "UNIAO", "ofício"])[1] == ["ação", "União", "ofício"]
+    # Marcas combinantes soltas somem do dobrado; o destaque volta ao original
+    texto = "A ac\u0327a\u0303o civil e a ac\u0327a\u0303o penal."
+    preview, destaques = kwic(texto, ["acao penal", "civil"])
+    assert preview == texto
+    assert destaques == ["civil", "ac\u0327a\u0303o penal"]
+
+
+def test_kwic_sem_ocorrencia():
+    assert kwic("Texto sem o termo.", ["xyz"]) == ("Texto sem o termo.", [])
+    assert kwic("Texto sem o termo.", []) == ("Texto sem o termo.", [])
+
+
+def test_referencia_versionada_sobrevive_a_edicao(lei_temporaria, monkeypatch):
+    monkeypatch.setattr("corpus.INTERVALO_VERIFICACAO", 0)
+    arquivo = lei_temporaria(_artigos(PRAZO, DANO, FERIAS))
+    corpus = obter_corpus(arquivo)
+    prazo, dano, ferias = (referencia(resultado_artigo(corpus, "", i)) for i in range(3))
+    assert prazo == (arquivo, 0, -1, corpus.versao)
+    assert atualizar_referencia(prazo) == prazo
+
+    # O art. 1º-A entra antes do art. 2º e o empurra; o art. 3º sai da lei
+    lei_temporaria(_artigos(PRAZO, ("1", "-A. O contrato faz lei entre as partes."), DANO))
+    novo = obter_corpus(arquivo)
+    assert novo.versao != corpus.versao
+
+    assert atualizar_referencia(prazo) == (arquivo, 0, -1, novo.versao)
+    assert atualizar_referencia(dano) == (arquivo, 2, -1, novo.versao)
+    assert atualizar_referencia(ferias) is None
+    assert atualizar_referencias([dano, ferias, dano]) == [(arquivo, 2, -1, novo.versao)]
+
+    resultado = resolver_referencia(dano)
+    assert resultado["indice"] == 2 and resultado["versao"] == novo.versao
+    assert "dano moral" in resultado["texto_completo"]
+    assert resolver_referencia(ferias) is None
+
+
+def test_referencia_de_versao_antiga_ou_trecho_e_descartada(lei_temporaria, monkeypatch):
+    monkeypatch.setattr("corpus.INTERVALO_VERIFICACAO", 0)
+    arquivo = lei_temporaria(_artigos(PRAZO, DANO))
+    v1 = obter_corpus(arquivo).versao
+    lei_temporaria(_artigos(PRAZO, ("1", "-A. Artigo novo."), DANO))
+    v2 = obter_corpus(arquivo).versao
+
+    # Trechos da árvore estrutural não são remapeados
+    assert atualizar_referencia((arquivo, 0, 3, v1)) is None
+
+    # Só a versão imediatamente anterior tem mapa
+    lei_temporaria(_artigos(PRAZO, ("1", "-A. Artigo novo."), ("1", "-B. Outro artigo novo."), DANO))
+    obter_corpus(arquivo)
+    assert atualizar_referencia((arquivo, 1, -1, v1)) is None
+    assert atualizar_referencia((arquivo, 2, -1, v2))[1] == 3
@@ -0,0 +1,33 @@
+from popularidade import RegistroUso, normalizar_consulta
+
+
+def test_consultas_populares(tmp_path):
+    registro = RegistroUso(str(tmp_path / "uso.sqlite3"))
+    for _ in range(3):
+        registro.registrar_consulta("dano   moral")
+    registro.registrar_consulta("habeas corpus")
+    registro.registrar_consulta("CPF 123.456.789-00")
+
+    assert registro.consultas_populares(10) == ["dano moral"]
+    assert normalizar_consulta("CPF 123.456.789-00") is None
+
+
+def test_diretorio_invalido_desliga_o_registro(tmp_path):
+    arquivo = tmp_path / "nao_e_diretorio"
+    arquivo.write_text("")
+    registro = RegistroUso(str(arquivo / "uso.sqlite3"))
+
+    assert not registro.ativo
+    registro.registrar_consulta("dano moral")
+    registro.registrar_artigo("constituicao.txt", "abc", 4)
+    assert registro.consultas_populares(10) == []
+    assert registro.artigos_populares(10) == []
+
+
+def test_erro_do_sqlite_nao_derruba_a_leitura(tmp_path):
+    registro = RegistroUso(str(tmp_path / "uso.sqlite3"))
+    registro._conexao.close()  # qualquer operação passa a levantar sqlite3.Error
+
+    registro.registrar_consulta("dano moral")
+    assert registro.consultas_populares(10) == []
+    assert registro.artigos_populares(10) == []
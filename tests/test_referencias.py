@@ -0,0 +1,48 @@
+from corpus import obter_corpus
+from referencias import GrafoReferencias, inicio_adct
+
+LEI = """CONSTITUIÇÃO DE TESTE
+
+Art. 1º Texto do primeiro artigo.
+Art. 2º Nos termos do art. 1º, vale o segundo.
+Art. 9º Só existe no corpo.
+
+ATO DAS DISPOSIÇÕES CONSTITUCIONAIS TRANSITÓRIAS
+
+Art. 1º Primeiro artigo transitório.
+Art. 2º Nos termos do art. 1º, vale o segundo transitório.
+Art. 3º Aplica-se o art. 2º da Constituição.
+Art. 4º Ver o art. 2º do Ato das Disposições Constitucionais Transitórias.
+Art. 5º Observado o art. 9º.
+Art. 6º Ressalvado o art. 1º desta Constituição.
+"""
+
+#  0 1 2 = corpo (arts. 1, 2, 9); 3 a 8 = ADCT (arts. 1 a 6)
+
+
+def grafo(lei_temporaria):
+    arquivo = lei_temporaria(LEI)
+    return GrafoReferencias([obter_corpus(arquivo, "CF")], ["CF"]), arquivo
+
+
+def test_inicio_do_adct(lei_temporaria):
+    assert inicio_adct(obter_corpus(lei_temporaria(LEI), "CF")) == 3
+
+
+def test_citacao_sem_qualificador_fica_na_parte_de_quem_cita(lei_temporaria):
+    g, arquivo = grafo(lei_temporaria)
+    assert g.cita(arquivo, 1) == [(arquivo, 0)]   # corpo -> corpo
+    assert g.cita(arquivo, 4) == [(arquivo, 3)]   # ADCT art. 2 -> ADCT art. 1
+
+
+def test_citacao_qualificada_escolhe_a_parte(lei_temporaria):
+    g, arquivo = grafo(lei_temporaria)
+    assert g.cita(arquivo, 5) == [(arquivo, 1)]   # "da Constituição" -> corpo
+    assert g.cita(arquivo, 6) == [(arquivo, 4)]   # "do Ato das Disposições..." -> ADCT
+    assert g.cita(arquivo, 8) == [(arquivo, 0)]   # "desta Constituição" -> corpo
+
+
+def test_numero_ausente_na_parte_usa_a_outra(lei_temporaria):
+    g, arquivo = grafo(lei_temporaria)
+    assert g.cita(arquivo, 7) == [(arquivo, 2)]   # ADCT sem art. 9 -> art. 9 do corpo
+    assert g.citado_por(arquivo, 3) == [(arquivo, 4)]
@@ -0,0 +1,101 @@
+import re
+from array import array
+from collections import Counter
+
+from corpus import dobrar
+
+# =========================================================================
+# ÍNDICE DE TRIGRAMAS (BUSCA APROXIMADA)
+# =========================================================================
+#
+# Substitui a comparação difflib.SequenceMatcher(termo, texto_do_artigo),
+# que é quadrática e percorre todos os artigos, por um índice invertido de
+# trigramas de caracteres (no estilo do pg_trgm):
+#   - o texto é dobrado (minúsculas, sem acentos, ver corpus.dobrar; só letras e dígitos);
+#   - cada palavra gera os trigramas de "  palavra " (com espaços de borda);
+#   - a similaridade de um artigo é a fração dos trigramas da consulta que
+#     aparecem no artigo, de modo que erros de digitação custam poucos
+#     trigramas e o tamanho do artigo não penaliza o resultado.
+
+PADRAO_PALAVRA = re.compile(r'[a-z0-9]+')
+
+# Similaridade mínima padrão das buscas aproximadas
+LIMITE_SIMILARIDADE = 0.5
+
+
+def trigramas_palavra(palavra):
+    """Trigramas de uma palavra normalizada, com espaços de borda."""
+    preenchida = f"  {palavra} "
+    return {preenchida[i:i + 3] for i in range(len(preenchida) - 2)}
+
+
+def trigramas(texto):
+    """Conjunto de trigramas de um texto qualquer."""
+    resultado = set()
+    for palavra in set(PADRAO_PALAVRA.findall(dobrar(texto))):
+        resultado |= trigramas_palavra(palavra)
+    return resultado
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido trigrama -> documentos. Os documentos são identificados
+    pelas chaves fornecidas na construção (ex.: (codigo, artigo)).
+    """
+
+    def __init__(self, documentos):
+        """`documentos`: iterável de pares (chave, texto)."""
+        self.chaves = []
+        acumulado = {}
+        cache_palavras = {}
+
+        for doc, (chave, texto) in enumerate(documentos):
+            self.chaves.append(chave)
+            presentes = set()
+            for palavra in set(PADRAO_PALAVRA.findall(dobrar(texto))):
+                tri = cache_palavras.get(palavra)
+                if tri is None:
+                    tri = cache_palavras[palavra] = trigramas_palavra(palavra)
+                presentes |= tri
+            for tri in presentes:
+                lista = acumulado.get(tri)
+                if lista is None:
+                    acumulado[tri] = lista = array('I')
+                lista.append(doc)
+
+        self._postings = acumulado
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def buscar(self, consulta, limite=LIMITE_SIMILARIDADE, maximo=None, filtro=None):
+        """
+        Documentos com similaridade >= limite, do mais para o menos similar.
+        `filtro`: função opcional chave -> bool para restringir os documentos.
+        Retorna uma lista de pares (chave, similaridade).
+        """
+        tri_consulta = trigramas(consulta)
+        if not tri_consulta:
+            return []
+
+        # Contagem de trigramas em comum (Counter.update conta em C)
+        contagem = Counter()
+        for tri in tri_consulta:
+            lista = self._postings.get(tri)
+            if lista is not None:
+                contagem.update(lista)
+
+        minimo = limite * len(tri_consulta)
+        resultados = []
+        for doc, comuns in contagem.items():
+            if comuns < minimo:
+                continue
+            if filtro is not None and not filtro(self.chaves[doc]):
+                continue
+            resultados.append((comuns / len(tri_consulta), doc))
+
+        # Mais similares primeiro; empates na ordem de construção do índice
+        resultados.sort(key=lambda item: (-item[0], item[1]))
+        if maximo is not None:
+            resultados = resultados[:maximo]
+        return [(self.chaves[doc], similaridade) for similaridade, doc in resultados]
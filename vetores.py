@@ -0,0 +1,219 @@
+import re
+import math
+
+import numpy as np
+
+from corpus import dobrar
+
+# =========================================================================
+# MODELO VETORIAL (TF-IDF + LSA) PARA ARTIGOS RELACIONADOS
+# =========================================================================
+#
+# Cada artigo vira um vetor TF-IDF (tf sublinear 1 + log tf, idf suavizado,
+# norma L2) sobre as palavras normalizadas (minúsculas, sem acentos), e a
+# matriz documentos x termos é guardada esparsa, em arrays NumPy no formato
+# CSR (inicio_docs/termos/pesos).
+#
+# Com DIMENSOES_LSA > 0, a matriz é reduzida por LSA (SVD truncada,
+# calculada localmente por SVD aleatorizada) e cada artigo passa a ser um
+# vetor denso de DIMENSOES_LSA posições; termos que costumam aparecer juntos
+# ficam próximos, então "dano moral" também encontra artigos sobre
+# "indenização". Consultas e artigos são projetados no mesmo espaço, e os
+# relacionados saem de UM produto matriz-vetor (documentos x dimensões) mais
+# uma seleção parcial dos k maiores (np.argpartition). Com DIMENSOES_LSA = 0,
+# o mesmo produto é feito direto sobre a matriz TF-IDF esparsa.
+#
+# Tudo é calculado no próprio processo, sem serviço externo de embeddings.
+
+PADRAO_TERMO = re.compile(r'[a-z][a-z0-9]+')
+
+DIMENSOES_LSA = 128
+ITERACOES_POTENCIA = 2  # iterações de potência da SVD aleatorizada
+AMOSTRAS_EXTRAS = 16    # colunas além de DIMENSOES_LSA no esboço aleatório
+LINHAS_POR_BLOCO = 1024  # limita a memória dos produtos esparsos
+
+# Cosseno mínimo sugerido para "artigos semelhantes" (ver direito.buscar_semelhantes);
+# bem abaixo do limite dos trigramas, já que os cossenos da LSA raramente passam de 0.6
+LIMITE_SIMILARIDADE = 0.3
+
+
+def termos_texto(texto):
+    """Palavras normalizadas do texto (com 2+ caracteres, começando por letra)."""
+    return PADRAO_TERMO.findall(dobrar(texto))
+
+
+class ModeloVetorial:
+    """
+    Vetores TF-IDF (e, opcionalmente, LSA) de uma coleção de documentos,
+    identificados pelas chaves fornecidas na construção (ex.: (codigo, artigo)).
+    """
+
+    def __init__(self, documentos, dimensoes=DIMENSOES_LSA, semente=0):
+        """`documentos`: iterável de pares (chave, texto)."""
+        self.chaves = []
+        self.vocabulario = {}
+        contagens = []
+        for chave, texto in documentos:
+            self.chaves.append(chave)
+            contagem = {}
+            for termo in termos_texto(texto):
+                t = self.vocabulario.setdefault(termo, len(self.vocabulario))
+                contagem[t] = contagem.get(t, 0) + 1
+            contagens.append(contagem)
+        self._posicao = {chave: doc for doc, chave in enumerate(self.chaves)}
+
+        total = len(self.chaves)
+        tamanhos = np.fromiter((len(c) for c in contagens), dtype=np.int64, count=total)
+        self._inicio_docs = np.zeros(total + 1, dtype=np.int64)
+        np.cumsum(tamanhos, out=self._inicio_docs[1:])
+        nnz = int(self._inicio_docs[-1])
+        self._termos = np.fromiter((t for c in contagens for t in c), dtype=np.int32, count=nnz)
+        frequencias = np.fromiter((f for c in contagens for f in c.values()), dtype=np.float32, count=nnz)
+        # Linha (documento) de cada valor não nulo, para os produtos com np.bincount
+        self._linhas = np.repeat(np.arange(total, dtype=np.int32), tamanhos)
+
+        df = np.bincount(self._termos, minlength=len(self.vocabulario))
+        self.idf = (np.log((1 + total) / (1 + df)) + 1).astype(np.float32)
+        self._pesos = (1 + np.log(frequencias)) * self.idf[self._termos]
+        normas = np.sqrt(np.bincount(self._linhas, weights=self._pesos ** 2, minlength=total))
+        normas[normas == 0] = 1
+        self._pesos /= normas[self._linhas].astype(np.float32)
+
+        self.dimensoes = min(dimensoes, total, len(self.vocabulario))
+        self.vetores_docs = None
+        self.vetores_termos = None
+        self._transposta = None
+        if self.dimensoes > 0:
+            self._reduzir(np.random.default_rng(semente))
+            self._transposta = None
+
+    def __len__(self):
+        return len(self.chaves)
+
+    # ---------------------------------------------------------------------
+    # Produtos com a matriz esparsa X (documentos x termos)
+    # ---------------------------------------------------------------------
+
+    def _produto(self, matriz):
+        """X @ matriz, para `matriz` densa (termos x c)."""
+        return _somar_blocos(self._inicio_docs, self._termos, self._pesos, matriz)
+
+    def _produto_transposto(self, matriz):
+        """X.T @ matriz, para `matriz` densa (documentos x c)."""
+        if self._transposta is None:
+            # A mesma matriz em CSC (agrupada por termo), montada só para a LSA
+            ordem = np.argsort(self._termos, kind="stable")
+            inicio_termos = np.zeros(len(self.vocabulario) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self._termos, minlength=len(self.vocabulario)), out=inicio_termos[1:])
+            self._transposta = (inicio_termos, self._linhas[ordem], self._pesos[ordem])
+        return _somar_blocos(*self._transposta, matriz)
+
+    def _reduzir(self, gerador):
+        """SVD truncada aleatorizada (Halko, Martinsson e Tropp) de X."""
+        colunas = min(self.dimensoes + AMOSTRAS_EXTRAS, len(self.chaves), len(self.vocabulario))
+        aleatoria = gerador.standard_normal((len(self.vocabulario), colunas)).astype(np.float32)
+        base, _ = np.linalg.qr(self._produto(aleatoria))
+        for _ in range(ITERACOES_POTENCIA):
+            base, _ = np.linalg.qr(self._produto_transposto(base))
+            base, _ = np.linalg.qr(self._produto(base))
+        # X ~ base @ (base.T @ X); a SVD da matriz pequena (colunas x termos) dá a de X
+        pequena = self._produto_transposto(base).T
+        u, s, vt = np.linalg.svd(pequena, full_matrices=False)
+        k = self.dimensoes
+        self.vetores_termos = np.ascontiguousarray(vt[:k].T, dtype=np.float32)
+        self.vetores_docs = _normalizar_linhas((base @ u[:, :k]) * s[:k])
+
+    # ---------------------------------------------------------------------
+    # Consultas
+    # ---------------------------------------------------------------------
+
+    def vetor_consulta(self, texto):
+        """Vetor TF-IDF esparso (ids dos termos, pesos) do texto; vazio se nenhum termo é conhecido."""
+        contagem = {}
+        for termo in termos_texto(texto):
+            t = self.vocabulario.get(termo)
+            if t is not None:
+                contagem[t] = contagem.get(t, 0) + 1
+        ids = np.fromiter(contagem, dtype=np.int32, count=len(contagem))
+        pesos = np.fromiter(
+            ((1 + math.log(f)) for f in contagem.values()), dtype=np.float32, count=len(contagem)
+        ) * self.idf[ids]
+        norma = float(np.sqrt(np.dot(pesos, pesos)))
+        return ids, (pesos / norma if norma else pesos)
+
+    def vetor_documento(self, chave):
+        """Vetor TF-IDF esparso (ids dos termos, pesos) do documento `chave`."""
+        doc = self._posicao[chave]
+        a, b = self._inicio_docs[doc], self._inicio_docs[doc + 1]
+        return self._termos[a:b], self._pesos[a:b]
+
+    def similaridades(self, vetor):
+        """Similaridade do cosseno entre o vetor esparso e cada documento (array de len(self))."""
+        ids, pesos = vetor
+        if len(ids) == 0:
+            return np.zeros(len(self.chaves), dtype=np.float32)
+        if self.vetores_docs is not None:
+            projetado = pesos @ self.vetores_termos[ids]
+            norma = float(np.linalg.norm(projetado))
+            if not norma:
+                return np.zeros(len(self.chaves), dtype=np.float32)
+            return self.vetores_docs @ (projetado / norma)
+        denso = np.zeros(len(self.vocabulario), dtype=np.float32)
+        denso[ids] = pesos
+        return np.bincount(self._linhas, weights=self._pesos * denso[self._termos],
+                           minlength=len(self.chaves)).astype(np.float32)
+
+    def mais_similares(self, vetor, maximo=10, limite=0.0, filtro=None, excluir=()):
+        """
+        Até `maximo` documentos com similaridade > limite, do mais para o menos
+        similar. `filtro`: função opcional chave -> bool; `excluir`: chaves a
+        ignorar. Retorna uma lista de pares (chave, similaridade).
+        """
+        pontuacoes = self.similaridades(vetor)
+        if filtro is None and len(pontuacoes) > maximo + len(excluir):
+            # Seleção parcial dos k maiores; só eles são ordenados
+            k = maximo + len(excluir)
+            candidatos = np.argpartition(-pontuacoes, k)[:k]
+            candidatos = candidatos[np.argsort(-pontuacoes[candidatos], kind="stable")]
+        else:
+            candidatos = np.argsort(-pontuacoes, kind="stable")
+
+        resultados = []
+        for doc in candidatos:
+            similaridade = float(pontuacoes[doc])
+            if similaridade <= limite or len(resultados) >= maximo:
+                break
+            chave = self.chaves[doc]
+            if chave in excluir or (filtro is not None and not filtro(chave)):
+                continue
+            resultados.append((chave, similaridade))
+        return resultados
+
+    def relacionados(self, chave, maximo=10, limite=0.0, filtro=None):
+        """Documentos mais parecidos com o documento `chave` (ele próprio excluído)."""
+        return self.mais_similares(self.vetor_documento(chave), maximo, limite, filtro, excluir={chave})
+
+
+def _somar_blocos(inicio, colunas, pesos, matriz):
+    """Produto da matriz esparsa CSR (inicio, colunas, pesos) pela `matriz` densa, em blocos de linhas."""
+    linhas = len(inicio) - 1
+    # Trabalha com as colunas de `matriz` contíguas: o reduceat ao longo do
+    # último eixo é bem mais rápido do que ao longo do primeiro
+    transposta = np.ascontiguousarray(matriz.T, dtype=np.float32)
+    resultado = np.zeros((matriz.shape[1], linhas), dtype=np.float32)
+    for primeira in range(0, linhas, LINHAS_POR_BLOCO):
+        ultima = min(primeira + LINHAS_POR_BLOCO, linhas)
+        a, b = inicio[primeira], inicio[ultima]
+        if a == b:
+            continue
+        parciais = transposta[:, colunas[a:b]] * pesos[a:b]
+        # reduceat não sabe somar trechos vazios: só as linhas com valores entram
+        cheias = np.flatnonzero(inicio[primeira + 1:ultima + 1] > inicio[primeira:ultima])
+        resultado[:, primeira + cheias] = np.add.reduceat(parciais, inicio[primeira + cheias] - a, axis=1)
+    return resultado.T
+
+
+def _normalizar_linhas(matriz):
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    normas[normas == 0] = 1
+    return np.ascontiguousarray(matriz / normas, dtype=np.float32)